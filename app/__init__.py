@@ -1,25 +1,10 @@
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from .config import Config
-from fastapi.middleware.cors import CORSMiddleware
-from .routes import router, dashboard_router
+def __getattr__(name):
+    # The FastAPI app (app.api) is built on first access, so importing a submodule,
+    # as spawned parse workers do, doesn't load the routes or create the engine
+    if name == "app":
+        from .api import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-config = Config()
-app = FastAPI()
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins = ["*"],
-    allow_credentials = True,
-    allow_methods = ["*"],
-    allow_headers= ["*"],
-)
-
-app.include_router(router, prefix="/file")
-app.include_router(dashboard_router, prefix="/dashboard")
-
-@app.get("/")
-def home():
-    return JSONResponse(status_code=200, content={"message": "Running with Passion"})
-
-__all__ = ["config", "app"]
\ No newline at end of file
+__all__ = ["app"]
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from .config import Config
+from fastapi.middleware.cors import CORSMiddleware
+from .routes import router, dashboard_router, patient_router
+from .database.connection import engine, warm_pool
+from .services.file_service import FileService
+from .utils.llm2 import configure_llm
+from .utils.parallel_csv import shutdown_parse_pool
+from .utils.metrics import REQUEST_DB_QUERIES, REQUEST_LATENCY, render_metrics, start_request
+from .utils.schema_registry import get_schema_registry
+from .utils.serialization import JSONBytesResponse
+
+config = Config()
+logging.basicConfig(level=config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _preload_heavy_modules():
+    # pandas (file parsing) and the LLM SDK stay off the import path; loading them
+    # after the worker is ready spares the first upload the import cost
+    import pandas  # noqa: F401
+    configure_llm()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in every worker after it starts, so nothing here is shared across a fork
+    FileService.ensure_upload_dir()
+    get_schema_registry()
+    await asyncio.to_thread(warm_pool, config.DB_POOL_SIZE)
+    if config.PRELOAD_HEAVY_MODULES:
+        threading.Thread(target=_preload_heavy_modules, name="preload", daemon=True).start()
+    logger.info("Worker ready")
+    yield
+    shutdown_parse_pool()
+    engine.dispose()
+    logger.info("Worker stopped, database pool closed")
+
+
+app = FastAPI(default_response_class=JSONBytesResponse, lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins = ["*"],
+    allow_credentials = True,
+    allow_methods = ["*"],
+    allow_headers= ["*"],
+    expose_headers = ["X-Next-Cursor"],
+)
+
+# Each router and the prefix it is mounted under
+ROUTERS = [(router, "/file"), (dashboard_router, "/dashboard"), (patient_router, "/patients")]
+for included, prefix in ROUTERS:
+    app.include_router(included, prefix=prefix)
+
+# scope["route"] is the router's own route, whose path lacks the prefix it is mounted under
+_ROUTE_PATHS = {id(route): prefix + route.path for included, prefix in ROUTERS for route in included.routes}
+
+@app.middleware("http")
+async def request_metrics(request: Request, call_next):
+    stats = start_request()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    # Label by route template so path parameters don't explode the series count
+    route = request.scope.get("route")
+    path = _ROUTE_PATHS.get(id(route), route.path) if route else "unmatched"
+    REQUEST_LATENCY.observe(elapsed, method=request.method, path=path, status=response.status_code)
+    REQUEST_DB_QUERIES.observe(stats["db_queries"], method=request.method, path=path)
+
+    response.headers["Server-Timing"] = ", ".join(
+        [f"total;dur={elapsed * 1000:.1f}"]
+        + [f"{name};dur={seconds * 1000:.1f}" for name, seconds in stats["spans"].items()]
+    )
+    response.headers["X-DB-Queries"] = str(stats["db_queries"])
+    return response
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/")
+def home():
+    return JSONResponse(status_code=200, content={"message": "Running with Passion"})
+
+__all__ = ["config", "app"]
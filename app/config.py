@@ -5,5 +5,36 @@ load_dotenv()
 
 class Config:
     DATABASE_URL = os.getenv("DATABASE_URL")
-    OPENAI_API_KEY= os.getenv("OPENAI_API_KEY")
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
\ No newline at end of file
+    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+    DELETE_CHUNK_SIZE = int(os.getenv("DELETE_CHUNK_SIZE", "5000"))
+    # off | name_dob | name_dob_or_contact
+    PATIENT_MATCH_POLICY = os.getenv("PATIENT_MATCH_POLICY", "name_dob")
+    RESPONSE_CACHE_MB = int(os.getenv("RESPONSE_CACHE_MB", "64"))
+    UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploaded_files")
+    # CSV/TSV uploads from this size up are parsed in byte ranges on a process pool
+    PARALLEL_PARSE_MIN_MB = int(os.getenv("PARALLEL_PARSE_MIN_MB", "64"))
+    PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0"))  # 0 = the cores divided by WORKERS
+    # Connections writing child table rows concurrently during ingestion (SQLite always uses 1)
+    INGEST_WRITERS = int(os.getenv("INGEST_WRITERS", "2"))
+    # Load child tables and new patients with COPY FROM STDIN on Postgres (psycopg2)
+    INGEST_COPY = os.getenv("INGEST_COPY", "true").lower() == "true"
+    # Items each ingestion pipeline queue holds before the stage feeding it blocks
+    PIPELINE_QUEUE_DEPTH = int(os.getenv("PIPELINE_QUEUE_DEPTH", "4"))
+    # At-rest compression of uploads once ingested: zstd (gzip without the zstandard package), gzip or off
+    UPLOAD_COMPRESSION = os.getenv("UPLOAD_COMPRESSION", "zstd")
+    # Days an upload file is kept after its log last changed, per status; "preview" covers files never processed
+    UPLOAD_RETENTION_DAYS = os.getenv("UPLOAD_RETENTION_DAYS", "deleted=30,preview=7")
+    # Uploads are removed, oldest and least needed first, while the upload dir is over this (0 = no budget)
+    UPLOAD_DISK_BUDGET_MB = int(os.getenv("UPLOAD_DISK_BUDGET_MB", "0"))
+    # Server profile used by app/main.py
+    HOST = os.getenv("HOST", "127.0.0.1")
+    PORT = int(os.getenv("PORT", "8000"))
+    WORKERS = int(os.getenv("WORKERS", "1"))
+    RELOAD = os.getenv("RELOAD", "false").lower() == "true"
+    SHUTDOWN_TIMEOUT = int(os.getenv("SHUTDOWN_TIMEOUT", "30"))
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    # Import pandas and the LLM SDK in the background once a worker is ready
+    PRELOAD_HEAVY_MODULES = os.getenv("PRELOAD_HEAVY_MODULES", "true").lower() == "true"
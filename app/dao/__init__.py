@@ -1,7 +1,7 @@
 from .get_statistics import FileStatistics
-from .all_data import fetch_full_database_data
+from .all_data import fetch_full_database_data, fetch_file_data
 
 file_statistics = FileStatistics()
 
-__all__ = ["file_statistics", "fetch_full_database_data"]
+__all__ = ["file_statistics", "fetch_full_database_data", "fetch_file_data"]
 
@@ -1,119 +1,116 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 from app.models.core import (
     Patient, Hospital, Condition, Treatment,
     Diagnosis, Lifestyle, LabResult, FamilyHistory
 )
 
-def fetch_full_database_data(db: Session) -> dict:
-    """
-    Description: Fetching complete data from database
-    """
-    result = {}
-    table_order = ["patient", "lifestyle", "diagnosis", "lab_result", "treatment", "hospital", "family_history"]
-
-    def reorder_fields(data: dict, order: list):
-        return {field: data.pop(field) for field in order if field in data} | data
-
-    patients = db.query(Patient).options(joinedload(Patient.hospital)).all()
-    enriched_patients = []
-    for p in patients:
-        p_data = p.__dict__.copy()
-        p_data.pop("_sa_instance_state", None)
-        p_data["hospital_name"] = p.hospital.hospital_name if p.hospital else None
-        p_data.pop("hospital_id", None)
-        ordered_fields = [
-            "patient_id", "first_name", "last_name", "phone", "email",
-            "gender", "address", "country", "date_of_birth", "hospital_name", "file_id"
-        ]
-        enriched_patients.append(reorder_fields(p_data, ordered_fields))
-    result["patient"] = enriched_patients
 
-    lifestyles = db.query(Lifestyle).options(joinedload(Lifestyle.patient)).all()
-    result["lifestyle"] = [
-        reorder_fields({
-            "lifestyle_id": l.lifestyle_id,
-            "patient_id": l.patient_id,
-            "first_name": l.patient.first_name if l.patient else None,
-            "alcohol_use": l.alcohol_use,
-            "diet": l.diet,
-            "smoking_status": l.smoking_status,
-            "exercise_habit": l.exercise_habit,
-            "file_id": l.file_id
-        }, [
-            "lifestyle_id", "patient_id", "first_name", "alcohol_use",
-            "diet", "smoking_status", "exercise_habit", "file_id"
-        ]) for l in lifestyles
-    ]
+def _rows(db: Session, query) -> list:
+    return [dict(row) for row in db.execute(query).mappings()]
 
-    diagnoses = db.query(Diagnosis).options(joinedload(Diagnosis.condition), joinedload(Diagnosis.patient)).all()
-    result["diagnosis"] = [
-        {
-            "diagnosis_id": d.diagnosis_id,
-            "patient_id": d.patient_id,
-            "first_name": d.patient.first_name if d.patient else None,
-            "diagnosis_date": d.diagnosis_date,
-            "condition_name": d.condition.condition_name if d.condition else None,
-            "file_id": d.file_id
-        } for d in diagnoses
-    ]
 
-    lab_results = db.query(LabResult).options(joinedload(LabResult.patient)).all()
-    result["lab_result"] = [
-        reorder_fields({
-            "result_id": lr.result_id,
-            "patient_id": lr.patient_id,
-            "first_name": lr.patient.first_name if lr.patient else None,
-            "test_name": lr.test_name,
-            "test_value": lr.test_value,
-            "unit": lr.unit,
-            "test_date": lr.test_date,
-            "file_id": lr.file_id
-        }, [
-            "result_id", "patient_id", "first_name", "test_name",
-            "test_value", "unit", "test_date", "file_id"
-        ]) for lr in lab_results
-    ]
+def fetch_full_database_data(db: Session) -> dict:
+    """
+    Description: Fetching complete data from database.
+    Each table is projected in SQL to the row shapes in app.schemas.responses.
+    """
+    return {
+        "patient": _rows(db, select(
+            Patient.patient_id, Patient.first_name, Patient.last_name, Patient.phone, Patient.email,
+            Patient.gender, Patient.address, Patient.country, Patient.date_of_birth,
+            Hospital.hospital_name, Patient.file_id,
+        ).outerjoin(Hospital, Patient.hospital_id == Hospital.hospital_id)),
+        "lifestyle": _rows(db, select(
+            Lifestyle.lifestyle_id, Lifestyle.patient_id, Patient.first_name, Lifestyle.alcohol_use,
+            Lifestyle.diet, Lifestyle.smoking_status, Lifestyle.exercise_habit, Lifestyle.file_id,
+        ).outerjoin(Patient, Lifestyle.patient_id == Patient.patient_id)),
+        "diagnosis": _rows(db, select(
+            Diagnosis.diagnosis_id, Diagnosis.patient_id, Patient.first_name,
+            Diagnosis.diagnosis_date, Condition.condition_name, Diagnosis.file_id,
+        ).outerjoin(Patient, Diagnosis.patient_id == Patient.patient_id)
+         .outerjoin(Condition, Diagnosis.condition_id == Condition.condition_id)),
+        "lab_result": _rows(db, select(
+            LabResult.result_id, LabResult.patient_id, Patient.first_name, LabResult.test_name,
+            LabResult.test_value, LabResult.test_value_numeric, LabResult.unit, LabResult.test_date,
+            LabResult.file_id,
+        ).outerjoin(Patient, LabResult.patient_id == Patient.patient_id)),
+        "treatment": _rows(db, select(
+            Treatment.treatment_id, Treatment.patient_id, Patient.first_name, Treatment.treatment_type,
+            Treatment.start_date, Treatment.end_date, Treatment.outcome, Treatment.file_id,
+        ).outerjoin(Patient, Treatment.patient_id == Patient.patient_id)),
+        "hospital": _rows(db, select(
+            Hospital.hospital_id, Hospital.hospital_name, Hospital.hospital_address, Hospital.file_id,
+        )),
+        "family_history": _rows(db, select(
+            FamilyHistory.history_id, FamilyHistory.patient_id, Patient.first_name,
+            FamilyHistory.relative, Condition.condition_name, FamilyHistory.file_id,
+        ).outerjoin(Patient, FamilyHistory.patient_id == Patient.patient_id)
+         .outerjoin(Condition, FamilyHistory.condition_id == Condition.condition_id)),
+    }
 
-    treatments = db.query(Treatment).options(joinedload(Treatment.patient)).all()
-    result["treatment"] = [
-        reorder_fields({
-            "treatment_id": t.treatment_id,
-            "patient_id": t.patient_id,
-            "first_name": t.patient.first_name if t.patient else None,
-            "treatment_type": t.treatment_type,
-            "start_date": t.start_date,
-            "end_date": t.end_date,
-            "outcome": t.outcome,
-            "file_id": t.file_id
-        }, [
-            "treatment_id", "patient_id", "first_name", "treatment_type",
-            "start_date", "end_date", "outcome", "file_id"
-        ]) for t in treatments
-    ]
 
-    hospitals = db.query(Hospital).all()
-    result["hospital"] = [
-        reorder_fields({
-            "hospital_id": h.hospital_id,
-            "hospital_name": h.hospital_name,
-            "hospital_address": h.hospital_address,
-            "file_id": h.file_id
-        }, [
-            "hospital_id", "hospital_name", "hospital_address", "file_id"
-        ]) for h in hospitals
-    ]
+def fetch_file_data(db: Session, file_id: int) -> dict:
+    """
+    Description: Patients of a file with their hospital, and the child rows of those patients.
+    Child tables without rows are left out.
+    """
+    patients = db.execute(
+        select(
+            Patient.patient_id, Patient.first_name, Patient.last_name, Patient.date_of_birth,
+            Patient.gender, Patient.phone, Patient.email, Patient.address, Patient.country,
+            Patient.hospital_id, Patient.file_id,
+            Hospital.hospital_id.label("joined_hospital_id"), Hospital.hospital_name,
+            Hospital.hospital_address, Hospital.file_id.label("hospital_file_id"),
+        )
+        .outerjoin(Hospital, Patient.hospital_id == Hospital.hospital_id)
+        .where(Patient.file_id == file_id)
+    ).mappings().all()
+    if not patients:
+        return {}
 
-  
-    histories = db.query(FamilyHistory).options(joinedload(FamilyHistory.condition), joinedload(FamilyHistory.patient)).all()
-    result["family_history"] = [
-        {
-            "history_id": fh.history_id,
-            "patient_id": fh.patient_id,
-            "first_name": fh.patient.first_name if fh.patient else None,
-            "relative": fh.relative,
-            "condition_name": fh.condition.condition_name if fh.condition else None,
-            "file_id": fh.file_id
-        } for fh in histories
-    ]
+    patient_rows = []
+    for row in patients:
+        patient = dict(row)
+        hospital = {
+            "hospital_id": patient.pop("joined_hospital_id"),
+            "hospital_name": patient.pop("hospital_name"),
+            "hospital_address": patient.pop("hospital_address"),
+            "file_id": patient.pop("hospital_file_id"),
+        }
+        if hospital["hospital_id"] is not None:
+            patient["hospital"] = hospital
+        patient_rows.append(patient)
+    result = {"patient": patient_rows}
 
+    file_patients = select(Patient.patient_id).where(Patient.file_id == file_id).scalar_subquery()
+    related = {
+        "treatment": select(
+            Treatment.treatment_id, Treatment.patient_id, Treatment.treatment_type,
+            Treatment.start_date, Treatment.end_date, Treatment.outcome, Treatment.file_id,
+        ).where(Treatment.patient_id.in_(file_patients)),
+        "diagnosis": select(
+            Diagnosis.diagnosis_id, Diagnosis.patient_id, Diagnosis.diagnosis_date,
+            Diagnosis.file_id, Condition.condition_name,
+        ).outerjoin(Condition, Diagnosis.condition_id == Condition.condition_id)
+         .where(Diagnosis.patient_id.in_(file_patients)),
+        "lifestyle": select(
+            Lifestyle.lifestyle_id, Lifestyle.patient_id, Lifestyle.smoking_status,
+            Lifestyle.alcohol_use, Lifestyle.exercise_habit, Lifestyle.diet, Lifestyle.file_id,
+        ).where(Lifestyle.patient_id.in_(file_patients)),
+        "lab_result": select(
+            LabResult.result_id, LabResult.patient_id, LabResult.test_name,
+            LabResult.test_value, LabResult.test_value_numeric, LabResult.unit,
+            LabResult.test_date, LabResult.file_id,
+        ).where(LabResult.patient_id.in_(file_patients)),
+        "family_history": select(
+            FamilyHistory.history_id, FamilyHistory.patient_id, FamilyHistory.relative,
+            FamilyHistory.file_id, Condition.condition_name,
+        ).outerjoin(Condition, FamilyHistory.condition_id == Condition.condition_id)
+         .where(FamilyHistory.patient_id.in_(file_patients)),
+    }
+    for name, query in related.items():
+        rows = _rows(db, query)
+        if rows:
+            result[name] = rows
     return result
@@ -0,0 +1,18 @@
+from sqlalchemy import Table
+from sqlalchemy.orm import Session
+
+
+def insert_on_conflict(db: Session, table: Table):
+    """
+    Description: INSERT for `table` that can take ON CONFLICT clauses
+    (on_conflict_do_nothing / on_conflict_do_update), on Postgres and SQLite.
+    None on other databases, where callers check for existing rows first.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(table)
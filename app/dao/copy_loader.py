@@ -0,0 +1,100 @@
+import io
+import re
+from datetime import date, datetime
+from sqlalchemy import Column, Table, text
+from sqlalchemy.orm import Session
+from app.config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Backslash escapes of COPY's text format
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+NULL = "\\N"
+
+# Postgres drivers with a COPY FROM STDIN API
+COPY_DRIVERS = ("psycopg", "psycopg2")
+
+
+def copy_supported(db: Session) -> bool:
+    """
+    Description: COPY FROM STDIN needs Postgres through psycopg (3) or psycopg2.
+    Everything else, and INGEST_COPY=false, uses executemany.
+    """
+    dialect = db.get_bind().dialect
+    return Config.INGEST_COPY and dialect.name == "postgresql" and dialect.driver in COPY_DRIVERS
+
+
+_FORMATTERS = {
+    bool: lambda value: "t" if value else "f",
+    float: repr,
+    date: date.isoformat,
+    datetime: datetime.isoformat,
+}
+
+_SPECIAL = re.compile(r"[\\\t\n\r]")
+
+
+def _copy_column(values: list) -> list:
+    formatted = [
+        value if value is None or type(value) is str else _FORMATTERS.get(type(value), str)(value)
+        for value in values
+    ]
+    # One scan of the whole column decides whether any value needs escaping; usually none does
+    if _SPECIAL.search("".join(value for value in formatted if value is not None)):
+        formatted = [None if value is None else value.translate(_ESCAPES) for value in formatted]
+    return [NULL if value is None else value for value in formatted]
+
+
+def copy_buffer(rows: list, columns: list) -> io.StringIO:
+    """
+    Description: Rows as COPY text format (tab separated, \\N for NULL) in memory,
+    built a column at a time.
+    """
+    cells = [_copy_column([row.get(column) for row in rows]) for column in columns]
+    buffer = io.StringIO()
+    buffer.write("\n".join(map("\t".join, zip(*cells))))
+    buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def copy_rows(db: Session, table: Table, rows: list) -> int:
+    """
+    Description: Load rows into a table with COPY FROM STDIN on the session's
+    connection, inside its transaction. Columns left out of every row get their
+    defaults (serial ids). Caller commits.
+    """
+    if not rows:
+        return 0
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    preparer = db.get_bind().dialect.identifier_preparer
+    statement = "COPY {} ({}) FROM STDIN".format(
+        preparer.format_table(table), ", ".join(preparer.quote(column) for column in columns)
+    )
+    buffer = copy_buffer(rows, columns)
+    cursor = db.connection().connection.cursor()
+    try:
+        if db.get_bind().dialect.driver == "psycopg2":
+            cursor.copy_expert(statement, buffer)
+        else:
+            with cursor.copy(statement) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+def allocate_ids(db: Session, column: Column, count: int) -> list:
+    """
+    Description: Reserve `count` values of a serial column's sequence in one
+    round trip, so rows can be written with their keys already known. Values
+    that end up unused leave gaps, as a rolled back insert would.
+    """
+    if count <= 0:
+        return []
+    return db.execute(
+        text("SELECT nextval(pg_get_serial_sequence(:table, :column)) FROM generate_series(1, :count)")
+        .bindparams(table=column.table.name, column=column.name, count=count)
+    ).scalars().all()
@@ -0,0 +1,163 @@
+from collections import Counter
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.dao.conflicts import insert_on_conflict
+from app.dao.identity_resolution import identity_keys
+from app.models.core import (
+    Patient, Hospital, Lifestyle, LabResult,
+    Treatment, Diagnosis, FamilyHistory, PatientIdentity, PatientProfile, patient_conditions
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables hanging off patient, deleted before their parents
+CHILD_MODELS = [LabResult, Treatment, Diagnosis, Lifestyle, FamilyHistory]
+
+# Patient columns identity keys are built from (app/dao/identity_resolution.py)
+IDENTITY_COLUMNS = ["first_name", "last_name", "date_of_birth", "email", "phone"]
+
+
+def _delete_in_chunks(db: Session, model, condition, chunk_size: int) -> int:
+    """
+    Description: DELETE ... WHERE pk IN (SELECT pk ... LIMIT n) until nothing matches,
+    committing between chunks so locks are held briefly.
+    """
+    pk = model.__table__.primary_key.columns.values()[0]
+    deleted = 0
+    while True:
+        # correlate(None): the subquery selects from the same table as the DELETE
+        chunk = select(pk).where(condition).limit(chunk_size).correlate(None).scalar_subquery()
+        result = db.execute(delete(model).where(pk.in_(chunk)).execution_options(synchronize_session=False))
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < chunk_size:
+            return deleted
+
+
+def _rekey(db: Session, patient_ids: list):
+    # Identity keys of kept patients, rebuilt from their stored row under their new file
+    patients = db.execute(
+        select(Patient.patient_id, Patient.file_id, *(getattr(Patient, column) for column in IDENTITY_COLUMNS))
+        .where(Patient.patient_id.in_(patient_ids))
+    ).all()
+    values = [
+        {"identity_key": key, "patient_id": patient.patient_id, "file_id": patient.file_id}
+        for patient in patients
+        for key in identity_keys(patient._asdict()).values()
+    ]
+    if not values:
+        return
+    insert = insert_on_conflict(db, PatientIdentity.__table__)
+    if insert is not None:
+        db.execute(insert.values(values).on_conflict_do_nothing())
+        return
+    # A key already owned by another patient stays with it
+    taken = set(db.execute(
+        select(PatientIdentity.identity_key)
+        .where(PatientIdentity.identity_key.in_([value["identity_key"] for value in values]))
+    ).scalars())
+    db.execute(PatientIdentity.__table__.insert(), [value for value in values if value["identity_key"] not in taken])
+
+
+def delete_file_data(db: Session, file_id: int, chunk_size: int = None) -> dict:
+    """
+    Description: Remove every row ingested from a file with set-based deletes in
+    dependency order: child tables, the file's patient_condition links and
+    identity keys, patient, then hospitals that no remaining patient references.
+    Medical conditions are shared and kept. Patients that other files' rows,
+    condition links or identity keys were merged onto are kept, handed over to
+    one of those files and re-keyed from their stored row.
+    """
+    chunk_size = chunk_size or Config.DELETE_CHUNK_SIZE
+    counts = Counter()
+
+    for model in CHILD_MODELS:
+        counts[model.__tablename__] += _delete_in_chunks(db, model, model.file_id == file_id, chunk_size)
+
+    # The file's own links and keys, on its patients and on those it was merged onto
+    result = db.execute(delete(patient_conditions).where(patient_conditions.c.file_id == file_id))
+    counts["patient_condition"] += result.rowcount
+    counts["patient_identity"] += _delete_in_chunks(db, PatientIdentity, PatientIdentity.file_id == file_id, chunk_size)
+
+    # Whatever is left pointing at a patient belongs to another file
+    still_referenced = [
+        exists().where(model.patient_id == Patient.patient_id) for model in CHILD_MODELS
+    ] + [
+        exists().where(patient_conditions.c.patient_id == Patient.patient_id),
+        exists().where(PatientIdentity.patient_id == Patient.patient_id),
+    ]
+    while True:
+        patient_ids = db.execute(
+            select(Patient.patient_id)
+            .where(Patient.file_id == file_id, *(~ref for ref in still_referenced))
+            .limit(chunk_size)
+        ).scalars().all()
+        if not patient_ids:
+            break
+
+        db.execute(delete(PatientProfile).where(PatientProfile.patient_id.in_(patient_ids)))
+        result = db.execute(
+            delete(Patient).where(Patient.patient_id.in_(patient_ids))
+            .execution_options(synchronize_session=False)
+        )
+        counts["patient"] += result.rowcount
+        db.commit()
+
+    # Patients kept because other files' rows were merged onto them move to one of those files
+    kept = db.execute(select(Patient.patient_id).where(Patient.file_id == file_id)).scalars().all()
+    new_owner = func.coalesce(*(
+        select(func.min(model.file_id)).where(model.patient_id == Patient.patient_id).scalar_subquery()
+        for model in CHILD_MODELS
+    ), *(
+        select(func.min(column)).where(patient_column == Patient.patient_id).scalar_subquery()
+        for column, patient_column in (
+            (patient_conditions.c.file_id, patient_conditions.c.patient_id),
+            (PatientIdentity.file_id, PatientIdentity.patient_id),
+        )
+    ))
+    for start in range(0, len(kept), chunk_size):
+        batch = kept[start:start + chunk_size]
+        result = db.execute(
+            update(Patient).where(Patient.patient_id.in_(batch)).values(file_id=new_owner)
+            .execution_options(synchronize_session=False)
+        )
+        counts["patient_reassigned"] += result.rowcount
+        _rekey(db, batch)
+        db.commit()
+
+    unreferenced = ~exists().where(Patient.hospital_id == Hospital.hospital_id)
+    counts["hospital"] += _delete_in_chunks(
+        db, Hospital, (Hospital.file_id == file_id) & unreferenced, chunk_size
+    )
+
+    logger.info("Deleted data for file %s: %s", file_id, dict(counts))
+    return dict(counts)
+
+
+def latest_patient_id(db: Session, file_id: int) -> int:
+    """
+    Description: Highest patient id a file has created so far, 0 when none.
+    """
+    return db.scalar(select(func.max(Patient.patient_id)).where(Patient.file_id == file_id)) or 0
+
+
+def delete_patients_after(db: Session, file_id: int, patient_id: int) -> int:
+    """
+    Description: Remove the patients a file created after `patient_id`, with their
+    identity keys and patient conditions. Used when an ingestion stops after
+    committing patients whose child rows never made it, so a resume doesn't
+    create them twice. Caller commits.
+    """
+    created_after = select(Patient.patient_id).where(
+        Patient.file_id == file_id, Patient.patient_id > patient_id
+    )
+    db.execute(delete(PatientIdentity).where(PatientIdentity.patient_id.in_(created_after)))
+    db.execute(delete(PatientProfile).where(PatientProfile.patient_id.in_(created_after)))
+    db.execute(delete(patient_conditions).where(patient_conditions.c.patient_id.in_(created_after)))
+    result = db.execute(
+        delete(Patient).where(Patient.file_id == file_id, Patient.patient_id > patient_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -1,30 +1,94 @@
-from fastapi import Depends
-from requests import Session
+import base64
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select, tuple_
 
-from app.database.deps import get_db
 from app.models.core import FileUploadLog
 
+# Served by default; the text array columns are only read when full=True
+SUMMARY_COLUMNS = [
+    FileUploadLog.file_id, FileUploadLog.filename, FileUploadLog.file_type,
+    FileUploadLog.upload_time, FileUploadLog.status, FileUploadLog.empty_cells,
+    FileUploadLog.total_rows, FileUploadLog.total_input_columns,
+    FileUploadLog.file_size.label("size"),
+]
+
+ARRAY_COLUMNS = [
+    FileUploadLog.mapped_tables, FileUploadLog.mapped_columns, FileUploadLog.missing_columns,
+    FileUploadLog.extra_columns, FileUploadLog.invalid_types,
+]
+
+
+def encode_cursor(upload_time: Optional[datetime], file_id: int) -> str:
+    """
+    Description: Opaque keyset cursor for the position after a log row.
+    """
+    position = [upload_time.isoformat() if upload_time else None, file_id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """
+    Description: Inverse of encode_cursor. Raises ValueError for anything it did not produce.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        upload_time, file_id = json.loads(raw)
+        return (datetime.fromisoformat(upload_time) if upload_time else None), int(file_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def _after(upload_time: Optional[datetime], file_id: int):
+    # Rows past the cursor in (upload_time DESC NULLS FIRST, file_id DESC) order
+    if upload_time is None:
+        return or_(
+            and_(FileUploadLog.upload_time.is_(None), FileUploadLog.file_id < file_id),
+            FileUploadLog.upload_time.is_not(None),
+        )
+    return tuple_(FileUploadLog.upload_time, FileUploadLog.file_id) < tuple_(upload_time, file_id)
+
+
 class FileStatistics:
-    def get_file_logs(self, db: Session):
+    def get_file_logs(
+        self,
+        db: Session,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        file_type: Optional[str] = None,
+        uploaded_from: Optional[date] = None,
+        uploaded_to: Optional[date] = None,
+        full: bool = False,
+    ) -> Tuple[list, Optional[str]]:
         """
-        Description: Getting File statistics for file management component
+        Description: Getting File statistics for file management component.
+        One page of upload logs, newest first, keyset paginated on
+        (upload_time, file_id) so every page is an index range scan
+        (migrations/008_file_log_listing.sql). Returns the rows and the cursor
+        of the next page, None on the last one. The text array columns are
+        only projected when full is set.
         """
-        logs = db.query(FileUploadLog).order_by(FileUploadLog.upload_time.desc()).all()
-        return [
-            {
-                "file_id": log.file_id,
-                "filename": log.filename,
-                "file_type": log.file_type,
-                "upload_time": log.upload_time,
-                "status": log.status,
-                "mapped_tables": log.mapped_tables,
-                "mapped_columns": (log.mapped_columns),
-                "missing_columns": log.missing_columns,
-                "extra_columns": log.extra_columns,
-                "empty_cells": log.empty_cells,
-                "total_rows": log.total_rows,
-                "total_input_columns": log.total_input_columns,
-                "size": log.file_size
-            }
-            for log in logs
-        ]
\ No newline at end of file
+        columns = SUMMARY_COLUMNS + ARRAY_COLUMNS if full else SUMMARY_COLUMNS
+        query = select(*columns).order_by(
+            FileUploadLog.upload_time.desc().nulls_first(), FileUploadLog.file_id.desc()
+        )
+        if cursor:
+            query = query.where(_after(*decode_cursor(cursor)))
+        if status:
+            query = query.where(FileUploadLog.status == status)
+        if file_type:
+            query = query.where(FileUploadLog.file_type == file_type)
+        if uploaded_from:
+            query = query.where(FileUploadLog.upload_time >= datetime.combine(uploaded_from, time.min))
+        if uploaded_to:
+            query = query.where(FileUploadLog.upload_time < datetime.combine(uploaded_to + timedelta(days=1), time.min))
+
+        # One row past the page tells whether there is a next one
+        rows = [dict(row) for row in db.execute(query.limit(limit + 1)).mappings()]
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1]["upload_time"], rows[-1]["file_id"])
@@ -0,0 +1,175 @@
+import re
+import unicodedata
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.dao.conflicts import insert_on_conflict
+from app.models.core import PatientIdentity
+from app.utils import parse_date
+
+# Which blocking keys may merge an incoming row onto an existing patient
+MATCH_POLICIES = {
+    "off": (),
+    "name_dob": ("n",),
+    "name_dob_or_contact": ("n", "e", "p"),
+}
+
+
+def _normalize_name(value) -> str:
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+def _normalize_phone(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return re.sub(r"\D", "", str(value))
+
+
+def identity_keys(patient_data: dict) -> dict:
+    """
+    Description: Blocking keys for a patient row, by kind:
+    n = normalized first|last|date_of_birth, e = email, p = phone digits.
+    """
+    keys = {}
+    first_name = patient_data.get("first_name")
+    last_name = patient_data.get("last_name")
+    date_of_birth = parse_date(patient_data.get("date_of_birth"))
+    if first_name and last_name and date_of_birth:
+        keys["n"] = f"n:{_normalize_name(first_name)}|{_normalize_name(last_name)}|{date_of_birth.isoformat()}"
+
+    email = patient_data.get("email")
+    if email and "@" in str(email):
+        keys["e"] = f"e:{str(email).strip().lower()}"
+
+    phone = patient_data.get("phone")
+    if phone is not None:
+        digits = _normalize_phone(phone)
+        if len(digits) >= 7:
+            keys["p"] = f"p:{digits}"
+    return keys
+
+
+class PatientResolver:
+    """
+    Resolves incoming patient rows onto existing patient ids through the
+    patient_identity blocking index. Keys are looked up in bulk per chunk and
+    remembered for the rest of the file, so duplicates inside a file merge too.
+    """
+
+    def __init__(self, db: Session, policy: str = None, file_id: int = None):
+        self.db = db
+        self.file_id = file_id
+        self.policy = policy or Config.PATIENT_MATCH_POLICY
+        if self.policy not in MATCH_POLICIES:
+            raise ValueError(f"Unknown patient match policy: {self.policy}")
+        self.match_kinds = MATCH_POLICIES[self.policy]
+        self.known = {}
+        self._claims = []
+        self._registered = set()
+        self.merged = 0
+        self.created = 0
+
+    def prefetch(self, patient_rows: list):
+        """
+        Description: Load the owners of every key in the chunk with one query.
+        All key kinds are loaded, even ones the policy doesn't match on, so that
+        already claimed keys are never inserted twice.
+        """
+        wanted = {
+            key
+            for patient_data in patient_rows
+            for key in identity_keys(patient_data).values()
+            if key not in self.known
+        }
+        if not wanted:
+            return
+        rows = self.db.execute(
+            select(PatientIdentity.identity_key, PatientIdentity.patient_id)
+            .where(PatientIdentity.identity_key.in_(wanted))
+        )
+        self.known.update({key: patient_id for key, patient_id in rows})
+
+    def unmatched(self, patient_rows: list) -> int:
+        """
+        Description: Rows no known key matches, an upper bound on the patients a
+        prefetched chunk creates (rows repeating within the chunk still merge).
+        """
+        return sum(
+            1 for patient_data in patient_rows
+            if not any(self.known.get(identity_keys(patient_data).get(kind)) for kind in self.match_kinds)
+        )
+
+    def match(self, patient_data: dict) -> Optional[int]:
+        keys = identity_keys(patient_data)
+        for kind in self.match_kinds:
+            patient_id = self.known.get(keys.get(kind))
+            if patient_id:
+                self.merged += 1
+                self._claim(keys, patient_id)
+                return patient_id
+        return None
+
+    def register(self, patient_id: int, patient_data: dict):
+        self.created += 1
+        self._registered.add(patient_id)
+        self._claim(identity_keys(patient_data), patient_id)
+
+    def flush(self, inserted_ids: dict = None) -> dict:
+        """
+        Description: Write the keys claimed since the last flush, in key order and
+        skipping keys another ingestion claimed meanwhile, then read their owners
+        back. A registered patient that lost one of its matching keys is merged
+        onto the key's owner: its other keys move there, and it is returned in
+        {patient id: owner id} for the caller to repoint its rows and drop it.
+        inserted_ids maps the stand-in ids new patients were registered under to
+        the ids they were inserted with.
+        """
+        claims, self._claims = self._claims, []
+        registered, self._registered = self._registered, set()
+        if inserted_ids:
+            registered = {inserted_ids.get(patient_id, patient_id) for patient_id in registered}
+            for claim in claims:
+                claim["patient_id"] = inserted_ids.get(claim["patient_id"], claim["patient_id"])
+        if not claims:
+            return {}
+        claims.sort(key=lambda claim: claim["identity_key"])
+
+        table = PatientIdentity.__table__
+        insert = insert_on_conflict(self.db, table)
+        if insert is not None:
+            self.db.execute(insert.on_conflict_do_nothing(index_elements=["identity_key"]), claims)
+            owners = self._owners(claims)
+        else:
+            owners = self._owners(claims)
+            self.db.execute(table.insert(), [claim for claim in claims if claim["identity_key"] not in owners])
+            owners = {claim["identity_key"]: claim["patient_id"] for claim in claims} | owners
+
+        merged = {}
+        for claim in claims:
+            patient_id, owner = claim["patient_id"], owners[claim["identity_key"]]
+            if (owner != patient_id and patient_id in registered and patient_id not in merged
+                    and claim["identity_key"].split(":", 1)[0] in self.match_kinds):
+                merged[patient_id] = owner
+        for patient_id, owner in merged.items():
+            self.db.execute(update(table).where(table.c.patient_id == patient_id).values(patient_id=owner))
+        self.known.update({key: merged.get(owner, owner) for key, owner in owners.items()})
+        self.created -= len(merged)
+        self.merged += len(merged)
+        return merged
+
+    def _owners(self, claims: list) -> dict:
+        return dict(self.db.execute(
+            select(PatientIdentity.identity_key, PatientIdentity.patient_id)
+            .where(PatientIdentity.identity_key.in_([claim["identity_key"] for claim in claims]))
+        ).all())
+
+    def _claim(self, keys: dict, patient_id: int):
+        # A key belongs to the first patient that claimed it
+        for key in keys.values():
+            if key in self.known:
+                continue
+            self.known[key] = patient_id
+            self._claims.append({"identity_key": key, "patient_id": patient_id, "file_id": self.file_id})
@@ -1,13 +1,26 @@
+from sqlalchemy import delete, select, tuple_
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
 from app.models.core import (
-    Patient, Hospital, Lifestyle, LabResult,
+    HOSPITAL_KEY, Patient, Hospital, Lifestyle, LabResult,
     Treatment, Diagnosis, FamilyHistory,
     patient_conditions, FileUploadLog
 )
-from app.dao.insert_medical_conditions import get_or_create_condition
-from app.utils import filter_valid_columns, parse_date
-from datetime import datetime, date
+from app.dao.conflicts import insert_on_conflict
+from app.dao.copy_loader import allocate_ids, copy_rows, copy_supported
+from app.dao.insert_medical_conditions import resolve_condition_ids
+from app.dao.identity_resolution import PatientResolver
+from app.utils import filter_valid_columns, get_schema_registry, parse_date
+from app.utils.reshape import LAB_FIELDS, LAB_RESULTS_KEY
+from app.utils.metrics import PhaseTimer
+from typing import Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMNS = get_schema_registry().date_columns
+
+# Rows per junction INSERT, keeps bound parameters under the driver limits
+JUNCTION_BATCH_SIZE = 10000
 
 def extract_value(row: dict, col_info):
     if isinstance(col_info, list):
@@ -19,144 +32,297 @@ def extract_value(row: dict, col_info):
         return val if val != '' else None
     return None
 
-def insert_data_to_tables(mapping: dict, sample_data: list, db: Session, file_id: int):
-    try:
-        for row in sample_data:
-            hospital_mapping = mapping.get("hospital", {})
-            hospital_data = {
-                attr: extract_value(row, col_info)
-                for attr, col_info in hospital_mapping.items()
-            }
-
-            hospital = None
-            if any(v is not None for v in hospital_data.values()):
-                hospital = db.query(Hospital).filter_by(
-                    hospital_name=hospital_data.get("hospital_name"),
-                    hospital_address=hospital_data.get("hospital_address")
-                ).first()
-                if not hospital:
-                    hospital_data["file_id"] = file_id
-                    hospital = Hospital(**filter_valid_columns(Hospital, hospital_data))
-                    db.add(hospital)
-                    db.flush()
-
-            patient_mapping = mapping.get("patient", {})
-            patient_data = {
-                attr: extract_value(row, col_info)
-                for attr, col_info in patient_mapping.items()
-            }
-
-            if hospital:
-                patient_data["hospital_id"] = hospital.hospital_id
-            patient_data["file_id"] = file_id
-
-            patient = Patient(**filter_valid_columns(Patient, patient_data))
-            db.add(patient)
-            db.flush()
-
-            lifestyle_mapping = mapping.get("lifestyle", {})
-            lifestyle_data = {
-                attr: extract_value(row, col_info)
-                for attr, col_info in lifestyle_mapping.items()
-            }
-
-            if any(v is not None for v in lifestyle_data.values()):
-                lifestyle_data["patient_id"] = patient.patient_id
-                lifestyle_data["file_id"] = file_id
-                lifestyle = Lifestyle(**filter_valid_columns(Lifestyle, lifestyle_data))
-                db.add(lifestyle)
-
-            lab_mapping = mapping.get("lab_result", {})
-            lab_data = {}
-            for attr, col_info in lab_mapping.items():
-                val = extract_value(row, col_info)
-                if "date" in attr and val:
-                    val = parse_date(val)
-                lab_data[attr] = val
-
-            if any(v is not None for v in lab_data.values()):
-                lab_data["patient_id"] = patient.patient_id
-                lab_data["file_id"] = file_id
-                lab_result = LabResult(**filter_valid_columns(LabResult, lab_data))
-                db.add(lab_result)
-
-            treatment_mapping = mapping.get("treatment", {})
-            treatment_data = {}
-            for attr, col_info in treatment_mapping.items():
-                val = extract_value(row, col_info)
-                if "date" in attr and val:
-                    val = parse_date(val)
-                treatment_data[attr] = val
-
-            if any(v is not None for v in treatment_data.values()):
-                treatment_data["patient_id"] = patient.patient_id
-                treatment_data["file_id"] = file_id
-                treatment = Treatment(**filter_valid_columns(Treatment, treatment_data))
-                db.add(treatment)
-
-            diagnosis_mapping = mapping.get("diagnosis", {})
-            diagnosis_data = {}
-            for attr, col_info in diagnosis_mapping.items():
-                if attr == "condition_id" or attr == "condition_name":
-                    condition_name = extract_value(row, col_info)
-                    if condition_name:
-                        diagnosis_data["condition_id"] = get_or_create_condition(db, condition_name)
-                else:
-                    val = extract_value(row, col_info)
-                    if "diagnosis_date" in attr and val:
-                        print(f"Trying to parse diagnosis_date value: {val}")
-                        val = parse_date(val)
-                        print(f"Parsed date: {val}")
-
-                    #debug
-                    print(f"Extracted {attr}: {val} from row: {row}")
-                    diagnosis_data[attr] = val
-
-            if any(v is not None for v in diagnosis_data.values()):
-                diagnosis_data["patient_id"] = patient.patient_id
-                diagnosis_data["file_id"] = file_id
-                diagnosis = Diagnosis(**filter_valid_columns(Diagnosis, diagnosis_data))
-                db.add(diagnosis)
-
-            history_mapping = mapping.get("family_history", {})
-            history_data = {}
-            for attr, col_info in history_mapping.items():
-                if attr == "condition_id" or attr == "condition_name":
-                    condition_name = extract_value(row, col_info)
-                    if condition_name:
-                        history_data["condition_id"] = get_or_create_condition(db, condition_name)
+def _extract_patient(row: dict, mapping: dict) -> dict:
+    patient_data = {}
+    for attr, col_info in mapping.get("patient", {}).items():
+        val = extract_value(row, col_info)
+        if attr in DATE_COLUMNS["patient"] and val:
+            val = parse_date(val)
+        patient_data[attr] = val
+    return patient_data
+
+# Tables hanging off a patient, written with one executemany per chunk
+CHILD_TABLES = {
+    "lifestyle": Lifestyle,
+    "lab_result": LabResult,
+    "treatment": Treatment,
+    "diagnosis": Diagnosis,
+    "family_history": FamilyHistory,
+}
+
+# Child tables whose condition column takes a condition name resolved to an id per chunk
+CONDITION_TABLES = ("diagnosis", "family_history")
+
+def _hospital_key(hospital_data: dict) -> tuple:
+    # NULL and '' are one hospital, as in the ux_hospital_name_address index
+    return tuple(
+        "" if hospital_data.get(attr) is None else str(hospital_data[attr])
+        for attr in ("hospital_name", "hospital_address")
+    )
+
+def _hospital_ids(db: Session, keys) -> dict:
+    return dict(
+        ((name, address), hospital_id)
+        for hospital_id, name, address in db.execute(
+            select(Hospital.hospital_id, *HOSPITAL_KEY).where(tuple_(*HOSPITAL_KEY).in_(list(keys)))
+        )
+    )
+
+def _resolve_hospitals(chunk: list, mapping: dict, db: Session, file_id: int) -> list:
+    """
+    Description: Hospital id of every row (None when the row names no hospital),
+    creating the hospitals not stored yet. Existing ones are looked up in one
+    query; new ones are inserted with ON CONFLICT DO NOTHING and read back, so
+    concurrent ingestions naming the same hospital end up with one row.
+    """
+    hospital_mapping = mapping.get("hospital", {})
+    rows = []
+    for row in chunk:
+        hospital_data = {attr: extract_value(row, col_info) for attr, col_info in hospital_mapping.items()}
+        rows.append(hospital_data if any(v is not None for v in hospital_data.values()) else None)
+
+    wanted = {_hospital_key(data): data for data in rows if data}
+    if not wanted:
+        return [None] * len(rows)
+    resolved = _hospital_ids(db, wanted)
+
+    # Inserted in key order, so concurrent ingestions take the unique index locks in the same order
+    missing = [
+        filter_valid_columns(Hospital, wanted[key]) | {"file_id": file_id}
+        for key in sorted(wanted.keys() - resolved.keys())
+    ]
+    if missing:
+        insert = insert_on_conflict(db, Hospital.__table__)
+        if insert is not None:
+            db.execute(insert.values(missing).on_conflict_do_nothing(index_elements=HOSPITAL_KEY))
+        else:
+            db.execute(Hospital.__table__.insert(), missing)
+        resolved.update(_hospital_ids(db, wanted.keys() - resolved.keys()))
+    return [resolved[_hospital_key(data)] if data else None for data in rows]
+
+def _insert_patients(db: Session, chunk: list, mapping: dict, file_id: int,
+                     resolver: PatientResolver, timer: PhaseTimer) -> list:
+    """
+    Description: Patient id of every row, matched onto an existing patient or
+    newly created. On Postgres the new patients' ids are reserved from the
+    sequence up front and the patients written with one COPY; elsewhere they
+    are inserted with one executemany returning their ids. Their identity keys
+    are written after the patients; a new patient whose key another ingestion
+    claimed first is merged onto that ingestion's patient.
+    """
+    with timer.phase("identity"):
+        patient_rows = [_extract_patient(row, mapping) for row in chunk]
+        resolver.prefetch(patient_rows)
+
+    with timer.phase("hospital"):
+        hospital_ids = _resolve_hospitals(chunk, mapping, db, file_id)
+
+    with timer.phase("patient"):
+        use_copy = copy_supported(db)
+        if use_copy:
+            reserved = iter(allocate_ids(db, Patient.__table__.c.patient_id, resolver.unmatched(patient_rows)))
+        new_patients = []
+
+        patient_ids = []
+        for patient_data, hospital_id in zip(patient_rows, hospital_ids):
+            patient_id = resolver.match(patient_data)
+            if patient_id is None:
+                values = filter_valid_columns(Patient, patient_data) | {"hospital_id": hospital_id, "file_id": file_id}
+                if use_copy:
+                    patient_id = next(reserved)
+                    new_patients.append(values | {"patient_id": patient_id})
                 else:
-                    val = extract_value(row, col_info)
-                    history_data[attr] = val
-
-            if any(v is not None for v in history_data.values()):
-                history_data["patient_id"] = patient.patient_id
-                history_data["file_id"] = file_id
-                family_history = FamilyHistory(**filter_valid_columns(FamilyHistory, history_data))
-                db.add(family_history)
-
-            pc_mapping = (
-                mapping.get("medical_condition")
-                or mapping.get("diagnosis")
-                or mapping.get("family_history")
-                or {}
+                    # Stands in for the id until the insert below returns it; repeats in the chunk merge onto it
+                    patient_id = -len(new_patients) - 1
+                    new_patients.append(values)
+                resolver.register(patient_id, patient_data)
+            patient_ids.append(patient_id)
+
+        inserted_ids = {}
+        if use_copy:
+            copy_rows(db, Patient.__table__, new_patients)
+        elif new_patients:
+            table = Patient.__table__
+            if db.get_bind().dialect.insert_executemany_returning:
+                # Serial ids ascend in row order; asking for ordered RETURNING would make SQLite insert row by row
+                returned = sorted(db.execute(table.insert().returning(table.c.patient_id), new_patients).scalars())
+            else:
+                returned = [db.execute(table.insert().values(values)).inserted_primary_key[0] for values in new_patients]
+            inserted_ids = {-index - 1: patient_id for index, patient_id in enumerate(returned)}
+            patient_ids = [inserted_ids.get(patient_id, patient_id) for patient_id in patient_ids]
+
+        # Patients whose identity a concurrent ingestion stored first: their rows go to its patient
+        merged = resolver.flush(inserted_ids)
+        if merged:
+            patient_ids = [merged.get(patient_id, patient_id) for patient_id in patient_ids]
+            db.execute(delete(Patient).where(Patient.patient_id.in_(list(merged))))
+    return patient_ids
+
+def _child_data(row: dict, table: str, table_mapping: dict) -> dict:
+    data = {}
+    for attr, col_info in table_mapping.items():
+        val = extract_value(row, col_info)
+        if attr in ("condition_id", "condition_name"):
+            # Resolved to an id for the whole chunk at once, normalized like patient conditions
+            name = str(val).strip().lower() if val else ""
+            if name:
+                data["condition_id"] = name
+            continue
+        if attr in DATE_COLUMNS.get(table, ()) and val:
+            val = parse_date(val)
+        data[attr] = val
+    return data
+
+def _lab_rows(row: dict, mapping: dict) -> list:
+    if LAB_RESULTS_KEY in row:
+        return row[LAB_RESULTS_KEY]
+    lab_data = _child_data(row, "lab_result", mapping.get("lab_result", {}))
+    return [lab_data] if any(v is not None for v in lab_data.values()) else []
+
+def _condition_columns(mapping: dict) -> list:
+    pc_mapping = (
+        mapping.get("medical_condition")
+        or mapping.get("diagnosis")
+        or mapping.get("family_history")
+        or {}
+    )
+    return [col_info for attr, col_info in pc_mapping.items() if attr in ("condition_name", "condition_id")]
+
+def _insert_ignoring_conflicts(db: Session, values: list) -> int:
+    """
+    Description: Insert junction rows, skipping pairs that already exist.
+    Returns the number of rows actually inserted.
+    """
+    insert = insert_on_conflict(db, patient_conditions)
+    if insert is not None:
+        inserted = 0
+        for start in range(0, len(values), JUNCTION_BATCH_SIZE):
+            result = db.execute(
+                insert.values(values[start:start + JUNCTION_BATCH_SIZE]).on_conflict_do_nothing()
             )
-            for attr, col_info in pc_mapping.items():
-                if attr == "condition_name" or attr == "condition_id":
-                    condition_names_str = extract_value(row, col_info)
-                    if condition_names_str:
-                        condition_list = [c.strip() for c in condition_names_str.split(",") if c.strip()]
-                        for cname in condition_list:
-                            condition_id = get_or_create_condition(db, cname)
-                            db.execute(patient_conditions.insert().values(
-                                patient_id=patient.patient_id,
-                                condition_id=condition_id
-                            ))
-
-        db.commit()
-        return file_id
-
-    except SQLAlchemyError as e:
-        db.rollback()
-        print(f"Error during data insertion: {e}")
-        raise e
+            inserted += result.rowcount
+        return inserted
+
+    # No ON CONFLICT clause: drop the pairs already stored before inserting
+    existing = set(db.execute(
+        select(patient_conditions.c.patient_id, patient_conditions.c.condition_id)
+        .where(patient_conditions.c.patient_id.in_({value["patient_id"] for value in values}))
+    ).all())
+    new_values = [value for value in values if (value["patient_id"], value["condition_id"]) not in existing]
+    if new_values:
+        db.execute(patient_conditions.insert(), new_values)
+    return len(new_values)
+
+def _insert_patient_conditions(db: Session, cells: list, file_id: int) -> int:
+    """
+    Description: Explode (patient_id, "a, b, c") cells into patient_condition rows,
+    resolve the condition names in bulk and write the rows for the whole chunk at
+    once. Returns how many pairs were skipped as duplicates, repeated within the
+    chunk or already stored for the patient.
+    """
+    import pandas as pd
+
+    if not cells:
+        return 0
+
+    frame = pd.DataFrame(cells, columns=["patient_id", "condition_name"])
+    frame["condition_name"] = frame["condition_name"].astype(str).str.split(",")
+    frame = frame.explode("condition_name")
+    frame["condition_name"] = frame["condition_name"].str.strip().str.lower()
+    frame = frame[frame["condition_name"] != ""]
+    if frame.empty:
+        return 0
+
+    condition_ids = resolve_condition_ids(db, frame["condition_name"].unique())
+    frame["condition_id"] = frame["condition_name"].map(condition_ids)
+    pairs = frame[["patient_id", "condition_id"]].drop_duplicates()
+    values = [
+        {"patient_id": int(patient_id), "condition_id": int(condition_id), "file_id": file_id}
+        for patient_id, condition_id in pairs.itertuples(index=False)
+    ]
+    return len(frame) - _insert_ignoring_conflicts(db, values)
+
+def insert_parent_rows(db: Session, chunk: list, mapping: dict, file_id: int,
+                       resolver: PatientResolver, timer: PhaseTimer) -> Tuple[dict, int]:
+    """
+    Description: Hospitals, patients, conditions and patient conditions of a chunk,
+    everything other rows reference or that must be deduplicated. Returns the child
+    table rows, keyed by table and ready for insert_child_rows, and the number of
+    duplicate patient conditions skipped. Flushes only, the caller commits.
+    """
+    patient_ids = _insert_patients(db, chunk, mapping, file_id, resolver, timer)
+
+    condition_columns = _condition_columns(mapping)
+    child_mappings = {
+        table: mapping.get(table) or {}
+        for table in CHILD_TABLES
+        if table != "lab_result"
+    }
+    child_rows = {table: [] for table in CHILD_TABLES}
+    condition_cells = []
+
+    for row, patient_id in zip(chunk, patient_ids):
+        keys = {"patient_id": patient_id, "file_id": file_id}
+
+        with timer.phase("children"):
+            for table, table_mapping in child_mappings.items():
+                data = _child_data(row, table, table_mapping)
+                if any(v is not None for v in data.values()):
+                    child_rows[table].append(filter_valid_columns(CHILD_TABLES[table], data) | keys)
+            child_rows["lab_result"].extend(
+                {field: lab.get(field) for field in LAB_FIELDS} | keys
+                for lab in _lab_rows(row, mapping)
+            )
+
+        for col_info in condition_columns:
+            condition_names = extract_value(row, col_info)
+            if condition_names:
+                condition_cells.append((patient_id, condition_names))
+
+    with timer.phase("condition"):
+        names = {
+            data["condition_id"]
+            for table in CONDITION_TABLES
+            for data in child_rows[table]
+            if data.get("condition_id")
+        }
+        condition_ids = resolve_condition_ids(db, names)
+        for table in CONDITION_TABLES:
+            for data in child_rows[table]:
+                if data.get("condition_id"):
+                    data["condition_id"] = condition_ids[data["condition_id"]]
+
+    with timer.phase("patient_condition"):
+        duplicate_conditions = _insert_patient_conditions(db, condition_cells, file_id)
+
+    return child_rows, duplicate_conditions
+
+def insert_child_rows(db: Session, child_rows: dict, timer: PhaseTimer):
+    """
+    Description: One COPY (Postgres) or executemany per child table. These
+    tables have no unique keys, so separate connections can write them
+    concurrently without blocking each other. Caller commits.
+    """
+    use_copy = copy_supported(db)
+    for table, rows in child_rows.items():
+        if not rows:
+            continue
+        with timer.phase(table):
+            if use_copy:
+                copy_rows(db, CHILD_TABLES[table].__table__, rows)
+                continue
+            # executemany binds the keys of the first row, every row needs all of them
+            columns = list(dict.fromkeys(column for row in rows for column in row))
+            db.execute(
+                CHILD_TABLES[table].__table__.insert(),
+                [{column: row.get(column) for column in columns} for row in rows]
+            )
+
+def checkpoint(db: Session, file_id: int, chunk_end: int, patient_id: int):
+    """
+    Description: Record the input row offset a chunk reached and the file's
+    highest patient id at that point, in the chunk's transaction.
+    """
+    db.query(FileUploadLog).filter_by(file_id=file_id).update(
+        {"last_committed_row": chunk_end, "last_committed_patient_id": patient_id}, synchronize_session=False
+    )
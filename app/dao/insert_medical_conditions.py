@@ -1,23 +1,39 @@
 # app/services/insert_conditions.py
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.models.core import Condition
+from app.dao.conflicts import insert_on_conflict
+from app.models.core import CONDITION_KEY, Condition
+import logging
 
-def get_or_create_condition(db: Session, condition_name: str) -> int:
+logger = logging.getLogger(__name__)
+
+def _condition_ids(db: Session, names) -> dict:
+    return dict(db.execute(
+        select(CONDITION_KEY, Condition.condition_id).where(CONDITION_KEY.in_(names))
+    ).all())
+
+
+def resolve_condition_ids(db: Session, condition_names) -> dict:
     """
-    Fetch existing condition by name (case insensitive).
-    If not exists, create new and return its id.
+    Description: Lowercased condition name -> id for many names at once: one
+    lookup, then the missing names inserted with ON CONFLICT DO NOTHING on
+    ux_medical_condition_name and read back, so concurrent ingestions creating
+    the same condition end up with one row. The caller's chunk commit makes
+    new conditions durable.
     """
-    condition_name_lower = condition_name.lower()
-    condition = db.query(Condition).filter(
-        Condition.condition_name.ilike(condition_name_lower)
-    ).first()
-    if condition:
-        print("Fetched condition ID:", condition.condition_id)
-        return condition.condition_id
+    names = {name.lower() for name in condition_names}
+    if not names:
+        return {}
 
-    new_condition = Condition(condition_name=condition_name_lower)
-    db.add(new_condition)
-    db.commit()
-    db.refresh(new_condition)
-    print("created condition ID:", new_condition.condition_id)
-    return new_condition.condition_id
+    resolved = _condition_ids(db, names)
+    missing = sorted(names - resolved.keys())
+    if missing:
+        insert = insert_on_conflict(db, Condition.__table__)
+        values = [{"condition_name": name} for name in missing]
+        if insert is not None:
+            db.execute(insert.values(values).on_conflict_do_nothing(index_elements=[CONDITION_KEY]))
+        else:
+            db.execute(Condition.__table__.insert(), values)
+        resolved.update(_condition_ids(db, missing))
+        logger.debug("Created up to %d conditions", len(missing))
+    return resolved
@@ -0,0 +1,144 @@
+from datetime import date
+from sqlalchemy import delete, select, union
+from sqlalchemy.orm import Session
+from app.dao.conflicts import insert_on_conflict
+from app.models.core import (
+    Patient, Hospital, Condition, Lifestyle, LabResult, Treatment,
+    Diagnosis, FamilyHistory, PatientProfile, patient_conditions
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+REFRESH_BATCH_SIZE = 1000
+
+PATIENT_FIELDS = [
+    "patient_id", "first_name", "last_name", "date_of_birth", "gender",
+    "phone", "email", "address", "country", "file_id",
+]
+
+# Profile section -> (model, fields copied from each row)
+CHILD_SECTIONS = {
+    "lifestyle": (Lifestyle, ["lifestyle_id", "smoking_status", "alcohol_use", "exercise_habit", "diet", "file_id"]),
+    "lab_results": (LabResult, ["result_id", "test_name", "test_value", "test_value_numeric", "unit", "test_date", "file_id"]),
+    "treatments": (Treatment, ["treatment_id", "treatment_type", "start_date", "end_date", "outcome", "file_id"]),
+    "diagnoses": (Diagnosis, ["diagnosis_id", "diagnosis_date", "condition_id", "file_id"]),
+    "family_history": (FamilyHistory, ["history_id", "relative", "condition_id", "file_id"]),
+}
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def file_patient_ids(db: Session, file_id: int) -> list:
+    """
+    Description: Patients a file touched: its own patients plus those its rows were merged onto.
+    """
+    touched = union(
+        select(Patient.patient_id).where(Patient.file_id == file_id),
+        *(select(model.patient_id).where(model.file_id == file_id) for model, _ in CHILD_SECTIONS.values())
+    )
+    return [patient_id for patient_id in db.execute(touched).scalars() if patient_id is not None]
+
+
+def _build_documents(db: Session, patient_ids: list) -> dict:
+    patients = db.execute(
+        select(Patient, Hospital.hospital_name, Hospital.hospital_address)
+        .outerjoin(Hospital, Patient.hospital_id == Hospital.hospital_id)
+        .where(Patient.patient_id.in_(patient_ids))
+    ).all()
+
+    documents = {}
+    for patient, hospital_name, hospital_address in patients:
+        document = {field: _json_value(getattr(patient, field)) for field in PATIENT_FIELDS}
+        document["hospital"] = (
+            {"hospital_name": hospital_name, "hospital_address": hospital_address}
+            if patient.hospital_id else None
+        )
+        document["conditions"] = []
+        document.update({section: [] for section in CHILD_SECTIONS})
+        documents[patient.patient_id] = document
+
+    junction = db.execute(
+        select(patient_conditions.c.patient_id, patient_conditions.c.condition_id)
+        .where(patient_conditions.c.patient_id.in_(patient_ids))
+    ).all()
+    sections = {
+        section: db.execute(select(model).where(model.patient_id.in_(patient_ids))).scalars().all()
+        for section, (model, _) in CHILD_SECTIONS.items()
+    }
+
+    condition_ids = {condition_id for _, condition_id in junction} | {
+        record.condition_id
+        for records in sections.values()
+        for record in records
+        if getattr(record, "condition_id", None)
+    }
+    condition_names = dict(db.execute(
+        select(Condition.condition_id, Condition.condition_name)
+        .where(Condition.condition_id.in_(condition_ids))
+    ).all()) if condition_ids else {}
+
+    for patient_id, condition_id in junction:
+        documents[patient_id]["conditions"].append(condition_names.get(condition_id))
+
+    for section, records in sections.items():
+        fields = CHILD_SECTIONS[section][1]
+        for record in records:
+            item = {field: _json_value(getattr(record, field)) for field in fields}
+            if "condition_id" in item:
+                item["condition_name"] = condition_names.get(item.pop("condition_id"))
+            documents[record.patient_id][section].append(item)
+
+    return documents
+
+
+def refresh_patient_profiles(db: Session, patient_ids: list) -> int:
+    """
+    Description: Rebuild the profile documents of the given patients in batches.
+    Profiles of patients that no longer exist are dropped. Caller commits.
+    """
+    refreshed = 0
+    patient_ids = sorted(set(patient_ids))
+    for start in range(0, len(patient_ids), REFRESH_BATCH_SIZE):
+        batch = patient_ids[start:start + REFRESH_BATCH_SIZE]
+        documents = _build_documents(db, batch)
+        gone = [patient_id for patient_id in batch if patient_id not in documents]
+        if gone:
+            db.execute(delete(PatientProfile).where(PatientProfile.patient_id.in_(gone)))
+        if documents:
+            # Upserted: files ingested concurrently can share patients and refresh them at the same time
+            upsert = insert_on_conflict(db, PatientProfile.__table__)
+            if upsert is None:
+                db.execute(delete(PatientProfile).where(PatientProfile.patient_id.in_(list(documents))))
+                upsert = PatientProfile.__table__.insert()
+            else:
+                upsert = upsert.on_conflict_do_update(
+                    index_elements=[PatientProfile.patient_id], set_={"document": upsert.excluded.document}
+                )
+            db.execute(
+                upsert,
+                [{"patient_id": patient_id, "document": document} for patient_id, document in documents.items()]
+            )
+        refreshed += len(documents)
+    return refreshed
+
+
+def refresh_profiles_for_file(db: Session, file_id: int) -> int:
+    refreshed = refresh_patient_profiles(db, file_patient_ids(db, file_id))
+    db.commit()
+    logger.info("Refreshed %d patient profiles for file %s", refreshed, file_id)
+    return refreshed
+
+
+def get_patient_profile(db: Session, patient_id: int):
+    """
+    Description: Single indexed read of a profile, built on demand for patients
+    ingested before profiles existed.
+    """
+    profile = db.get(PatientProfile, patient_id)
+    if profile is None and refresh_patient_profiles(db, [patient_id]):
+        db.commit()
+        profile = db.get(PatientProfile, patient_id)
+    return profile
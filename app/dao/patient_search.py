@@ -0,0 +1,82 @@
+from datetime import date
+from typing import Optional
+from sqlalchemy import func, literal_column, or_, select
+from sqlalchemy.orm import Session
+from app.models.core import Patient, Hospital, Condition, patient_conditions
+
+# Must match the expression of ix_patient_full_name_trgm (migrations/004_patient_search.sql)
+FULL_NAME = func.lower(
+    func.coalesce(Patient.first_name, literal_column("''"))
+    .op("||")(literal_column("' '"))
+    .op("||")(func.coalesce(Patient.last_name, literal_column("''")))
+)
+
+SEARCH_COLUMNS = [
+    Patient.patient_id, Patient.first_name, Patient.last_name, Patient.date_of_birth,
+    Patient.gender, Patient.phone, Patient.email, Patient.country,
+    Hospital.hospital_name, Patient.file_id,
+]
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_patients(
+    db: Session,
+    q: Optional[str] = None,
+    condition: Optional[str] = None,
+    hospital: Optional[str] = None,
+    dob_from: Optional[date] = None,
+    dob_to: Optional[date] = None,
+    fuzzy: bool = False,
+    limit: int = 50,
+    offset: int = 0,
+) -> dict:
+    """
+    Description: Paginated patient search by name, condition, hospital and date of birth.
+    On Postgres name matching uses the pg_trgm index (substring ILIKE, plus
+    similarity when fuzzy); other dialects fall back to a lower() LIKE scan.
+    """
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+    query = select(*SEARCH_COLUMNS).outerjoin(Hospital, Patient.hospital_id == Hospital.hospital_id)
+    order_by = [Patient.last_name, Patient.first_name, Patient.patient_id]
+
+    if q and q.strip():
+        term = " ".join(q.lower().split())
+        pattern = f"%{_escape_like(term)}%"
+        if is_postgres:
+            name_match = FULL_NAME.ilike(pattern, escape="\\")
+            if fuzzy:
+                name_match = or_(name_match, FULL_NAME.op("%")(term))
+                order_by.insert(0, func.similarity(FULL_NAME, term).desc())
+        else:
+            name_match = FULL_NAME.like(pattern, escape="\\")
+        query = query.where(name_match)
+
+    if condition:
+        condition_patients = (
+            select(patient_conditions.c.patient_id)
+            .join(Condition, Condition.condition_id == patient_conditions.c.condition_id)
+            .where(func.lower(Condition.condition_name) == condition.strip().lower())
+        )
+        query = query.where(Patient.patient_id.in_(condition_patients))
+
+    if hospital:
+        query = query.where(Hospital.hospital_name.ilike(f"%{_escape_like(hospital.strip())}%", escape="\\"))
+
+    if dob_from:
+        query = query.where(Patient.date_of_birth >= dob_from)
+    if dob_to:
+        query = query.where(Patient.date_of_birth <= dob_to)
+
+    # Fetch one extra row to know whether another page exists without a COUNT(*)
+    rows = db.execute(query.order_by(*order_by).limit(limit + 1).offset(offset)).mappings().all()
+    has_more = len(rows) > limit
+
+    return {
+        "items": [dict(row) for row in rows[:limit]],
+        "limit": limit,
+        "offset": offset,
+        "next_offset": offset + limit if has_more else None,
+    }
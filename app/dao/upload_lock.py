@@ -0,0 +1,65 @@
+import contextlib
+import hashlib
+import logging
+import threading
+from typing import Iterator
+
+from sqlalchemy import text
+
+from app.database.connection import engine
+
+logger = logging.getLogger(__name__)
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+def lock_key(filename: str) -> int:
+    """
+    Description: Signed 64-bit advisory lock key for an upload name.
+    """
+    digest = hashlib.blake2b(f"upload:{filename}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@contextlib.contextmanager
+def _local_lock(filename: str) -> Iterator[bool]:
+    with _local_locks_guard:
+        lock = _local_locks.setdefault(filename, threading.Lock())
+    acquired = lock.acquire(blocking=False)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
+
+
+@contextlib.contextmanager
+def upload_lock(filename: str) -> Iterator[bool]:
+    """
+    Description: Exclusive lock on one upload for the length of an ingestion,
+    reprocess or delete; yields False when someone else holds it. On Postgres
+    it is a session advisory lock on a connection of its own, shared by every
+    worker process and released by the server if the holder dies. Elsewhere it
+    only excludes threads of this process.
+    """
+    if engine.dialect.name != "postgresql":
+        with _local_lock(filename) as acquired:
+            yield acquired
+        return
+
+    key = lock_key(filename)
+    with engine.connect() as connection:
+        acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+        connection.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                    connection.commit()
+                except Exception:
+                    # Dropping the connection releases the lock with it
+                    logger.exception("Could not release the lock on %s", filename)
+                    connection.invalidate()
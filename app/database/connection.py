@@ -1,7 +1,42 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from app.config import Config
 from app.models.core import Base
+import logging
 
-engine = create_engine(Config.DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+
+def _engine_options(database_url: str) -> dict:
+    # SQLite (benchmarks and local runs) keeps SQLAlchemy's default pool
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+    }
+
+
+# Creating the engine doesn't connect; connections are opened per worker by warm_pool
+engine = create_engine(Config.DATABASE_URL, **_engine_options(Config.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def warm_pool(size: int = None):
+    """
+    Description: Open `size` pooled connections up front so the first requests
+    of a worker don't pay for connection setup.
+    """
+    size = size or Config.DB_POOL_SIZE
+    connections = []
+    try:
+        for _ in range(size):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()
+    logger.info("Warmed %d database connections", len(connections))
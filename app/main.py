@@ -1,4 +1,23 @@
-from app import app
+import uvicorn
+from app.config import Config
+
+
+def main():
+    """
+    Description: Serve the API with the server profile from the environment.
+    WORKERS > 1 runs one process per worker; RELOAD=true is for local development
+    and always runs a single process.
+    """
+    uvicorn.run(
+        "app:app",
+        host=Config.HOST,
+        port=Config.PORT,
+        workers=None if Config.RELOAD else Config.WORKERS,
+        reload=Config.RELOAD,
+        log_level=Config.LOG_LEVEL.lower(),
+        timeout_graceful_shutdown=Config.SHUTDOWN_TIMEOUT,
+    )
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("app:app", host="127.0.0.1", reload=True)
\ No newline at end of file
+    main()
@@ -1,17 +1,25 @@
 # app/models/core.py
+from datetime import datetime
 from sqlalchemy import (
-    FLOAT, Column, Integer, Text, Date, ForeignKey, Table, TIMESTAMP, ARRAY, func
+    FLOAT, JSON, BigInteger, Column, Index, Integer, Text, Date, ForeignKey, Table, TIMESTAMP, ARRAY, func,
+    literal_column
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
 
+# Postgres text arrays, stored as JSON on SQLite (benchmarks and local runs)
+TextArray = ARRAY(Text).with_variant(JSON(), "sqlite")
+
 # Junction table for patient and their conditions
 patient_conditions = Table(
     "patient_condition",
     Base.metadata,
     Column("patient_id", Integer, ForeignKey("patient.patient_id"), primary_key=True),
-    Column("condition_id", Integer, ForeignKey("medical_condition.condition_id"), primary_key=True),
+    Column("condition_id", Integer, ForeignKey("medical_condition.condition_id"), primary_key=True, index=True),
+    # File that first linked the pair, its links go when the file is deleted
+    Column("file_id", Integer, ForeignKey("file_upload_log.file_id"), index=True),
 )
 
 # Hospital
@@ -20,10 +28,17 @@ class Hospital(Base):
     hospital_id = Column(Integer, primary_key=True)
     hospital_name = Column(Text)
     hospital_address = Column(Text)
-    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"))
+    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"), index=True)
 
     patients = relationship("Patient", back_populates="hospital")
 
+# One row per name/address pair, the conflict target of the hospital upsert (app/dao/insert_data.py)
+HOSPITAL_KEY = (
+    func.coalesce(Hospital.hospital_name, literal_column("''")),
+    func.coalesce(Hospital.hospital_address, literal_column("''")),
+)
+Index("ux_hospital_name_address", *HOSPITAL_KEY, unique=True)
+
 # Patients
 class Patient(Base):
     __tablename__ = "patient"
@@ -36,8 +51,8 @@ class Patient(Base):
     email = Column(Text)
     address = Column(Text)
     country = Column(Text)
-    hospital_id = Column(Integer, ForeignKey("hospital.hospital_id"))
-    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"))
+    hospital_id = Column(Integer, ForeignKey("hospital.hospital_id"), index=True)
+    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"), index=True)
 
     hospital = relationship("Hospital", back_populates="patients")
     diagnoses = relationship("Diagnosis", back_populates="patient", cascade="all, delete")
@@ -47,6 +62,23 @@ class Patient(Base):
     lab_results = relationship("LabResult", back_populates="patient", cascade="all, delete")
     conditions = relationship("Condition", secondary=patient_conditions, back_populates="patients")
 
+# Blocking index for cross-file patient identity resolution.
+# Keys: "n:first|last|dob", "e:email", "p:phone digits"
+class PatientIdentity(Base):
+    __tablename__ = "patient_identity"
+    identity_key = Column(Text, primary_key=True)
+    patient_id = Column(Integer, ForeignKey("patient.patient_id"), index=True)
+    # File whose row claimed the key
+    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"), index=True)
+
+# Denormalized patient document (patient, hospital, conditions and child rows),
+# refreshed per ingested file by app.dao.patient_profile
+class PatientProfile(Base):
+    __tablename__ = "patient_profile"
+    patient_id = Column(Integer, ForeignKey("patient.patient_id"), primary_key=True)
+    document = Column(JSON().with_variant(JSONB(), "postgresql"))
+    refreshed_at = Column(TIMESTAMP, server_default=func.now())
+
 # Conditions Table
 class Condition(Base):
     __tablename__ = "medical_condition"
@@ -55,14 +87,18 @@ class Condition(Base):
 
     patients = relationship("Patient", secondary=patient_conditions, back_populates="conditions")
 
+# Names are stored lowercased; the conflict target of the condition upsert
+CONDITION_KEY = func.lower(Condition.condition_name)
+Index("ux_medical_condition_name", CONDITION_KEY, unique=True)
+
 # Dependent tables: family_history, diagnosis, treatments, lifestyle, lab_results
 class FamilyHistory(Base):
     __tablename__ = "family_history"
     history_id = Column(Integer, primary_key=True)
-    patient_id = Column(Integer, ForeignKey("patient.patient_id"))
+    patient_id = Column(Integer, ForeignKey("patient.patient_id"), index=True)
     relative = Column(Text)
     condition_id = Column(Integer, ForeignKey("medical_condition.condition_id"))
-    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"))
+    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"), index=True)
 
     patient = relationship("Patient", back_populates="histories")
     condition = relationship("Condition")
@@ -70,10 +106,10 @@ class FamilyHistory(Base):
 class Diagnosis(Base):
     __tablename__ = "diagnosis"
     diagnosis_id = Column(Integer, primary_key=True)
-    patient_id = Column(Integer, ForeignKey("patient.patient_id"))
+    patient_id = Column(Integer, ForeignKey("patient.patient_id"), index=True)
     diagnosis_date = Column(Date)
     condition_id = Column(Integer, ForeignKey("medical_condition.condition_id"))
-    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"))
+    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"), index=True)
 
     patient = relationship("Patient", back_populates="diagnoses")
     condition = relationship("Condition")
@@ -81,36 +117,38 @@ class Diagnosis(Base):
 class Treatment(Base):
     __tablename__ = "treatment"
     treatment_id = Column(Integer, primary_key=True)
-    patient_id = Column(Integer, ForeignKey("patient.patient_id"))
+    patient_id = Column(Integer, ForeignKey("patient.patient_id"), index=True)
     treatment_type = Column(Text)
     start_date = Column(Date)
     end_date = Column(Date)
     outcome = Column(Text)
-    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"))
+    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"), index=True)
 
     patient = relationship("Patient", back_populates="treatments")
 
 class Lifestyle(Base):
     __tablename__ = "lifestyle"
     lifestyle_id = Column(Integer, primary_key=True)
-    patient_id = Column(Integer, ForeignKey("patient.patient_id"))
+    patient_id = Column(Integer, ForeignKey("patient.patient_id"), index=True)
     smoking_status = Column(Text)
     alcohol_use = Column(Text)
     exercise_habit = Column(Text)
     diet = Column(Text)
-    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"))
+    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"), index=True)
 
     patient = relationship("Patient", back_populates="lifestyle")
 
 class LabResult(Base):
     __tablename__ = "lab_result"
     result_id = Column(Integer, primary_key=True)
-    patient_id = Column(Integer, ForeignKey("patient.patient_id"))
+    patient_id = Column(Integer, ForeignKey("patient.patient_id"), index=True)
     test_name = Column(Text)
     test_value = Column(Text)
+    # Leading number of test_value, filled by the coercion stage
+    test_value_numeric = Column(FLOAT)
     unit = Column(Text)
     test_date = Column(Date)
-    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"))
+    file_id = Column(Integer, ForeignKey("file_upload_log.file_id"), index=True)
 
     patient = relationship("Patient", back_populates="lab_results")
 
@@ -122,12 +160,30 @@ class FileUploadLog(Base):
     file_type = Column(Text)
     upload_time = Column(TIMESTAMP, server_default=func.now())
     status = Column(Text)
-    mapped_tables = Column(ARRAY(Text))
-    mapped_columns = Column(ARRAY(Text))
-    missing_columns = Column(ARRAY(Text))
-    extra_columns = Column(ARRAY(Text))
+    mapped_tables = Column(TextArray)
+    mapped_columns = Column(TextArray)
+    missing_columns = Column(TextArray)
+    extra_columns = Column(TextArray)
     empty_cells = Column(Integer)
+    # Per-column summaries of cells that failed type coercion
+    invalid_types = Column(TextArray)
     total_rows = Column(Integer)
     local_path = Column(Text)
     total_input_columns = Column(Integer)
     file_size = Column(FLOAT)
+    # Ingestion checkpoint: input rows [0, last_committed_row) are committed, and
+    # patients of the file up to last_committed_patient_id
+    last_committed_row = Column(Integer, default=0)
+    last_committed_patient_id = Column(Integer)
+    mapping = Column(JSON)
+    # Set client-side on every change so read endpoints can derive a data version
+    updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Stored file lifecycle (app/services/upload_storage.py): raw, zstd, gzip, purged or superseded
+    storage_state = Column(Text)
+    stored_bytes = Column(BigInteger)
+    reclaimed_bytes = Column(BigInteger, default=0)
+    # Idempotency-Key of the /upload/process call that created the log, and that call's response
+    idempotency_key = Column(Text)
+    process_result = Column(JSON)
+
+Index("ux_file_upload_log_idempotency_key", FileUploadLog.idempotency_key, unique=True)
@@ -0,0 +1,48 @@
+"""
+CSV byte range parsing run inside the parse pool's worker processes
+(app.utils.parallel_csv). Workers are spawned and import this module by
+name, so it only depends on the standard library and the parsers: nothing
+from app.utils, the models or the database.
+"""
+import io
+import mmap
+
+# pd.read_csv's default missing value markers, so both engines agree on what is empty
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def parse_range(path: str, start: int, end: int, header: bytes, sep: str, text_columns: list = ()):
+    """
+    Description: One range of a CSV plus its header line, parsed single threaded,
+    with text_columns read as strings instead of inferred.
+    Returns an Arrow table (flat buffers, cheap to send back to the parent) or,
+    without pyarrow, a DataFrame.
+    """
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        data = header + mapped[start:end]
+
+    # Escaped quotes come in pairs, an odd count means the range cut through a quoted field
+    if data.count(b'"') % 2:
+        raise ValueError(f"Byte range {start}-{end} splits a quoted field")
+
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as arrow_csv
+    except ImportError:
+        import pandas as pd
+
+        return pd.read_csv(io.BytesIO(data), sep=sep, dtype={column: str for column in text_columns})
+
+    return arrow_csv.read_csv(
+        io.BytesIO(data),
+        read_options=arrow_csv.ReadOptions(use_threads=False),
+        parse_options=arrow_csv.ParseOptions(delimiter=sep, newlines_in_values=True),
+        convert_options=arrow_csv.ConvertOptions(
+            column_types={column: pa.string() for column in text_columns},
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
@@ -1,4 +1,5 @@
 from .file_routes import router
 from .dashboard_routes import dashboard_router
+from .patient_routes import patient_router
 
-__all__ = ["router", "dashboard_router"]
\ No newline at end of file
+__all__ = ["router", "dashboard_router", "patient_router"]
\ No newline at end of file
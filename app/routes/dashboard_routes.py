@@ -1,21 +1,44 @@
 from datetime import datetime 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.database.deps import get_db
 from app.models.core import FileUploadLog
+from app.schemas.responses import (
+    SUMMARY_CARDS, UPLOAD_TRENDS, VALIDATION_SUMMARY,
+    SummaryCard, UploadTrend, ValidationSummaryItem
+)
+from app.utils.http_cache import cached_response
+from app.utils.serialization import dump_json
+from typing import List
 
 dashboard_router = APIRouter(tags=["Dashboard"])
 
 
-@dashboard_router.get("/summary")
-def get_dashboard_summary(db: Session = Depends(get_db)):
+@dashboard_router.get("/summary", response_model=List[SummaryCard])
+def get_dashboard_summary(request: Request, db: Session = Depends(get_db)):
+    return cached_response(request, db, lambda: dump_json(SUMMARY_CARDS, _summary_cards(db)))
+
+@dashboard_router.get("/validation-summary", response_model=List[ValidationSummaryItem])
+def get_validation_summary(request: Request, db: Session = Depends(get_db)):
+    return cached_response(request, db, lambda: dump_json(VALIDATION_SUMMARY, _validation_summary(db)))
+
+@dashboard_router.get("/upload-trends", response_model=List[UploadTrend])
+def get_upload_trends(request: Request, db: Session = Depends(get_db)):
+    return cached_response(request, db, lambda: dump_json(UPLOAD_TRENDS, _upload_trends(db)))
+
+
+def _summary_cards(db: Session) -> list:
     total_uploaded = db.query(func.count()).select_from(FileUploadLog).scalar()
     total_success = db.query(func.count()).select_from(FileUploadLog).filter(FileUploadLog.status == "processed").scalar()
     total_issues = db.query(func.count()).select_from(FileUploadLog).filter(FileUploadLog.status == "validation_error").scalar()
 
     success_rate = (total_success / total_uploaded * 100) if total_uploaded > 0 else 0
-
+    # Kept up to date by the upload storage sweep (app/services/upload_storage.py)
+    stored_bytes, reclaimed_bytes = db.query(
+        func.coalesce(func.sum(FileUploadLog.stored_bytes), 0),
+        func.coalesce(func.sum(FileUploadLog.reclaimed_bytes), 0),
+    ).one()
 
     return [
         {
@@ -39,10 +62,30 @@ def get_dashboard_summary(db: Session = Depends(get_db)):
             "color": "text-purple-600",
             "bgColor": "bg-purple-50",
         },
+        {
+            "title": "Upload Storage",
+            "value": _format_bytes(stored_bytes),
+            "icon": "HardDrive",
+            "color": "text-slate-600",
+            "bgColor": "bg-slate-50",
+        },
+        {
+            "title": "Storage Reclaimed",
+            "value": _format_bytes(reclaimed_bytes),
+            "icon": "Archive",
+            "color": "text-teal-600",
+            "bgColor": "bg-teal-50",
+        },
     ]
 
-@dashboard_router.get("/validation-summary")
-def get_validation_summary(db: Session = Depends(get_db)):
+def _format_bytes(size: int) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:,.1f} {unit}" if unit != "B" else f"{size:,} B"
+        size /= 1024
+    return f"{size:,.1f} TB"
+
+def _validation_summary(db: Session) -> list:
     logs = db.query(FileUploadLog).all()
 
     total_missing = 0
@@ -63,9 +106,7 @@ def get_validation_summary(db: Session = Depends(get_db)):
         {"name": "Empty Cells", "value": total_empty, "color": "#d97706"},
     ]
 
-@dashboard_router.get("/upload-trends")
-def get_upload_trends(db: Session = Depends(get_db)):
-    
+def _upload_trends(db: Session) -> list:
     query = (
         db.query(
             func.extract("year", FileUploadLog.upload_time).label("year"),
@@ -1,114 +1,141 @@
+import asyncio
 import mimetypes
-from fastapi import APIRouter, Body, UploadFile, File, HTTPException, Depends
-from fastapi.responses import FileResponse
-from sqlalchemy import select
+from fastapi import APIRouter, BackgroundTasks, Body, UploadFile, File, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from pathlib import Path
-import shutil
-import csv
+from datetime import date
+from urllib.parse import quote
+from typing import List, Optional, Union
+import logging
 
 from app.database.deps import get_db
 from app.services import file_service
-from app.dao import file_statistics, fetch_full_database_data
-from app.models.core import (
-    Patient, Hospital, Lifestyle, LabResult,
-    Treatment, Diagnosis, FamilyHistory, Condition, patient_conditions
+from app.services.upload_storage import COMPRESSIBLE_EXTENSIONS, resolve_upload, sweep_uploads
+from app.dao import file_statistics, fetch_full_database_data, fetch_file_data
+from app.schemas.responses import (
+    FILE_DATA_ADAPTERS, FILE_LOG_ROWS, FILE_LOG_SUMMARIES, FULL_DATA_ADAPTERS,
+    FileData, FileLogRow, FileLogSummary, FullDatabaseData
 )
+from app.utils.compression import (
+    accepts_encoding, compress_stream, decompress_stream, negotiate_encoding, read_chunks, stored_encoding
+)
+from app.utils.http_cache import cached_response
+from app.utils.serialization import dump_rows, dump_sections
 
 router = APIRouter()
-
-UPLOAD_DIR = Path("uploaded_files")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-@router.get("/logs/")
-def get_file_logs(db: Session = Depends(get_db)):
+logger = logging.getLogger(__name__)
+
+MAX_PREVIEW_ROWS = 10000
+
+# Summary rows by default, rows with the column lists under full=true
+@router.get("/logs/", response_model=Union[List[FileLogSummary], List[FileLogRow]])
+def get_file_logs(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    status: Optional[str] = None,
+    file_type: Optional[str] = None,
+    uploaded_from: Optional[date] = None,
+    uploaded_to: Optional[date] = None,
+    full: bool = Query(
+        False,
+        description="Include mapped_tables, mapped_columns, missing_columns, extra_columns and invalid_types",
+    ),
+    db: Session = Depends(get_db)
+):
     """
-    Endpoint to get all file logs
+    Endpoint to get file logs, newest first, a page at a time. The next page's
+    cursor comes back in the X-Next-Cursor header, absent on the last page.
     """
-    return file_statistics.get_file_logs(db)
+    def build():
+        try:
+            rows, next_cursor = file_statistics.get_file_logs(
+                db, limit=limit, cursor=cursor, status=status, file_type=file_type,
+                uploaded_from=uploaded_from, uploaded_to=uploaded_to, full=full
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        body = dump_rows(FILE_LOG_ROWS if full else FILE_LOG_SUMMARIES, rows)
+        return body, ({"X-Next-Cursor": next_cursor} if next_cursor else {})
+
+    return cached_response(request, db, build)
 
 @router.get("/preview")
-async def preview_file(filename: str):
+async def preview_file(
+    request: Request,
+    filename: str,
+    rows: Optional[int] = Query(None, ge=1, le=MAX_PREVIEW_ROWS, description="Only the first N parsed rows, as JSON"),
+):
+    """
+    Endpoint to download an upload. Byte ranges are served as stored; whole
+    CSV/TSV downloads are compressed on the fly (zstd or gzip) when the client
+    accepts it. With rows=N only the head of the file is parsed and streamed.
+    Uploads compressed at rest go out as stored when the client takes their
+    coding, decompressed otherwise, and always whole.
+    """
     safe_filename = Path(filename).name
-    file_path = UPLOAD_DIR / safe_filename
-    print("Looking for file:", file_path)
+    file_path = resolve_upload(file_service.UPLOAD_DIR / safe_filename)
+    logger.debug("Looking for file: %s", file_path)
 
-    if not file_path.exists():
+    if file_path is None:
         raise HTTPException(status_code=404, detail="File not found")
 
-    mime_type, _ = mimetypes.guess_type(str(file_path))
+    accept_encoding = request.headers.get("accept-encoding")
+    encoding = negotiate_encoding(accept_encoding)
+    headers = {"Vary": "Accept-Encoding"}
+    if rows:
+        body = await asyncio.to_thread(file_service.stream_head_rows, file_path, rows)
+        if encoding:
+            body = compress_stream(body, encoding)
+            headers["Content-Encoding"] = encoding
+        return StreamingResponse(body, media_type="application/json", headers=headers)
+
+    mime_type, _ = mimetypes.guess_type(safe_filename)
+    media_type = mime_type or "application/octet-stream"
+    stored_as = stored_encoding(file_path)
+    if stored_as or (encoding and Path(safe_filename).suffix.lower() in COMPRESSIBLE_EXTENSIONS
+                     and "range" not in request.headers):
+        headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(safe_filename)}"
+        body = read_chunks(file_path)
+        if stored_as and accepts_encoding(accept_encoding, stored_as):
+            headers["Content-Encoding"] = stored_as
+        else:
+            if stored_as:
+                body = decompress_stream(body, stored_as)
+            if encoding:
+                body = compress_stream(body, encoding)
+                headers["Content-Encoding"] = encoding
+        return StreamingResponse(body, media_type=media_type, headers=headers)
+
+    # Identity: FileResponse answers Range / If-Range with 206 or 416
     return FileResponse(
         path=file_path,
-        media_type=mime_type or "application/octet-stream",
-        filename=safe_filename
+        media_type=media_type,
+        filename=safe_filename,
+        headers=headers
     )
 
-@router.get("/data/all")
-def get_full_database_data(db: Session = Depends(get_db)):
-    data = fetch_full_database_data(db)
-    if not data or not any(data.values()):
-        raise HTTPException(status_code=404, detail="No data available in the database.")
-    return data
-
-@router.get("/data/{file_id}")
-def get_data_by_file(file_id: int, db: Session = Depends(get_db)):
-    result = {}
-
-    patients = db.query(Patient).filter(Patient.file_id == file_id).all()
-    if not patients:
-        raise HTTPException(status_code=404, detail="No data found for this file ID")
-
-    patient_ids = [p.patient_id for p in patients]
-    hospital_ids = {p.hospital_id for p in patients if p.hospital_id}
-
-    hospitals = db.query(Hospital).filter(Hospital.hospital_id.in_(hospital_ids)).all()
-    hospital_map = {h.hospital_id: h for h in hospitals}
-
-    enriched_patients = []
-    for p in patients:
-        p_data = p.__dict__.copy()
-        if p.hospital_id and p.hospital_id in hospital_map:
-            p_data["hospital"] = hospital_map[p.hospital_id].__dict__
-        p_data.pop("_sa_instance_state", None)
-        enriched_patients.append(p_data)
-
-    result["patient"] = enriched_patients
-
-    def fetch_related(model, enrich_condition=False):
-        records = db.query(model).filter(model.patient_id.in_(patient_ids)).all()
-        enriched = []
-        for r in records:
-            r_data = r.__dict__.copy()
-
-            if enrich_condition and r_data.get("condition_id"):
-                cond = db.query(Condition).filter_by(condition_id=r_data["condition_id"]).first()
-                if cond:
-                    r_data["condition_name"] = cond.condition_name
-                r_data.pop("condition_id", None)
-
-            r_data.pop("_sa_instance_state", None)
-            enriched.append(r_data)
-        return enriched
-
-    tables = {
-        "treatment": Treatment,
-        "diagnosis": (Diagnosis, True),
-        "lifestyle": Lifestyle,
-        "lab_result": LabResult,
-        "family_history": (FamilyHistory, True)
-    }
-
-    for name, model_info in tables.items():
-        if isinstance(model_info, tuple):
-            model, enrich = model_info
-        else:
-            model, enrich = model_info, False
+@router.get("/data/all", response_model=FullDatabaseData)
+def get_full_database_data(request: Request, db: Session = Depends(get_db)):
+    def build():
+        data = fetch_full_database_data(db)
+        if not data or not any(data.values()):
+            raise HTTPException(status_code=404, detail="No data available in the database.")
+        return dump_sections(FULL_DATA_ADAPTERS, data)
 
-        table_data = fetch_related(model, enrich_condition=enrich)
-        if table_data:
-            result[name] = table_data
+    return cached_response(request, db, build)
 
-    return result
+@router.get("/data/{file_id}", response_model=FileData)
+def get_data_by_file(file_id: int, request: Request, db: Session = Depends(get_db)):
+    # Versioned globally rather than per file: later uploads can merge rows onto this file's patients
+    def build():
+        result = fetch_file_data(db, file_id)
+        if not result:
+            raise HTTPException(status_code=404, detail="No data found for this file ID")
+        return dump_sections(FILE_DATA_ADAPTERS, result)
+
+    return cached_response(request, db, build)
 
 
 @router.post("/upload/preview")
@@ -121,9 +148,21 @@ async def upload_file_preview(
     """
     return await file_service.handle_file_mapping_preview(file, db)
 
+@router.post("/upload/preview/batch")
+async def upload_files_preview(
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Endpoint to handle several file uploads and return one mapping preview per file.
+    """
+    return await file_service.handle_batch_mapping_preview(files, db)
+
 @router.post("/upload/process")
 async def finalize_file_mapping(
+    background_tasks: BackgroundTasks,
     payload: dict = Body(...),
+    idempotency_key: Optional[str] = Header(None, description="Retries with the same key replay the first response"),
     db: Session = Depends(get_db)
 ):
     """
@@ -135,4 +174,38 @@ async def finalize_file_mapping(
     if not file_name or not final_mapping:
         raise HTTPException(status_code=400, detail="Missing file_name or mapping.")
 
-    return file_service.handle_file_processing(file_name, final_mapping, db)
+    result = file_service.handle_file_processing(file_name, final_mapping, db, idempotency_key)
+    background_tasks.add_task(sweep_uploads, file_service.UPLOAD_DIR)
+    return result
+
+@router.post("/{file_id}/resume")
+def resume_file_processing(file_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Endpoint to resume a failed or interrupted ingestion from its last committed row
+    """
+    result = file_service.handle_resume(file_id, db)
+    background_tasks.add_task(sweep_uploads, file_service.UPLOAD_DIR)
+    return result
+
+@router.delete("/{file_id}")
+def delete_file_data(file_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Endpoint to remove every row ingested from a file
+    """
+    result = file_service.handle_delete(file_id, db)
+    background_tasks.add_task(sweep_uploads, file_service.UPLOAD_DIR)
+    return result
+
+@router.post("/{file_id}/reprocess")
+def reprocess_file(
+    file_id: int,
+    background_tasks: BackgroundTasks,
+    payload: dict = Body(default={}),
+    db: Session = Depends(get_db)
+):
+    """
+    Endpoint to delete a file's rows and ingest it again, optionally with a new mapping
+    """
+    result = file_service.handle_reprocess(file_id, payload.get("mapping"), db)
+    background_tasks.add_task(sweep_uploads, file_service.UPLOAD_DIR)
+    return result
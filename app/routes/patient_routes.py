@@ -0,0 +1,47 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.database.deps import get_db
+from app.dao.patient_search import search_patients
+from app.dao.patient_profile import get_patient_profile
+from app.schemas.responses import (
+    PATIENT_PROFILE, PATIENT_SEARCH_PAGE, PatientProfileRead, PatientSearchPage
+)
+from app.utils.serialization import JSONBytesResponse, dump_json
+
+patient_router = APIRouter(tags=["Patients"])
+
+
+@patient_router.get("/search", response_model=PatientSearchPage)
+def search(
+    q: Optional[str] = Query(None, description="Name prefix or fragment"),
+    condition: Optional[str] = None,
+    hospital: Optional[str] = None,
+    dob_from: Optional[date] = None,
+    dob_to: Optional[date] = None,
+    fuzzy: bool = False,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Endpoint to search patients by name, condition, hospital and date of birth range
+    """
+    page = search_patients(
+        db, q=q, condition=condition, hospital=hospital,
+        dob_from=dob_from, dob_to=dob_to, fuzzy=fuzzy, limit=limit, offset=offset
+    )
+    return JSONBytesResponse(dump_json(PATIENT_SEARCH_PAGE, page))
+
+
+@patient_router.get("/{patient_id}/profile", response_model=PatientProfileRead)
+def get_profile(patient_id: int, db: Session = Depends(get_db)):
+    """
+    Endpoint to read a patient's denormalized profile and when it was last refreshed
+    """
+    profile = get_patient_profile(db, patient_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return JSONBytesResponse(dump_json(PATIENT_PROFILE, profile))
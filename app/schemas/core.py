@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import List, Optional
 from datetime import date, datetime
 
@@ -16,8 +16,7 @@ class HospitalCreate(HospitalBase):
 class Hospital(HospitalBase):
     hospital_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ----------------------------
@@ -33,8 +32,7 @@ class MedicalConditionCreate(MedicalConditionBase):
 class MedicalCondition(MedicalConditionBase):
     condition_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ----------------------------
@@ -46,11 +44,11 @@ class PatientBase(BaseModel):
     last_name: str
     date_of_birth: date
     gender: str
-    phone: Optional[str]
-    email: Optional[EmailStr]
-    address: Optional[str]
-    country: Optional[str]
-    hospital_id: Optional[int]
+    phone: Optional[str] = None
+    email: Optional[EmailStr] = None
+    address: Optional[str] = None
+    country: Optional[str] = None
+    hospital_id: Optional[int] = None
 
 class PatientCreate(PatientBase):
     condition_ids: Optional[List[int]] = []
@@ -59,8 +57,7 @@ class Patient(PatientBase):
     patient_id: int
     conditions: List[MedicalCondition] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ----------------------------
@@ -77,8 +74,7 @@ class FamilyHistoryCreate(FamilyHistoryBase):
 class FamilyHistory(FamilyHistoryBase):
     history_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ----------------------------
@@ -95,8 +91,7 @@ class DiagnosisCreate(DiagnosisBase):
 class Diagnosis(DiagnosisBase):
     diagnosis_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ----------------------------
@@ -106,8 +101,8 @@ class Diagnosis(DiagnosisBase):
 class TreatmentBase(BaseModel):
     treatment_type: str
     start_date: date
-    end_date: Optional[date]
-    outcome: Optional[str]
+    end_date: Optional[date] = None
+    outcome: Optional[str] = None
 
 class TreatmentCreate(TreatmentBase):
     patient_id: int
@@ -115,8 +110,7 @@ class TreatmentCreate(TreatmentBase):
 class Treatment(TreatmentBase):
     treatment_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ----------------------------
@@ -124,10 +118,10 @@ class Treatment(TreatmentBase):
 # ----------------------------
 
 class LifestyleBase(BaseModel):
-    smoking_status: Optional[str]
-    alcohol_use: Optional[str]
-    exercise_habit: Optional[str]
-    diet: Optional[str]
+    smoking_status: Optional[str] = None
+    alcohol_use: Optional[str] = None
+    exercise_habit: Optional[str] = None
+    diet: Optional[str] = None
 
 class LifestyleCreate(LifestyleBase):
     patient_id: int
@@ -135,8 +129,7 @@ class LifestyleCreate(LifestyleBase):
 class Lifestyle(LifestyleBase):
     lifestyle_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ----------------------------
@@ -155,8 +148,7 @@ class LabResultCreate(LabResultBase):
 class LabResult(LabResultBase):
     result_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ----------------------------
@@ -171,17 +163,16 @@ class FileUploadLogBase(BaseModel):
     mapped_columns: Optional[List[str]] = []
     missing_columns: Optional[List[str]] = []
     extra_columns: Optional[List[str]] = []
-    empty_cells: Optional[int]
+    empty_cells: Optional[int] = None
     invalid_types: Optional[List[str]] = []
-    total_rows: Optional[int]
-    local_path: Optional[str]
+    total_rows: Optional[int] = None
+    local_path: Optional[str] = None
 
 class FileUploadLogCreate(FileUploadLogBase):
     pass
 
 class FileUploadLog(FileUploadLogBase):
     file_id: int
-    upload_time: Optional[datetime]
+    upload_time: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,294 @@
+from datetime import date, datetime
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing_extensions import NotRequired, TypedDict
+
+# Response shapes for the read endpoints.
+# Large row lists are TypedDicts: the DAOs project exactly these columns in SQL
+# and TypeAdapter.dump_json serializes the dicts in pydantic-core without
+# building a model instance per row. Object-shaped responses are models
+# validated from ORM objects (from_attributes).
+
+
+class ReadModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+# ----------------------------
+# /file/data/all
+# ----------------------------
+
+class PatientRow(TypedDict):
+    patient_id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+    phone: Optional[str]
+    email: Optional[str]
+    gender: Optional[str]
+    address: Optional[str]
+    country: Optional[str]
+    date_of_birth: Optional[date]
+    hospital_name: Optional[str]
+    file_id: Optional[int]
+
+
+class LifestyleRow(TypedDict):
+    lifestyle_id: int
+    patient_id: Optional[int]
+    first_name: Optional[str]
+    alcohol_use: Optional[str]
+    diet: Optional[str]
+    smoking_status: Optional[str]
+    exercise_habit: Optional[str]
+    file_id: Optional[int]
+
+
+class DiagnosisRow(TypedDict):
+    diagnosis_id: int
+    patient_id: Optional[int]
+    first_name: Optional[str]
+    diagnosis_date: Optional[date]
+    condition_name: Optional[str]
+    file_id: Optional[int]
+
+
+class LabResultRow(TypedDict):
+    result_id: int
+    patient_id: Optional[int]
+    first_name: Optional[str]
+    test_name: Optional[str]
+    test_value: Optional[str]
+    test_value_numeric: Optional[float]
+    unit: Optional[str]
+    test_date: Optional[date]
+    file_id: Optional[int]
+
+
+class TreatmentRow(TypedDict):
+    treatment_id: int
+    patient_id: Optional[int]
+    first_name: Optional[str]
+    treatment_type: Optional[str]
+    start_date: Optional[date]
+    end_date: Optional[date]
+    outcome: Optional[str]
+    file_id: Optional[int]
+
+
+class HospitalRow(TypedDict):
+    hospital_id: int
+    hospital_name: Optional[str]
+    hospital_address: Optional[str]
+    file_id: Optional[int]
+
+
+class FamilyHistoryRow(TypedDict):
+    history_id: int
+    patient_id: Optional[int]
+    first_name: Optional[str]
+    relative: Optional[str]
+    condition_name: Optional[str]
+    file_id: Optional[int]
+
+
+class FullDatabaseData(BaseModel):
+    patient: List[PatientRow]
+    lifestyle: List[LifestyleRow]
+    diagnosis: List[DiagnosisRow]
+    lab_result: List[LabResultRow]
+    treatment: List[TreatmentRow]
+    hospital: List[HospitalRow]
+    family_history: List[FamilyHistoryRow]
+
+
+# ----------------------------
+# /file/data/{file_id}
+# ----------------------------
+
+class FilePatientRow(TypedDict):
+    patient_id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+    date_of_birth: Optional[date]
+    gender: Optional[str]
+    phone: Optional[str]
+    email: Optional[str]
+    address: Optional[str]
+    country: Optional[str]
+    hospital_id: Optional[int]
+    file_id: Optional[int]
+    hospital: NotRequired[HospitalRow]
+
+
+class FileTreatmentRow(TypedDict):
+    treatment_id: int
+    patient_id: Optional[int]
+    treatment_type: Optional[str]
+    start_date: Optional[date]
+    end_date: Optional[date]
+    outcome: Optional[str]
+    file_id: Optional[int]
+
+
+class FileDiagnosisRow(TypedDict):
+    diagnosis_id: int
+    patient_id: Optional[int]
+    diagnosis_date: Optional[date]
+    file_id: Optional[int]
+    condition_name: Optional[str]
+
+
+class FileLifestyleRow(TypedDict):
+    lifestyle_id: int
+    patient_id: Optional[int]
+    smoking_status: Optional[str]
+    alcohol_use: Optional[str]
+    exercise_habit: Optional[str]
+    diet: Optional[str]
+    file_id: Optional[int]
+
+
+class FileLabResultRow(TypedDict):
+    result_id: int
+    patient_id: Optional[int]
+    test_name: Optional[str]
+    test_value: Optional[str]
+    test_value_numeric: Optional[float]
+    unit: Optional[str]
+    test_date: Optional[date]
+    file_id: Optional[int]
+
+
+class FileFamilyHistoryRow(TypedDict):
+    history_id: int
+    patient_id: Optional[int]
+    relative: Optional[str]
+    file_id: Optional[int]
+    condition_name: Optional[str]
+
+
+class FileData(BaseModel):
+    patient: List[FilePatientRow]
+    treatment: Optional[List[FileTreatmentRow]] = None
+    diagnosis: Optional[List[FileDiagnosisRow]] = None
+    lifestyle: Optional[List[FileLifestyleRow]] = None
+    lab_result: Optional[List[FileLabResultRow]] = None
+    family_history: Optional[List[FileFamilyHistoryRow]] = None
+
+
+# ----------------------------
+# /file/logs/
+# ----------------------------
+
+class FileLogSummary(TypedDict):
+    file_id: int
+    filename: Optional[str]
+    file_type: Optional[str]
+    upload_time: Optional[datetime]
+    status: Optional[str]
+    empty_cells: Optional[int]
+    total_rows: Optional[int]
+    total_input_columns: Optional[int]
+    size: Optional[float]
+
+
+class FileLogRow(FileLogSummary):
+    # Only with ?full=true
+    mapped_tables: Optional[List[str]]
+    mapped_columns: Optional[List[str]]
+    missing_columns: Optional[List[str]]
+    extra_columns: Optional[List[str]]
+    invalid_types: Optional[List[str]]
+
+
+# ----------------------------
+# /dashboard
+# ----------------------------
+
+class SummaryCard(BaseModel):
+    title: str
+    value: str
+    icon: str
+    color: str
+    bgColor: str
+
+
+class ValidationSummaryItem(BaseModel):
+    name: str
+    value: int
+    color: str
+
+
+class UploadTrend(BaseModel):
+    name: str
+    year: int
+    uploads: int
+    successful: int
+
+
+# ----------------------------
+# /patients
+# ----------------------------
+
+class PatientSearchItem(ReadModel):
+    patient_id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    date_of_birth: Optional[date] = None
+    gender: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    country: Optional[str] = None
+    hospital_name: Optional[str] = None
+    file_id: Optional[int] = None
+
+
+class PatientSearchPage(BaseModel):
+    items: List[PatientSearchItem]
+    limit: int
+    offset: int
+    next_offset: Optional[int] = None
+
+
+class PatientProfileRead(ReadModel):
+    patient_id: int
+    refreshed_at: Optional[datetime] = None
+    profile: Any = Field(None, validation_alias="document")
+
+
+# Adapters are built once; building the core schema is the expensive part
+PATIENT_ROWS = TypeAdapter(List[PatientRow])
+LIFESTYLE_ROWS = TypeAdapter(List[LifestyleRow])
+DIAGNOSIS_ROWS = TypeAdapter(List[DiagnosisRow])
+LAB_RESULT_ROWS = TypeAdapter(List[LabResultRow])
+TREATMENT_ROWS = TypeAdapter(List[TreatmentRow])
+HOSPITAL_ROWS = TypeAdapter(List[HospitalRow])
+FAMILY_HISTORY_ROWS = TypeAdapter(List[FamilyHistoryRow])
+
+FULL_DATA_ADAPTERS = {
+    "patient": PATIENT_ROWS,
+    "lifestyle": LIFESTYLE_ROWS,
+    "diagnosis": DIAGNOSIS_ROWS,
+    "lab_result": LAB_RESULT_ROWS,
+    "treatment": TREATMENT_ROWS,
+    "hospital": HOSPITAL_ROWS,
+    "family_history": FAMILY_HISTORY_ROWS,
+}
+
+FILE_DATA_ADAPTERS = {
+    "patient": TypeAdapter(List[FilePatientRow]),
+    "treatment": TypeAdapter(List[FileTreatmentRow]),
+    "diagnosis": TypeAdapter(List[FileDiagnosisRow]),
+    "lifestyle": TypeAdapter(List[FileLifestyleRow]),
+    "lab_result": TypeAdapter(List[FileLabResultRow]),
+    "family_history": TypeAdapter(List[FileFamilyHistoryRow]),
+}
+
+FILE_LOG_ROWS = TypeAdapter(List[FileLogRow])
+FILE_LOG_SUMMARIES = TypeAdapter(List[FileLogSummary])
+SUMMARY_CARDS = TypeAdapter(List[SummaryCard])
+VALIDATION_SUMMARY = TypeAdapter(List[ValidationSummaryItem])
+UPLOAD_TRENDS = TypeAdapter(List[UploadTrend])
+PATIENT_SEARCH_PAGE = TypeAdapter(PatientSearchPage)
+PATIENT_PROFILE = TypeAdapter(PatientProfileRead)
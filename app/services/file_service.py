@@ -1,29 +1,68 @@
 from fastapi import  UploadFile, HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional
+import asyncio
+import contextlib
+import copy
+import itertools
+import random
 import shutil
 import csv
-import pandas as pd
-import numpy as np
+import logging
 
 from app.utils.llm2 import generate_table_mapping
-from app.dao.insert_data import insert_data_to_tables
+from app.dao.delete_file_data import delete_file_data, delete_patients_after
+from app.dao.upload_lock import upload_lock
+from app.dao.patient_profile import file_patient_ids, refresh_patient_profiles, refresh_profiles_for_file
 from app.models.core import FileUploadLog
-from app.utils import load_schema, audit_metrics, sanitize_sample_data
+from app.utils import get_schema_registry, audit_metrics, sanitize_sample_data
+from app.utils.coercion import format_invalid_values
+from app.utils.compression import stored_encoding
+from app.utils.metrics import span
+from app.utils.parallel_csv import parse_workers, read_csv_parallel
+from app.utils.preview_sampling import sample_delimited, sample_frame, summarize_sample
+from app.services.ingest_pipeline import MISSING_VALUES, IngestPipeline, ReadError
+from app.services.upload_storage import discard_compressed, logical_path, resolve_upload, uploaded_size
+from app.config import Config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
 
 SUPPORTED_EXTENSIONS = {".csv", ".tsv", ".xls", ".xlsx"}
+DELIMITERS = {".csv": ",", ".tsv": "\t"}
+
+# Rows parsed and sent per chunk by /file/preview?rows=N
+PREVIEW_STREAM_CHUNK_ROWS = 1000
+
+
+def _read_table(saved_path: Path) -> "pd.DataFrame":
+    # pandas and the Excel engines load on the first parse, not at startup
+    import pandas as pd
+
+    ext = saved_path.suffix.lower()
+    if ext in DELIMITERS:
+        if parse_workers() > 1 and saved_path.stat().st_size >= Config.PARALLEL_PARSE_MIN_MB << 20:
+            return read_csv_parallel(saved_path, DELIMITERS[ext])
+        return pd.read_csv(saved_path, sep=DELIMITERS[ext])
+    if ext in {".xls", ".xlsx"}:
+        return pd.read_excel(saved_path)
+    raise HTTPException(status_code=400, detail="Unsupported file format.")
+
 
 class FileService:
-    UPLOAD_DIR = Path("uploaded_files")
-    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-    
+    UPLOAD_DIR = Path(Config.UPLOAD_DIR)
 
     @classmethod
-    async def handle_file_mapping_preview(cls, file: UploadFile, db: Session) -> dict:
-        """
-        Handles file preview for CSV, TSV, and Excel files.
-        Converts non-CSV files to a uniform CSV-like format for downstream processing.
-        """
+    def ensure_upload_dir(cls):
+        cls.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def _save_upload(cls, file: UploadFile) -> Path:
         ext = Path(file.filename).suffix.lower()
         if ext not in SUPPORTED_EXTENSIONS:
             raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
@@ -31,101 +70,469 @@ class FileService:
         saved_path = cls.UPLOAD_DIR / file.filename
         with saved_path.open("wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
+        discard_compressed(saved_path)
+        return saved_path
+
+    @staticmethod
+    def _sample_preview(saved_path: Path) -> dict:
+        """
+        Samples a saved upload for the mapping preview without parsing all of it.
+        CSV/TSV rows are counted with a newline scan and reservoir-sampled in one
+        pass; Excel files and CSVs with multi-line quoted fields are parsed whole.
+        """
+        rng = random.Random(saved_path.stat().st_size)
+        ext = saved_path.suffix.lower()
 
-        if ext == ".csv":
-            df = pd.read_csv(saved_path)
-        elif ext == ".tsv":
-            df = pd.read_csv(saved_path, sep="\t")
-        elif ext in {".xls", ".xlsx"}:
-            df = pd.read_excel(saved_path)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format.")
+        with span("file.parse"):
+            sampled = None
+            if ext in DELIMITERS:
+                sampled = sample_delimited(saved_path, DELIMITERS[ext], rng)
+            if sampled is None:
+                df = _read_table(saved_path)
+                sampled = {"frame": sample_frame(df, rng), "total_rows": len(df)}
 
-        if df.empty or df.columns.isnull().any():
+        frame = sampled["frame"]
+        if frame.empty or frame.columns.isnull().any():
             raise HTTPException(status_code=400, detail="No headers found.")
 
-        headers = df.columns.tolist()
-        df = df.replace([np.nan, np.inf, -np.inf], None)
-        sample_data = sanitize_sample_data(df.head(5).to_dict(orient="records"))
-        mapping = await generate_table_mapping(headers, sample_data)
-
-        schema = load_schema()
-        expected_columns = [col for table in schema.values() for col in table]
+        summary = summarize_sample(frame.replace(MISSING_VALUES, None), rng)
+        return {
+            "headers": frame.columns.tolist(),
+            "sample_data": sanitize_sample_data(summary["rows"]),
+            "column_samples": summary["column_samples"],
+            "total_rows": sampled["total_rows"],
+        }
 
+    @staticmethod
+    def _build_preview(file_name: str, saved_path: Path, preview: dict, mapping: dict) -> dict:
         return {
-            "file_name": file.filename,
+            "file_name": file_name,
             "mapping": mapping["mappings"],
-            "expected_columns": expected_columns,
-            "sample_data": sample_data,
+            "expected_columns": list(get_schema_registry().expected_columns),
+            "sample_data": preview["sample_data"],
+            "column_samples": preview["column_samples"],
             "local_path": str(saved_path),
-            "total_rows": len(df)
+            "total_rows": preview["total_rows"],
+            "prompt_tokens": mapping.get("prompt_tokens", 0)
         }
 
     @classmethod
-    def handle_file_processing(cls, filename: str, final_mapping: dict, db: Session) -> dict:
+    async def handle_file_mapping_preview(cls, file: UploadFile, db: Session) -> dict:
         """
-        Loads a file (CSV, TSV, Excel) by filename, applies the final mapping,
-        inserts data into the database, and logs audit metrics.
+        Handles file preview for CSV, TSV, and Excel files.
+        Converts non-CSV files to a uniform CSV-like format for downstream processing.
         """
-        ext = Path(filename).suffix.lower()
-        if ext not in SUPPORTED_EXTENSIONS:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
+        saved_path = cls._save_upload(file)
+        preview = cls._sample_preview(saved_path)
 
-        saved_path = cls.UPLOAD_DIR / filename
+        mapping = await generate_table_mapping(
+            preview["headers"], preview["sample_data"], preview["column_samples"]
+        )
 
-        if not saved_path.exists():
-            raise HTTPException(status_code=404, detail="File not found on server.")
+        return cls._build_preview(file.filename, saved_path, preview, mapping)
+
+    @classmethod
+    async def handle_batch_mapping_preview(cls, files: List[UploadFile], db: Session) -> List[dict]:
+        """
+        Handles preview for several files in one request.
+        Files are sampled concurrently and each distinct header layout is mapped
+        once, with all layouts sent to the LLM concurrently.
+        """
+        saved_paths = [cls._save_upload(file) for file in files]
+        previews = await asyncio.gather(
+            *(asyncio.to_thread(cls._sample_preview, path) for path in saved_paths)
+        )
+
+        # Files sharing the same header layout reuse one mapping
+        layouts = {}
+        for index, preview in enumerate(previews):
+            layouts.setdefault(tuple(preview["headers"]), []).append(index)
+
+        layout_mappings = await asyncio.gather(
+            *(
+                generate_table_mapping(
+                    list(headers), previews[indices[0]]["sample_data"], previews[indices[0]]["column_samples"]
+                )
+                for headers, indices in layouts.items()
+            )
+        )
+
+        results = [None] * len(files)
+        for (headers, indices), mapping in zip(layouts.items(), layout_mappings):
+            for index in indices:
+                results[index] = cls._build_preview(
+                    files[index].filename,
+                    saved_paths[index],
+                    previews[index],
+                    copy.deepcopy(mapping)
+                )
+        return results
+
+    @staticmethod
+    def _read_headers(saved_path: Path) -> list:
+        """
+        Reads the header row and the first data row, so an unreadable or empty
+        file is rejected before an upload log is created.
+        """
+        import pandas as pd
 
         try:
-            if ext == ".csv":
-                df = pd.read_csv(saved_path)
-            elif ext == ".tsv":
-                df = pd.read_csv(saved_path, sep="\t")
-            elif ext in {".xls", ".xlsx"}:
-                df = pd.read_excel(saved_path)
+            ext = logical_path(saved_path).suffix.lower()
+            if ext in DELIMITERS:
+                df = pd.read_csv(saved_path, sep=DELIMITERS[ext], nrows=1)
             else:
-                raise HTTPException(status_code=400, detail="Unsupported file format.")
+                df = pd.read_excel(saved_path, nrows=1)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to read file: {str(e)}")
 
         if df.empty or df.columns.isnull().any():
             raise HTTPException(status_code=400, detail="No headers found or file is empty.")
+        return df.columns.tolist()
+
+    @staticmethod
+    def stream_head_rows(saved_path: Path, rows: int) -> Iterator[bytes]:
+        """
+        Streams the first `rows` parsed rows of an upload as JSON
+        ({"file_name", "headers", "rows"}), PREVIEW_STREAM_CHUNK_ROWS at a time.
+        Only the head of the file is read. The first chunk is parsed before
+        this returns, so an unreadable file is still a 400.
+        """
+        import orjson
+        import pandas as pd
+
+        # Named as uploaded, without the suffix of the coding it is stored in
+        name = logical_path(saved_path).name
+        ext = Path(name).suffix.lower()
+        try:
+            if ext in DELIMITERS:
+                frames = pd.read_csv(
+                    saved_path, sep=DELIMITERS[ext], nrows=rows, chunksize=PREVIEW_STREAM_CHUNK_ROWS
+                )
+            elif ext in {".xls", ".xlsx"}:
+                frames = iter([pd.read_excel(saved_path, nrows=rows)])
+            else:
+                raise HTTPException(status_code=400, detail="Unsupported file format.")
+            first = next(frames)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to read file: {str(e)}")
+
+        def records(frame: "pd.DataFrame") -> bytes:
+            rows_json = orjson.dumps(frame.astype(object).where(frame.notna(), None).to_dict("records"), default=str)
+            return rows_json[1:-1]
+
+        def body() -> Iterator[bytes]:
+            yield (
+                b'{"file_name":' + orjson.dumps(name)
+                + b',"headers":' + orjson.dumps([str(header) for header in first.columns])
+                + b',"rows":['
+            )
+            separator = b""
+            for frame in itertools.chain([first], frames):
+                if len(frame):
+                    yield separator + records(frame)
+                    separator = b","
+            yield b"]}"
+
+        return body()
+
+    @staticmethod
+    def _ingest(file_log: FileUploadLog, mapping: dict, db: Session, start_row: int = 0) -> dict:
+        """
+        Parses, coerces and inserts the saved upload from start_row onwards through
+        the ingestion pipeline, committing in chunks. The empty cell count, invalid
+        value summary and row count cover the whole file and are stored on the log.
+        On failure the log is marked failed and keeps its last committed offset.
+        """
+        file_id = file_log.file_id
+        saved_path = resolve_upload(Path(file_log.local_path)) or Path(file_log.local_path)
+        pipeline = IngestPipeline(
+            saved_path, DELIMITERS.get(logical_path(saved_path).suffix.lower()), mapping, file_id, start_row=start_row
+        )
+        try:
+            with span("insert"):
+                ingest_stats = pipeline.run()
+        except Exception as e:
+            db.query(FileUploadLog).filter_by(file_id=file_id).update(
+                {"status": "failed"}, synchronize_session=False
+            )
+            db.commit()
+            if isinstance(e, ReadError):
+                raise HTTPException(status_code=400, detail=f"Failed to read file: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Ingestion failed, resume with POST /file/{file_id}/resume: {str(e)}"
+            )
+
+        if ingest_stats["duplicate_conditions"]:
+            logger.warning(
+                "File %s: skipped %d duplicate patient conditions",
+                file_id, ingest_stats["duplicate_conditions"]
+            )
+
+        ingest_stats["invalid_types"] = format_invalid_values(ingest_stats["invalid_values"])
+        db.refresh(file_log)
+        file_log.status = "processed"
+        file_log.empty_cells = ingest_stats["empty_cells"]
+        file_log.invalid_types = ingest_stats["invalid_types"]
+        file_log.total_rows = ingest_stats["total_rows"]
+        db.commit()
+
+        with span("profile.refresh"):
+            refresh_profiles_for_file(db, file_id)
+        return ingest_stats
+
+    @staticmethod
+    def _ingest_response(ingest_stats: dict) -> dict:
+        return {
+            "rows": ingest_stats["total_rows"],
+            "patients_created": ingest_stats["patients_created"],
+            "patients_merged": ingest_stats["patients_merged"],
+            "duplicate_conditions": ingest_stats["duplicate_conditions"],
+            "pipeline": ingest_stats["pipeline"],
+        }
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _exclusive(filename: str):
+        """
+        Holds the upload's lock (app/dao/upload_lock.py) for the block, or answers
+        409 when another ingestion, reprocess or delete of it is running.
+        """
+        with upload_lock(filename) as acquired:
+            if not acquired:
+                raise HTTPException(
+                    status_code=409, detail=f"{filename} is already being processed, retry once that finishes."
+                )
+            yield
+
+    @staticmethod
+    def _replay(previous: FileUploadLog, filename: str) -> dict:
+        """
+        The response of the earlier call made with the same Idempotency-Key.
+        """
+        if previous.filename != filename:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for another file.")
+        if previous.process_result is not None:
+            return previous.process_result
+        raise HTTPException(
+            status_code=409,
+            detail=f"An earlier call with this Idempotency-Key created file {previous.file_id}, which is "
+                   f"{previous.status}; resume it with POST /file/{previous.file_id}/resume."
+        )
 
-        headers = df.columns.tolist()
-        df = df.replace([np.nan, np.inf, -np.inf], None)
-        rows = df.to_dict(orient="records")
+    @classmethod
+    def handle_file_processing(cls, filename: str, final_mapping: dict, db: Session,
+                               idempotency_key: Optional[str] = None) -> dict:
+        """
+        Loads a file (CSV, TSV, Excel) by filename, applies the final mapping,
+        inserts data into the database, and logs audit metrics. Runs under the
+        upload's lock; a call repeating an Idempotency-Key gets the first call's
+        response instead of a second ingestion.
+        """
+        filename = Path(filename).name
+        ext = Path(filename).suffix.lower()
+        if ext not in SUPPORTED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
+
+        with cls._exclusive(filename):
+            if idempotency_key:
+                previous = db.query(FileUploadLog).filter_by(idempotency_key=idempotency_key).first()
+                if previous:
+                    return cls._replay(previous, filename)
+            return cls._process(filename, ext, final_mapping, db, idempotency_key)
 
-        schema = load_schema()
-        audit = audit_metrics(schema, headers, final_mapping, rows)
+    @classmethod
+    def _process(cls, filename: str, ext: str, final_mapping: dict, db: Session,
+                 idempotency_key: Optional[str]) -> dict:
+        # Uploads processed before may have been compressed at rest since
+        stored_path = resolve_upload(cls.UPLOAD_DIR / filename)
+        if stored_path is None:
+            raise HTTPException(status_code=404, detail="File not found on server.")
+        saved_path = logical_path(stored_path)
 
-        file_size_bytes = saved_path.stat().st_size
-        file_size_kb = round(file_size_bytes / 1024, 3)
+        headers = cls._read_headers(stored_path)
+        with span("audit"):
+            audit = audit_metrics(headers, final_mapping, 0)
+
+        file_size_kb = round(uploaded_size(stored_path) / 1024, 3)
 
         file_log = FileUploadLog(
             filename=filename,
             file_type=ext.lstrip("."),
-            status="processed",
+            status="processing",
             mapped_tables=audit["mapped_tables"],
             mapped_columns=audit["mapped_columns"],
             missing_columns=audit["missing_columns"],
             extra_columns=audit["extra_columns"],
-            empty_cells=audit["empty_cells"],
-            total_rows=len(rows),
+            empty_cells=0,
+            invalid_types=[],
+            total_rows=0,
             local_path=str(saved_path),
             total_input_columns=audit["total_column_count"],
-            file_size=file_size_kb
+            file_size=file_size_kb,
+            storage_state=stored_encoding(stored_path) or "raw",
+            stored_bytes=stored_path.stat().st_size,
+            last_committed_row=0,
+            mapping=final_mapping,
+            idempotency_key=idempotency_key
         )
         db.add(file_log)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # The same key, sent with another file name, won the race
+            db.rollback()
+            previous = db.query(FileUploadLog).filter_by(idempotency_key=idempotency_key).one()
+            return cls._replay(previous, filename)
         db.refresh(file_log)
 
         file_id = file_log.file_id
+        ingest_stats = cls._ingest(file_log, final_mapping, db)
+        audit["empty_cells"] = ingest_stats["empty_cells"]
+        audit["invalid_types"] = ingest_stats["invalid_types"]
 
-        insert_data_to_tables(final_mapping, rows, db, file_id=file_id)
-
-        return {
+        result = {
             "message": "File processed and data inserted successfully.",
-            "rows": len(rows),
+            **cls._ingest_response(ingest_stats),
             "audit": audit,
             "file_id": file_id
-        }
\ No newline at end of file
+        }
+        if idempotency_key:
+            file_log.process_result = jsonable_encoder(result)
+            db.commit()
+        return result
+
+    @classmethod
+    def handle_resume(cls, file_id: int, db: Session) -> dict:
+        """
+        Resumes a failed or interrupted ingestion from the last committed row
+        using the mapping stored on the upload log.
+        """
+        file_log = db.get(FileUploadLog, file_id)
+        if not file_log:
+            raise HTTPException(status_code=404, detail="File log not found.")
+        with cls._exclusive(file_log.filename):
+            db.refresh(file_log)
+            if file_log.status == "processed":
+                raise HTTPException(status_code=409, detail="File is already fully processed.")
+            if not file_log.mapping:
+                raise HTTPException(status_code=409, detail="No stored mapping to resume with.")
+
+            saved_path = cls._stored_upload(file_log)
+
+            cls._read_headers(saved_path)
+            start_row = file_log.last_committed_row or 0
+
+            # Patients a killed run committed past the checkpoint. Matching can't be relied on
+            # to reuse them (PATIENT_MATCH_POLICY=off), so they are removed and written again
+            if start_row == 0 or file_log.last_committed_patient_id is not None:
+                removed = delete_patients_after(db, file_id, file_log.last_committed_patient_id or 0)
+                if removed:
+                    logger.info("File %s: removed %d patients past the checkpoint before resuming", file_id, removed)
+
+            file_log.status = "processing"
+            db.commit()
+            ingest_stats = cls._ingest(file_log, file_log.mapping, db, start_row=start_row)
+
+            return {
+                "message": "File ingestion resumed and completed.",
+                **cls._ingest_response(ingest_stats),
+                "resumed_from": start_row,
+                "file_id": file_id
+            }
+
+    @staticmethod
+    def _stored_upload(file_log: FileUploadLog) -> Path:
+        """
+        The upload's file as stored now, compressed or not.
+        """
+        saved_path = resolve_upload(Path(file_log.local_path))
+        if saved_path is None:
+            if file_log.storage_state == "purged":
+                raise HTTPException(status_code=410, detail="File was removed by the upload retention policy.")
+            raise HTTPException(status_code=404, detail="File not found on server.")
+        return saved_path
+
+    @staticmethod
+    def _get_file_log(file_id: int, db: Session) -> FileUploadLog:
+        file_log = db.get(FileUploadLog, file_id)
+        if not file_log:
+            raise HTTPException(status_code=404, detail="File log not found.")
+        return file_log
+
+    @classmethod
+    def handle_delete(cls, file_id: int, db: Session) -> dict:
+        """
+        Removes every row ingested from a file. The upload log is kept and marked deleted.
+        """
+        file_log = cls._get_file_log(file_id, db)
+        with cls._exclusive(file_log.filename):
+            affected_patients = file_patient_ids(db, file_id)
+            with span("delete"):
+                deleted = delete_file_data(db, file_id)
+
+            # Patients the file had merged rows onto lose those rows
+            with span("profile.refresh"):
+                refresh_patient_profiles(db, affected_patients)
+
+            file_log.status = "deleted"
+            file_log.last_committed_row = 0
+            file_log.last_committed_patient_id = None
+            db.commit()
+
+            return {
+                "message": "File data deleted successfully.",
+                "file_id": file_id,
+                "deleted": deleted
+            }
+
+    @classmethod
+    def handle_reprocess(cls, file_id: int, final_mapping: dict, db: Session) -> dict:
+        """
+        Deletes a file's rows and ingests the saved upload again, with a new
+        mapping when given, otherwise with the stored one.
+        """
+        file_log = cls._get_file_log(file_id, db)
+        final_mapping = final_mapping or file_log.mapping
+        if not final_mapping:
+            raise HTTPException(status_code=400, detail="Missing mapping.")
+
+        with cls._exclusive(file_log.filename):
+            saved_path = cls._stored_upload(file_log)
+
+            headers = cls._read_headers(saved_path)
+            with span("audit"):
+                audit = audit_metrics(headers, final_mapping, 0)
+
+            affected_patients = file_patient_ids(db, file_id)
+            with span("delete"):
+                deleted = delete_file_data(db, file_id)
+            refresh_patient_profiles(db, affected_patients)
+
+            file_log.status = "processing"
+            file_log.mapping = final_mapping
+            file_log.last_committed_row = 0
+            file_log.last_committed_patient_id = None
+            file_log.mapped_tables = audit["mapped_tables"]
+            file_log.mapped_columns = audit["mapped_columns"]
+            file_log.missing_columns = audit["missing_columns"]
+            file_log.extra_columns = audit["extra_columns"]
+            file_log.empty_cells = 0
+            file_log.invalid_types = []
+            file_log.total_rows = 0
+            file_log.total_input_columns = audit["total_column_count"]
+            db.commit()
+
+            ingest_stats = cls._ingest(file_log, final_mapping, db)
+            audit["empty_cells"] = ingest_stats["empty_cells"]
+            audit["invalid_types"] = ingest_stats["invalid_types"]
+
+            return {
+                "message": "File reprocessed successfully.",
+                **cls._ingest_response(ingest_stats),
+                "audit": audit,
+                "deleted": deleted,
+                "file_id": file_id
+            }
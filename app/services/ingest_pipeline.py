@@ -0,0 +1,419 @@
+import contextvars
+import csv
+import logging
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Sequence
+
+from app.config import Config
+from app.dao.delete_file_data import delete_patients_after, latest_patient_id
+from app.dao.identity_resolution import PatientResolver
+from app.dao.insert_data import checkpoint, insert_child_rows, insert_parent_rows
+from app.database.connection import SessionLocal, engine
+from app.utils.compression import stored_encoding
+from app.utils.coercion import coerce_frame, count_empty_cells, merge_invalid_values, text_headers
+from app.utils.metrics import PIPELINE_QUEUE_DEPTH, PIPELINE_STAGE_ROWS, PhaseTimer, count_rows, record_span
+from app.utils.parallel_csv import iter_csv_chunks, parse_workers
+from app.utils.reshape import LAB_RESULTS_KEY, group_lab_rows
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MISSING_VALUES = [float("nan"), float("inf"), float("-inf")]
+
+# Rows per frame handed from the reader to the transform stage
+READ_CHUNK_ROWS = 50000
+
+# How often a blocked stage checks whether another stage failed
+POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+class PipelineStopped(Exception):
+    """Raised inside a stage when another stage failed."""
+
+
+class ReadError(Exception):
+    """The upload could not be parsed or transformed, carries the original error."""
+
+
+class _Stage:
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.busy = 0.0
+
+    def add(self, rows: int, seconds: float):
+        self.rows += rows
+        self.busy += seconds
+        PIPELINE_STAGE_ROWS.inc(rows, stage=self.name)
+
+    def stats(self) -> dict:
+        return {
+            "rows": self.rows,
+            "busy_seconds": round(self.busy, 3),
+            "rows_per_second": round(self.rows / self.busy, 1) if self.busy else None,
+        }
+
+
+class _Queue:
+    """Bounded queue that records its depth and gives up once the pipeline stops."""
+
+    def __init__(self, name: str, maxsize: int, stop: threading.Event):
+        self.name = name
+        self.maxsize = maxsize
+        self.max_depth = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stop = stop
+
+    def _observe(self):
+        depth = self._queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        PIPELINE_QUEUE_DEPTH.set(depth, queue=self.name)
+
+    def put(self, item):
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                self._queue.put(item, timeout=POLL_SECONDS)
+                self._observe()
+                return
+            except queue.Full:
+                continue
+
+    def get(self):
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                item = self._queue.get(timeout=POLL_SECONDS)
+                self._observe()
+                return item
+            except queue.Empty:
+                continue
+
+    def stats(self) -> dict:
+        return {"max_depth": self.max_depth, "capacity": self.maxsize}
+
+
+def iter_frames(saved_path: Path, sep: Optional[str], text_columns: Sequence[str] = ()) -> Iterator["pd.DataFrame"]:
+    """
+    Description: The upload as a stream of DataFrames. Large CSV/TSV files are
+    parsed in byte ranges on the process pool; when a range can't be parsed on
+    its own the rest of the file is read with pandas, skipping the rows already
+    yielded. CSV/TSV text_columns are read as strings, not inferred. Excel files
+    are read whole and sliced; their cells are typed already.
+    """
+    import pandas as pd
+
+    if sep is None:
+        df = pd.read_excel(saved_path)
+        for start in range(0, max(len(df), 1), READ_CHUNK_ROWS):
+            yield df.iloc[start:start + READ_CHUNK_ROWS]
+        return
+
+    yielded = 0
+    # Compressed uploads (app/services/upload_storage.py) are streamed through pandas' decompression
+    if (parse_workers() > 1 and stored_encoding(saved_path) is None
+            and saved_path.stat().st_size >= Config.PARALLEL_PARSE_MIN_MB << 20):
+        with saved_path.open("r", newline="", encoding="utf-8", errors="replace") as handle:
+            headers = next(csv.reader(handle, delimiter=sep), [])
+        # pandas renames duplicate headers, the range reader doesn't
+        if len(set(headers)) == len(headers):
+            try:
+                for frame in iter_csv_chunks(saved_path, sep, text_columns=text_columns):
+                    yielded += len(frame)
+                    yield frame
+                return
+            except ValueError as e:
+                logger.warning("Parallel parse of %s failed after %d rows, reading the rest in one process: %s",
+                               saved_path.name, yielded, e)
+
+    dtype = {header: str for header in text_columns}
+    for frame in pd.read_csv(saved_path, sep=sep, dtype=dtype, chunksize=READ_CHUNK_ROWS):
+        if yielded >= len(frame):
+            yielded -= len(frame)
+            continue
+        yield frame.iloc[yielded:]
+        yielded = 0
+
+
+class IngestPipeline:
+    """
+    Ingests one upload in overlapping stages connected by bounded queues:
+
+        reader -> transform -> audit -> parent writer -> child writers
+
+    The reader parses frames, the transform stage coerces them, cuts them into
+    INGEST_CHUNK_SIZE chunks and groups lab results, the audit stage totals
+    empty cells and invalid values, the parent writer inserts hospitals,
+    patients and conditions, and INGEST_WRITERS child writers insert the rows
+    hanging off them, each on its own connection. A full queue blocks the stage
+    feeding it, so at most PIPELINE_QUEUE_DEPTH items wait between two stages.
+
+    A chunk is INGEST_CHUNK_SIZE input rows, counted from start_row, whatever
+    frames the reader produced; long lab rows are grouped within their chunk.
+    Parents are committed per chunk ahead of their children. Child writers
+    commit in chunk order and move FileUploadLog.last_committed_row (an input
+    row offset) and last_committed_patient_id with each commit, so a resumed
+    ingestion restarts after the last chunk whose children are stored, once the
+    patients written past it are removed (FileService.handle_resume).
+    """
+
+    def __init__(self, saved_path: Path, sep: Optional[str], mapping: dict, file_id: int,
+                 start_row: int = 0, writers: int = None, chunk_size: int = None):
+        self.saved_path = saved_path
+        self.sep = sep
+        self.mapping = mapping
+        self.file_id = file_id
+        self.start_row = start_row
+        self.chunk_size = chunk_size or Config.INGEST_CHUNK_SIZE
+        self.writers = max(writers or Config.INGEST_WRITERS, 1)
+
+        # SQLite has one writer at a time: a single child writer, and writes take turns
+        sqlite = engine.dialect.name == "sqlite"
+        if sqlite:
+            self.writers = 1
+        self._write_lock = threading.Lock() if sqlite else nullcontext()
+
+        self._stop = threading.Event()
+        self._error = None
+        depth = Config.PIPELINE_QUEUE_DEPTH
+        self._frames = _Queue("frames", depth, self._stop)
+        self._transformed = _Queue("transformed", depth, self._stop)
+        self._chunks = _Queue("chunks", depth, self._stop)
+        self._children = _Queue("children", depth, self._stop)
+        self._stages = {name: _Stage(name) for name in ("read", "transform", "audit", "parent_write", "child_write")}
+
+        self._turn = threading.Condition()
+        self._next_chunk = 0
+        # Highest patient id of the file before the first chunk, then after each chunk's parents
+        self._patient_marks = []
+
+        self.total_rows = 0
+        self.empty_cells = 0
+        self.invalid_values = {}
+        self.duplicate_conditions = 0
+        self.patients_created = 0
+        self.patients_merged = 0
+
+    def _run_stage(self, target: Callable):
+        try:
+            target()
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+                # Failures before the writers are the file's fault, not the database's
+                if target in (self._read, self._transform):
+                    self._error = ReadError(str(e))
+                    self._error.__cause__ = e
+            self._stop.set()
+
+    def run(self) -> dict:
+        """
+        Description: Run every stage to completion. Re-raises the first error any
+        stage hit, after all stages have stopped; read and transform errors as ReadError.
+        """
+        started = time.perf_counter()
+        targets = [self._read, self._transform, self._audit, self._write_parents]
+        targets += [self._write_children] * self.writers
+
+        threads = []
+        for target in targets:
+            # Each thread gets its own copy of the request context, so stats land on the request
+            context = contextvars.copy_context()
+            thread = threading.Thread(target=context.run, args=(self._run_stage, target), daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        for stage in self._stages.values():
+            record_span(f"pipeline.{stage.name}", stage.busy)
+        if self._error is not None:
+            self._discard_uncommitted_parents()
+            raise self._error
+
+        return {
+            "total_rows": self.total_rows,
+            "empty_cells": self.empty_cells,
+            "invalid_values": self.invalid_values,
+            "patients_created": self.patients_created,
+            "patients_merged": self.patients_merged,
+            "duplicate_conditions": self.duplicate_conditions,
+            "pipeline": {
+                "seconds": round(time.perf_counter() - started, 3),
+                "writers": self.writers,
+                "stages": {name: stage.stats() for name, stage in self._stages.items()},
+                "queues": {q.name: q.stats() for q in (self._frames, self._transformed, self._chunks, self._children)},
+            },
+        }
+
+    def _discard_uncommitted_parents(self):
+        # Patients written ahead of chunks whose children were never committed
+        if len(self._patient_marks) <= self._next_chunk + 1:
+            return
+        db = SessionLocal()
+        try:
+            deleted = delete_patients_after(db, self.file_id, self._patient_marks[self._next_chunk])
+            db.commit()
+            logger.info("File %s: removed %d patients past the last committed chunk", self.file_id, deleted)
+        except Exception as e:
+            db.rollback()
+            logger.error("File %s: could not remove patients past the last committed chunk: %s", self.file_id, e)
+        finally:
+            db.close()
+
+    def _read(self):
+        frames = iter_frames(self.saved_path, self.sep, text_headers(self.mapping))
+        try:
+            while True:
+                started = time.perf_counter()
+                frame = next(frames, None)
+                if frame is None:
+                    break
+                self._stages["read"].add(len(frame), time.perf_counter() - started)
+                self._frames.put(frame)
+        finally:
+            # Cancels the ranges still queued on the parse pool when the pipeline stops early
+            frames.close()
+        self._frames.put(_DONE)
+
+    @staticmethod
+    def _chunk_rows(frame: "pd.DataFrame", ingest_mapping: dict) -> tuple:
+        # Long lab rows are grouped per chunk, so a chunk's rows are exactly its input rows
+        lab_results = None
+        if any((ingest_mapping.get("lab_result") or {}).values()):
+            frame, lab_results, ingest_mapping = group_lab_rows(frame, ingest_mapping)
+
+        rows = frame.replace(MISSING_VALUES, None).to_dict(orient="records")
+        if lab_results is not None:
+            for row, labs in zip(rows, lab_results):
+                row[LAB_RESULTS_KEY] = labs
+        return ingest_mapping, rows
+
+    def _transform(self):
+        import pandas as pd
+
+        offset = 0
+        pending = []
+        pending_rows = 0
+        chunk_start = self.start_row
+        ingest_mapping = None
+        while (frame := self._frames.get()) is not _DONE:
+            started = time.perf_counter()
+            input_rows = len(frame)
+            # Counted over the whole file, rows committed by an earlier run included
+            empty_cells = count_empty_cells(frame)
+            frame, ingest_mapping, invalid_values = coerce_frame(frame, self.mapping)
+
+            # Chunks are cut on input row offsets, the same whichever reader produced the frames
+            skip = min(max(self.start_row - offset, 0), input_rows)
+            offset += input_rows
+            if skip < input_rows:
+                pending.append(frame.iloc[skip:])
+                pending_rows += input_rows - skip
+
+            chunks = []
+            while pending_rows >= self.chunk_size:
+                block = pd.concat(pending) if len(pending) > 1 else pending[0]
+                head, rest = block.iloc[:self.chunk_size], block.iloc[self.chunk_size:]
+                pending, pending_rows = ([rest] if len(rest) else []), len(rest)
+                chunks.append((*self._chunk_rows(head, ingest_mapping), chunk_start, len(head)))
+                chunk_start += len(head)
+
+            self._stages["transform"].add(input_rows, time.perf_counter() - started)
+            self._transformed.put((input_rows, empty_cells, invalid_values, chunks))
+
+        if pending:
+            block = pd.concat(pending) if len(pending) > 1 else pending[0]
+            self._transformed.put((0, 0, {}, [(*self._chunk_rows(block, ingest_mapping), chunk_start, len(block))]))
+        self._transformed.put(_DONE)
+
+    def _audit(self):
+        while (item := self._transformed.get()) is not _DONE:
+            started = time.perf_counter()
+            input_rows, empty_cells, invalid_values, chunks = item
+            self.empty_cells += empty_cells
+            merge_invalid_values(self.invalid_values, invalid_values)
+            self.total_rows += input_rows
+            self._stages["audit"].add(input_rows, time.perf_counter() - started)
+
+            for chunk in chunks:
+                self._chunks.put(chunk)
+        self._chunks.put(_DONE)
+
+    def _write_parents(self):
+        db = SessionLocal()
+        timer = PhaseTimer("insert")
+        resolver = PatientResolver(db, file_id=self.file_id)
+        sequence = 0
+        try:
+            self._patient_marks.append(latest_patient_id(db, self.file_id))
+            while (item := self._chunks.get()) is not _DONE:
+                mapping, chunk, chunk_start, input_rows = item
+                with self._write_lock:
+                    started = time.perf_counter()
+                    child_rows, duplicates = insert_parent_rows(db, chunk, mapping, self.file_id, resolver, timer)
+                    db.commit()
+                    self._patient_marks.append(latest_patient_id(db, self.file_id))
+                    self._stages["parent_write"].add(input_rows, time.perf_counter() - started)
+                self.duplicate_conditions += duplicates
+
+                self._children.put(
+                    (sequence, chunk_start + input_rows, self._patient_marks[-1], input_rows, child_rows)
+                )
+                sequence += 1
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            self.patients_created = resolver.created
+            self.patients_merged = resolver.merged
+            timer.record()
+            db.close()
+
+        for _ in range(self.writers):
+            self._children.put(_DONE)
+
+    def _write_children(self):
+        db = SessionLocal()
+        timer = PhaseTimer("insert")
+        try:
+            while (item := self._children.get()) is not _DONE:
+                sequence, chunk_end, patient_mark, rows, child_rows = item
+                with self._write_lock:
+                    started = time.perf_counter()
+                    insert_child_rows(db, child_rows, timer)
+                    busy = time.perf_counter() - started
+
+                    # Commits go in chunk order, so last_committed_row never skips a chunk
+                    with self._turn:
+                        while self._next_chunk != sequence:
+                            if self._stop.is_set():
+                                raise PipelineStopped()
+                            self._turn.wait(POLL_SECONDS)
+                        started = time.perf_counter()
+                        checkpoint(db, self.file_id, chunk_end, patient_mark)
+                        db.commit()
+                        self._next_chunk += 1
+                        self._turn.notify_all()
+
+                count_rows(rows)
+                self._stages["child_write"].add(rows, busy + time.perf_counter() - started)
+                logger.debug("File %s: committed rows up to %d", self.file_id, chunk_end)
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            timer.record()
+            db.close()
@@ -0,0 +1,323 @@
+import contextlib
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import Config
+from app.database.connection import SessionLocal
+from app.models.core import FileUploadLog
+from app.utils.compression import (
+    SUFFIXES, compress_stream, decompress_stream, read_chunks, stored_encoding, zstd_available
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: sweeps are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Excel uploads are zip archives already
+COMPRESSIBLE_EXTENSIONS = {".csv", ".tsv"}
+
+# Compressed once in the background, so tighter levels than on-the-fly downloads use
+STORAGE_LEVELS = {"zstd": 10, "gzip": 6}
+
+# Removed first when the upload dir is over its budget; unknown statuses go before processed
+EVICTION_ORDER = ["preview", "deleted", "validation_error", "failed", "processed"]
+
+# Uploads no log points at yet: previewed and never processed
+PREVIEW = "preview"
+
+# A preview this recent may be waiting for its mapping to be confirmed, the budget leaves it alone
+PREVIEW_GRACE = timedelta(hours=1)
+
+# Rows kept out of the sweep: their files are gone or belong to a newer upload of the same name
+INACTIVE_STATES = ("purged", "superseded")
+
+LOCK_FILE = ".storage.lock"
+TMP_SUFFIX = ".tmp"
+
+_sweep_lock = threading.Lock()
+
+
+def resolve_upload(path: Path) -> Optional[Path]:
+    """
+    Description: Where an upload's file is stored now: as uploaded, or
+    compressed next to it (name.csv.zst / name.csv.gz). None once removed.
+    """
+    if path.exists():
+        return path
+    for suffix in SUFFIXES.values():
+        candidate = path.with_name(path.name + suffix)
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def logical_path(path: Path) -> Path:
+    """
+    Description: The upload's own name for a stored file, without the compression suffix.
+    """
+    return path.with_suffix("") if stored_encoding(path) else path
+
+
+def uploaded_size(path: Path) -> int:
+    """
+    Description: Size in bytes of a stored upload as it was uploaded, read
+    through the decompressor when it is compressed at rest.
+    """
+    encoding = stored_encoding(path)
+    if encoding is None:
+        return path.stat().st_size
+    return sum(len(chunk) for chunk in decompress_stream(read_chunks(path), encoding))
+
+
+def discard_compressed(path: Path):
+    """
+    Description: Drop compressed copies left by an earlier upload of the same
+    name, once a new file has been saved there.
+    """
+    for suffix in SUFFIXES.values():
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+def storage_encoding() -> Optional[str]:
+    setting = Config.UPLOAD_COMPRESSION.lower()
+    if setting == "off":
+        return None
+    if setting == "zstd" and not zstd_available():
+        return "gzip"
+    return setting
+
+
+def retention_days() -> dict:
+    """
+    Description: UPLOAD_RETENTION_DAYS ("deleted=30,preview=7") as {status: days}.
+    """
+    days = {}
+    for item in Config.UPLOAD_RETENTION_DAYS.split(","):
+        status, _, value = item.partition("=")
+        if status.strip() and value.strip():
+            days[status.strip()] = int(value)
+    return days
+
+
+def compress_upload(path: Path, encoding: str) -> Path:
+    """
+    Description: Write a compressed copy next to the upload and return it. The
+    copy only takes its final name once complete; the upload itself is left in place.
+    """
+    target = path.with_name(path.name + SUFFIXES[encoding])
+    partial = target.with_name(target.name + TMP_SUFFIX)
+    with partial.open("wb") as handle:
+        for chunk in compress_stream(read_chunks(path), encoding, STORAGE_LEVELS[encoding]):
+            handle.write(chunk)
+    os.replace(partial, target)
+    return target
+
+
+def _remove(path: Path) -> int:
+    freed = 0
+    for candidate in [path] + [path.with_name(path.name + suffix) for suffix in SUFFIXES.values()]:
+        with contextlib.suppress(FileNotFoundError):
+            size = candidate.stat().st_size
+            candidate.unlink()
+            freed += size
+    return freed
+
+
+@contextlib.contextmanager
+def _upload_dir_lock(upload_dir: Path) -> Iterator[bool]:
+    # Non-blocking across worker processes: a sweep already running covers this one
+    if fcntl is None:
+        yield True
+        return
+    with (upload_dir / LOCK_FILE).open("a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _record(db: Session, file_id: int, values: dict, reclaimed: int = 0):
+    if reclaimed:
+        values["reclaimed_bytes"] = func.coalesce(FileUploadLog.reclaimed_bytes, 0) + reclaimed
+    db.query(FileUploadLog).filter_by(file_id=file_id).update(values, synchronize_session=False)
+    db.commit()
+
+
+def _still_owner(db: Session, file_id: int, local_path: str) -> bool:
+    # Re-read right before touching the file: a resume or reprocess may have started meanwhile
+    newest = db.execute(
+        select(func.max(FileUploadLog.file_id)).where(FileUploadLog.local_path == local_path)
+    ).scalar()
+    status = db.execute(select(FileUploadLog.status).where(FileUploadLog.file_id == file_id)).scalar()
+    return newest == file_id and status != "processing"
+
+
+def _eviction_rank(status: str) -> int:
+    return EVICTION_ORDER.index(status) if status in EVICTION_ORDER else len(EVICTION_ORDER) - 1
+
+
+class _Upload:
+    """One file in the upload dir and the log that owns it, if any."""
+
+    def __init__(self, path: Path, stored: Path, log=None, changed_at: datetime = None):
+        self.path = path
+        self.stored = stored
+        self.log = log
+        self.status = log.status if log else PREVIEW
+        self.changed_at = changed_at
+        self.size = stored.stat().st_size
+
+
+def _sweep(db: Session, upload_dir: Path) -> dict:
+    encoding = storage_encoding()
+    retention = retention_days()
+    now = datetime.utcnow()
+    stats = {"compressed": 0, "purged": 0, "reclaimed_bytes": 0, "disk_bytes": 0}
+
+    # Each stored file belongs to the newest log with its path; older ones were overwritten by it
+    logs = db.execute(
+        select(
+            FileUploadLog.file_id, FileUploadLog.local_path, FileUploadLog.status,
+            FileUploadLog.upload_time, FileUploadLog.updated_at, FileUploadLog.storage_state,
+        )
+        .where(FileUploadLog.local_path.is_not(None))
+        .where(or_(FileUploadLog.storage_state.is_(None), FileUploadLog.storage_state.notin_(INACTIVE_STATES)))
+        .order_by(FileUploadLog.file_id)
+    ).all()
+    owners = {}
+    for log in logs:
+        key = Path(log.local_path).resolve()
+        if key in owners:
+            _record(db, owners[key].file_id, {"storage_state": "superseded", "stored_bytes": 0})
+        owners[key] = log
+
+    uploads = []
+    for key, log in list(owners.items()):
+        path = Path(log.local_path)
+        stored = resolve_upload(path)
+        if stored is None:
+            _record(db, log.file_id, {"storage_state": "purged", "stored_bytes": 0})
+            continue
+        # Saved after the log last changed: a new upload of the same name, not yet processed
+        if log.updated_at and datetime.utcfromtimestamp(stored.stat().st_mtime) > log.updated_at:
+            _record(db, log.file_id, {"storage_state": "superseded", "stored_bytes": 0})
+            del owners[key]
+            continue
+        upload = _Upload(path, stored, log, log.updated_at or log.upload_time)
+        if log.storage_state is None:
+            _record(db, log.file_id, {"storage_state": stored_encoding(stored) or "raw", "stored_bytes": upload.size})
+        uploads.append(upload)
+
+    for entry in os.scandir(upload_dir):
+        path = Path(entry.path)
+        if not entry.is_file() or path.name == LOCK_FILE or path.name.endswith(TMP_SUFFIX):
+            continue
+        if logical_path(path).resolve() not in owners and path == resolve_upload(logical_path(path)):
+            changed_at = datetime.utcfromtimestamp(entry.stat().st_mtime)
+            uploads.append(_Upload(logical_path(path), path, changed_at=changed_at))
+
+    # Compress what has been ingested
+    for upload in uploads:
+        if (encoding is None or upload.log is None or upload.status == "processing"
+                or upload.stored != upload.path or upload.path.suffix.lower() not in COMPRESSIBLE_EXTENSIONS):
+            continue
+        before = upload.path.stat()
+        compressed = compress_upload(upload.path, encoding)
+        after = upload.path.stat()
+        # Overwritten by a new upload of the same name, or picked up again, while compressing
+        if (before.st_mtime_ns, before.st_size) != (after.st_mtime_ns, after.st_size) \
+                or not _still_owner(db, upload.log.file_id, upload.log.local_path):
+            compressed.unlink(missing_ok=True)
+            continue
+        upload.path.unlink()
+        upload.stored, freed, upload.size = compressed, upload.size - compressed.stat().st_size, compressed.stat().st_size
+        _record(db, upload.log.file_id, {"storage_state": encoding, "stored_bytes": upload.size}, reclaimed=freed)
+        stats["compressed"] += 1
+        stats["reclaimed_bytes"] += freed
+
+    def purge(upload: _Upload):
+        if upload.log is not None and not _still_owner(db, upload.log.file_id, upload.log.local_path):
+            return False
+        freed = _remove(upload.path)
+        if upload.log is not None:
+            _record(db, upload.log.file_id, {"storage_state": "purged", "stored_bytes": 0}, reclaimed=freed)
+        stats["purged"] += 1
+        stats["reclaimed_bytes"] += freed
+        return True
+
+    # Retention by age and status; uploads being ingested are never touched
+    kept = []
+    for upload in uploads:
+        days = retention.get(upload.status)
+        expired = days is not None and upload.changed_at is not None and now - upload.changed_at > timedelta(days=days)
+        if not (expired and upload.status != "processing" and purge(upload)):
+            kept.append(upload)
+
+    # Disk budget: least needed, then oldest, first
+    disk_bytes = sum(upload.size for upload in kept)
+    budget = Config.UPLOAD_DISK_BUDGET_MB << 20
+    if budget and disk_bytes > budget:
+        candidates = sorted(
+            (
+                upload for upload in kept
+                if upload.status != "processing"
+                and not (upload.status == PREVIEW and now - upload.changed_at < PREVIEW_GRACE)
+            ),
+            key=lambda upload: (_eviction_rank(upload.status), upload.changed_at or now),
+        )
+        for upload in candidates:
+            if disk_bytes <= budget:
+                break
+            size = upload.size
+            if purge(upload):
+                disk_bytes -= size
+    stats["disk_bytes"] = disk_bytes
+    return stats
+
+
+def sweep_uploads(upload_dir: Path) -> dict:
+    """
+    Description: One pass of the upload storage policy over the upload dir:
+    compress ingested CSV/TSV files (UPLOAD_COMPRESSION), remove files past
+    their status's UPLOAD_RETENTION_DAYS, then remove files until the dir fits
+    UPLOAD_DISK_BUDGET_MB. Sizes and reclaimed bytes are kept on the upload
+    logs. Meant for a background task; returns {} when another sweep is running.
+    """
+    if not _sweep_lock.acquire(blocking=False):
+        return {}
+    try:
+        with _upload_dir_lock(upload_dir) as acquired:
+            if not acquired:
+                return {}
+            db = SessionLocal()
+            try:
+                stats = _sweep(db, upload_dir)
+            finally:
+                db.close()
+    except Exception:
+        logger.exception("Upload storage sweep of %s failed", upload_dir)
+        return {}
+    finally:
+        _sweep_lock.release()
+
+    if stats["compressed"] or stats["purged"]:
+        logger.info(
+            "Upload storage: compressed %d, purged %d, reclaimed %d bytes, %d bytes on disk",
+            stats["compressed"], stats["purged"], stats["reclaimed_bytes"], stats["disk_bytes"]
+        )
+    return stats
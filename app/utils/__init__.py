@@ -1,14 +1,13 @@
 from .calculate_file_metrics import extract_all_csv_columns, audit_metrics
 from .filter_data import filter_valid_columns, sanitize_sample_data
-from .schema_functions import load_schema, get_expected_columns
+from .schema_registry import get_schema_registry
 from .llm2 import generate_table_mapping
 from .parse_date import parse_date
 
 __all__ = [
     "extract_all_csv_columns",
     "filter_valid_columns", 
-    "load_schema", 
-    "get_expected_columns", 
+    "get_schema_registry",
     "audit_metrics",
     "generate_table_mapping",
     "parse_date",
@@ -1,4 +1,4 @@
-from .schema_functions import get_expected_columns
+from .schema_registry import get_schema_registry
 from .filter_data import extract_mapped_columns
 
 def extract_all_csv_columns(mappings_dict):
@@ -11,9 +11,9 @@ def extract_all_csv_columns(mappings_dict):
                 csv_columns.append(value)
     return csv_columns
 
-def audit_metrics(schema: dict, headers: list[str], mapping: dict, rows: list[dict]):
-    # Expected columns from the schema
-    expected_columns = set(get_expected_columns(schema))
+def audit_metrics(headers: list[str], mapping: dict, empty_cells: int):
+    # Expected columns from the schema registry
+    expected_columns = get_schema_registry().expected_column_set
 
     # Mapped tables: Ignore "extras" and check if at least one non-null mapping
     mapped_tables = [
@@ -56,13 +56,6 @@ def audit_metrics(schema: dict, headers: list[str], mapping: dict, rows: list[di
         if extra_col not in expected_columns:
             extra_columns.add(extra_col)
 
-    # Empty cells count
-    empty_cells = sum(
-        1 for row in rows
-        for val in row.values()
-        if val is None or str(val).strip() == ""
-    )
-
     # Total columns = all non-null mapped CSV columns from all mappings
     total_columns = {
         col
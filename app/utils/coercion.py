@@ -0,0 +1,236 @@
+import copy
+from datetime import datetime
+from typing import TYPE_CHECKING, Tuple
+
+from .parse_date import DATE_FORMATS, parse_date
+from .schema_registry import get_schema_registry
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Leading number of a lab value: "6.9", "<0.5", ">= 120 mg/dL", "7,2"
+NUMERIC_PREFIX = r"^\s*[<>]?=?\s*([-+]?\d+(?:[.,]\d+)?)"
+
+# Frame column holding the numeric lab value, mapped onto lab_result.test_value_numeric
+NUMERIC_LAB_COLUMN = "__test_value_numeric__"
+
+MAX_INVALID_SAMPLES = 3
+
+
+def _header_targets(mapping: dict) -> dict:
+    """
+    Description: Source header -> (target column kind, first "table.column" it feeds).
+    Headers concatenated into one column, or feeding columns of different kinds,
+    are coerced as text.
+    """
+    column_kinds = get_schema_registry().column_kinds
+    kinds = {}
+    targets = {}
+    for table, columns in mapping.items():
+        for column, col_info in columns.items():
+            kind = column_kinds.get(table, {}).get(column)
+            if not kind or not col_info:
+                continue
+            headers = col_info if isinstance(col_info, list) else [col_info]
+            for header in headers:
+                kinds.setdefault(header, set()).add(kind if len(headers) == 1 else "text")
+                targets.setdefault(header, f"{table}.{column}")
+    return {
+        header: (next(iter(found)) if len(found) == 1 else "text", targets[header])
+        for header, found in kinds.items()
+    }
+
+
+def text_headers(mapping: dict) -> list:
+    """
+    Description: Source headers coerced as text, to be read as strings so codes
+    and phone numbers keep their leading zeros.
+    """
+    return [header for header, (kind, _) in _header_targets(mapping).items() if kind == "text"]
+
+
+def _present(series: "pd.Series") -> "pd.Series":
+    import pandas as pd
+
+    present = series.notna()
+    if pd.api.types.is_float_dtype(series):
+        present &= series.abs() != float("inf")
+    elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        present &= series.astype(str).str.strip() != ""
+    return present
+
+
+def _to_objects(series: "pd.Series") -> "pd.Series":
+    # None instead of NaN/NaT/NA, so rows carry plain Python values
+    return series.astype(object).where(series.notna(), None)
+
+
+def _normalize_text(value):
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value == datetime(value.year, value.month, value.day) else value.isoformat()
+    return str(value)
+
+
+def _coerce_text(series: "pd.Series") -> Tuple["pd.Series", "pd.Series"]:
+    import numpy as np
+    import pandas as pd
+
+    no_invalid = pd.Series(False, index=series.index)
+    if pd.api.types.is_float_dtype(series):
+        # Numbers read into a text column (phones, codes) drop their ".0"
+        values = series.to_numpy()
+        present = series.notna().to_numpy() & np.isfinite(values)
+        with np.errstate(invalid="ignore"):
+            integral = present & (np.mod(values, 1) == 0)
+        coerced = np.full(len(values), None, dtype=object)
+        coerced[integral] = values[integral].astype("int64").astype(str)
+        coerced[present & ~integral] = values[present & ~integral].astype(str)
+        return pd.Series(coerced, index=series.index), no_invalid
+    if pd.api.types.is_integer_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series.astype(str).astype(object), no_invalid
+
+    coerced = series.str.strip() if pd.api.types.is_string_dtype(series) else series.map(_normalize_text, na_action="ignore")
+    # Non-string cells in an object column (Excel numbers and dates) come back as NaN from .str
+    others = coerced.isna() & series.notna()
+    if others.any():
+        coerced = coerced.astype(object)
+        coerced[others] = series[others].map(_normalize_text)
+    return _to_objects(coerced.where(coerced != "")), no_invalid
+
+
+def coerce_text(series: "pd.Series") -> "pd.Series":
+    """
+    Description: Stripped text of each cell, None for blanks.
+    """
+    return _coerce_text(series)[0]
+
+
+def _parse_dates(values: list) -> dict:
+    """
+    Description: Distinct raw values -> date, trying DATE_FORMATS in order with
+    vectorized parsing. Whatever no format matched goes through parse_date.
+    """
+    import pandas as pd
+
+    parsed = {}
+    text = {}
+    for value in values:
+        if isinstance(value, datetime):
+            parsed[value] = value.date()
+        elif isinstance(value, str):
+            text[value] = value.strip()
+        else:
+            parsed[value] = parse_date(value)
+
+    remaining = pd.Series(list(text.values()), index=list(text.keys()), dtype=object)
+    for fmt in DATE_FORMATS:
+        if remaining.empty:
+            break
+        converted = pd.to_datetime(remaining, format=fmt, errors="coerce")
+        matched = converted.notna()
+        parsed.update(zip(remaining.index[matched], converted[matched].dt.date))
+        remaining = remaining[~matched]
+    parsed.update((value, parse_date(value)) for value in remaining.index)
+    return parsed
+
+
+def _coerce_date(series: "pd.Series") -> Tuple["pd.Series", "pd.Series"]:
+    present = _present(series)
+    # Dates repeat heavily, so each distinct value is parsed once
+    parsed = _parse_dates(series[present].unique())
+    coerced = _to_objects(series.where(present).map(parsed, na_action="ignore"))
+    return coerced, present & coerced.isna()
+
+
+def _coerce_number(series: "pd.Series", integer: bool) -> Tuple["pd.Series", "pd.Series"]:
+    import pandas as pd
+
+    present = _present(series)
+    numbers = pd.to_numeric(series.where(present), errors="coerce")
+    if integer:
+        numbers = numbers.where(numbers.mod(1) == 0)
+        numbers = numbers.astype("Int64")
+    return _to_objects(numbers), present & numbers.isna()
+
+
+def numeric_lab_values(series: "pd.Series") -> "pd.Series":
+    """
+    Description: Leading number of each lab value, None where there is none.
+    """
+    import pandas as pd
+
+    extracted = series.astype("string").str.extract(NUMERIC_PREFIX, expand=False)
+    return _to_objects(pd.to_numeric(extracted.str.replace(",", ".", regex=False), errors="coerce"))
+
+
+def coerce_frame(df: "pd.DataFrame", mapping: dict) -> Tuple["pd.DataFrame", dict, dict]:
+    """
+    Description: Coerce every mapped column to the type of the column it feeds,
+    one pass per column. Cells that don't fit become None and are counted per
+    column. Returns the coerced frame, the mapping to ingest with (the given
+    mapping plus derived columns) and the invalid value counts, see
+    merge_invalid_values and format_invalid_values.
+    """
+    invalid_values = {}
+    coerced_columns = {}
+
+    for header, (kind, target) in _header_targets(mapping).items():
+        if header not in df.columns:
+            continue
+        series = df[header]
+        if kind == "date":
+            coerced, invalid = _coerce_date(series)
+        elif kind in ("integer", "float"):
+            coerced, invalid = _coerce_number(series, integer=kind == "integer")
+        else:
+            coerced, invalid = _coerce_text(series)
+        coerced_columns[header] = coerced
+
+        invalid_count = int(invalid.sum())
+        if invalid_count:
+            samples = [str(value) for value in series[invalid].unique()[:MAX_INVALID_SAMPLES]]
+            invalid_values[(target, header, kind)] = (invalid_count, samples)
+
+    # Column by column: headers read from a file aren't always strings, so no assign(**...)
+    df = df.copy(deep=False)
+    for header, coerced in coerced_columns.items():
+        df[header] = coerced
+    ingest_mapping = copy.deepcopy(mapping)
+
+    test_value = mapping.get("lab_result", {}).get("test_value")
+    if isinstance(test_value, str) and test_value in df.columns:
+        df[NUMERIC_LAB_COLUMN] = numeric_lab_values(df[test_value])
+        ingest_mapping["lab_result"]["test_value_numeric"] = NUMERIC_LAB_COLUMN
+
+    return df, ingest_mapping, invalid_values
+
+
+def merge_invalid_values(total: dict, invalid_values: dict):
+    """
+    Description: Add the invalid value counts of one frame to a running total.
+    """
+    for key, (count, samples) in invalid_values.items():
+        total_count, total_samples = total.get(key, (0, []))
+        merged = total_samples + [value for value in samples if value not in total_samples]
+        total[key] = (total_count + count, merged[:MAX_INVALID_SAMPLES])
+
+
+def format_invalid_values(invalid_values: dict) -> list:
+    """
+    Description: One summary line per column, as stored on FileUploadLog.invalid_types.
+    """
+    return [
+        f"{target} <- {header}: {count} invalid {kind} (e.g. {', '.join(repr(value) for value in samples)})"
+        for (target, header, kind), (count, samples) in invalid_values.items()
+    ]
+
+
+def count_empty_cells(df: "pd.DataFrame") -> int:
+    """
+    Description: Cells that are missing or blank, counted column by column.
+    """
+    return int(sum((~_present(df[header])).sum() for header in df.columns))
@@ -0,0 +1,114 @@
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+# Read size when streaming a file from disk
+STREAM_CHUNK_BYTES = 1 << 20
+
+# Fast levels: these run per request, on the fly
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+
+# File name suffix of each coding, as pandas infers compression from it
+SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+
+
+def zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def supported_encodings() -> List[str]:
+    """
+    Description: Content codings this process can produce, preferred first.
+    zstd needs the optional zstandard package.
+    """
+    return ["zstd", "gzip"] if zstd_available() else ["gzip"]
+
+
+def _accepted(accept_encoding: Optional[str]) -> dict:
+    # {coding: q} from an Accept-Encoding header
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    accepted = _accepted(accept_encoding)
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Description: The preferred supported coding the client's Accept-Encoding
+    allows (q > 0), or None for identity.
+    """
+    for encoding in supported_encodings():
+        if accepts_encoding(accept_encoding, encoding):
+            return encoding
+    return None
+
+
+def stored_encoding(path: Path) -> Optional[str]:
+    """
+    Description: The coding a stored file was compressed with, from its suffix.
+    """
+    suffix = path.suffix.lower()
+    return next((encoding for encoding, known in SUFFIXES.items() if known == suffix), None)
+
+
+def read_chunks(path: Path, size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    with path.open("rb") as handle:
+        while chunk := handle.read(size):
+            yield chunk
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Description: Compress a byte stream incrementally as `encoding` (gzip or
+    zstd), holding one chunk in memory at a time.
+    """
+    if encoding == "zstd":
+        import zstandard
+
+        compressor = zstandard.ZstdCompressor(level=level or ZSTD_LEVEL).compressobj()
+    else:
+        # wbits 16 + MAX_WBITS writes the gzip header and trailer
+        compressor = zlib.compressobj(level or GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def decompress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Description: Inverse of compress_stream.
+    """
+    if encoding == "zstd":
+        import zstandard
+
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        decompressed = decompressor.decompress(chunk)
+        if decompressed:
+            yield decompressed
+    if encoding != "zstd":
+        yield decompressor.flush()
@@ -1,7 +1,8 @@
 import math
+from .schema_registry import get_schema_registry
 
 def filter_valid_columns(model, row_data):
-    model_columns = model.__table__.columns.keys()
+    model_columns = get_schema_registry().model_columns[model.__tablename__]
     return {key: val for key, val in row_data.items() if key in model_columns}
 
 def extract_mapped_columns(mapping: dict) -> set:
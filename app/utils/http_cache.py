@@ -0,0 +1,114 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple, Union
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import Config
+from app.models.core import FileUploadLog
+from app.utils.metrics import RESPONSE_CACHE
+from app.utils.serialization import JSONBytesResponse
+
+# Clients may keep the body but must revalidate, which costs one aggregate query and a 304
+CACHE_CONTROL = "private, no-cache"
+
+
+class ResponseCache:
+    """
+    In-process LRU of serialized response bodies (and any headers built with
+    them), one entry per resource, bounded by the total size of the cached bodies.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, etag: str) -> Optional[Tuple[bytes, dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def put(self, key: str, etag: str, body: bytes, headers: Optional[dict] = None):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            if len(body) > self.max_bytes:
+                return
+            self._entries[key] = (etag, body, headers or {})
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+response_cache = ResponseCache(Config.RESPONSE_CACHE_MB * 1024 * 1024)
+
+
+def data_version(db: Session) -> str:
+    """
+    Description: Version token for everything derived from ingested files.
+    Every upload, status change, checkpoint, delete and reprocess touches a
+    FileUploadLog row (deletes only mark it), so max id/max upload_time/max
+    updated_at moves with it. Each max is a single index probe; a count would
+    scan the whole log.
+    """
+    row = db.execute(select(
+        func.max(FileUploadLog.file_id),
+        func.max(FileUploadLog.upload_time),
+        func.max(FileUploadLog.updated_at),
+    )).one()
+    return "|".join(str(value) for value in row)
+
+
+def _etag(key: str, version: str) -> str:
+    return '"' + hashlib.sha1(f"{key}|{version}".encode()).hexdigest()[:20] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def cached_response(
+    request: Request, db: Session, build: Callable[[], Union[bytes, Tuple[bytes, dict]]]
+) -> Response:
+    """
+    Description: Serve a read endpoint through the data version: 304 when the
+    client's If-None-Match is current, the cached body when this process already
+    built it for the current version, otherwise build() the JSON bytes and cache them.
+    build() may also return (body, headers) for headers that belong with the body.
+    """
+    key = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+    etag = _etag(key, data_version(db))
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        RESPONSE_CACHE.inc(result="not_modified")
+        return Response(status_code=304, headers=headers)
+
+    cached = response_cache.get(key, etag)
+    if cached is None:
+        RESPONSE_CACHE.inc(result="miss")
+        built = build()
+        body, extra = built if isinstance(built, tuple) else (built, {})
+        response_cache.put(key, etag, body, extra)
+    else:
+        RESPONSE_CACHE.inc(result="hit")
+        body, extra = cached
+    return JSONBytesResponse(content=body, headers={**headers, **extra})
@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Per-request stats, set by the HTTP middleware and shared with threadpool workers
+_request_stats: ContextVar[Optional[dict]] = ContextVar("request_stats", default=None)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] += amount
+
+    def collect(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def collect(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def collect(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in self._series.items():
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram("dmt_http_request_duration_seconds", "HTTP request latency")
+REQUEST_DB_QUERIES = Histogram(
+    "dmt_http_request_db_queries", "Database queries per HTTP request",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 1000, 5000, 25000, 100000),
+)
+SPAN_LATENCY = Histogram("dmt_span_duration_seconds", "Duration of instrumented hot-path spans")
+DB_QUERIES = Counter("dmt_db_queries_total", "Database queries executed")
+ROWS_PROCESSED = Counter("dmt_rows_processed_total", "Input rows processed by ingestion")
+RESPONSE_CACHE = Counter("dmt_response_cache_total", "Cached read endpoint lookups by result")
+PIPELINE_STAGE_ROWS = Counter("dmt_ingest_stage_rows_total", "Rows passed through each ingestion pipeline stage")
+PIPELINE_QUEUE_DEPTH = Gauge("dmt_ingest_queue_depth", "Items waiting in each ingestion pipeline queue")
+
+REGISTRY = [
+    REQUEST_LATENCY, REQUEST_DB_QUERIES, SPAN_LATENCY, DB_QUERIES, ROWS_PROCESSED, RESPONSE_CACHE,
+    PIPELINE_STAGE_ROWS, PIPELINE_QUEUE_DEPTH,
+]
+
+
+def render_metrics() -> str:
+    """
+    Description: Render every registered metric in the Prometheus text format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+def start_request() -> dict:
+    stats = {"db_queries": 0, "rows": 0, "spans": defaultdict(float)}
+    _request_stats.set(stats)
+    return stats
+
+
+def current_request() -> Optional[dict]:
+    return _request_stats.get()
+
+
+def record_span(name: str, seconds: float):
+    SPAN_LATENCY.observe(seconds, span=name)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["spans"][name] += seconds
+
+
+@contextmanager
+def span(name: str):
+    """
+    Description: Time a block and record it under the given span name.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started)
+
+
+class PhaseTimer:
+    """
+    Accumulates time per phase inside a hot loop and records each phase once,
+    so per-row blocks don't pay for a histogram update on every row.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.totals = defaultdict(float)
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] += time.perf_counter() - started
+
+    def record(self):
+        for name, seconds in self.totals.items():
+            record_span(f"{self.prefix}.{name}", seconds)
+        self.totals.clear()
+
+
+def count_rows(amount: int):
+    ROWS_PROCESSED.inc(amount)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["rows"] += amount
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERIES.inc()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["db_queries"] += 1
@@ -0,0 +1,134 @@
+import atexit
+import csv
+import logging
+import mmap
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Tuple
+
+from app.config import Config
+from app.range_parser import parse_range
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bytes parsed per task; small enough to stream, large enough to amortize the IPC
+RANGE_BYTES = 32 << 20
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def parse_workers() -> int:
+    """
+    Description: Parse pool size. PARSE_WORKERS, or by default the cores shared
+    out between the server's WORKERS, each of which has its own pool.
+    """
+    return Config.PARSE_WORKERS or max((os.cpu_count() or 1) // max(Config.WORKERS, 1), 1)
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """
+    Description: Process pool shared by every parse, created on first use.
+    Spawned rather than forked, the server process runs threads; the workers
+    only import app.range_parser.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=parse_workers(), mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+@atexit.register
+def shutdown_parse_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def byte_ranges(path: Path, range_bytes: int = RANGE_BYTES) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Description: Header line and the (start, end) byte ranges of the body, each
+    ending on a line boundary.
+    """
+    with path.open("rb") as handle:
+        if not path.stat().st_size:
+            return b"", []
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            size = len(mapped)
+            header_end = mapped.find(b"\n") + 1 or size
+            header = mapped[:header_end]
+
+            ranges = []
+            start = header_end
+            while start < size:
+                end = min(start + range_bytes, size)
+                if end < size:
+                    newline = mapped.find(b"\n", end - 1)
+                    end = size if newline == -1 else newline + 1
+                ranges.append((start, end))
+                start = end
+    return header, ranges
+
+
+def _to_frame(parsed) -> "pd.DataFrame":
+    return parsed if hasattr(parsed, "iloc") else parsed.to_pandas()
+
+
+def iter_csv_chunks(path: Path, sep: str = ",", range_bytes: int = RANGE_BYTES,
+                    text_columns: Sequence[str] = ()) -> Iterator["pd.DataFrame"]:
+    """
+    Description: Parse a CSV/TSV in byte ranges on the process pool and yield one
+    DataFrame per range, in file order. At most two ranges per worker are in
+    flight, so a slow consumer holds back the parsing instead of buffering the file.
+    Ranges split on newlines; a range that cuts through a quoted field spanning
+    lines raises instead of parsing it wrong. text_columns are read as strings.
+    """
+    header, ranges = byte_ranges(path, range_bytes)
+    pool = get_parse_pool()
+    pending = deque()
+    queued = iter(ranges)
+    max_in_flight = 2 * parse_workers()
+
+    try:
+        for start, end in queued:
+            pending.append(pool.submit(parse_range, str(path), start, end, header, sep, list(text_columns)))
+            if len(pending) >= max_in_flight:
+                yield _to_frame(pending.popleft().result())
+        while pending:
+            yield _to_frame(pending.popleft().result())
+    except BrokenProcessPool:
+        # A dead worker leaves the pool unusable, the next parse starts a fresh one
+        shutdown_parse_pool()
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def read_csv_parallel(path: Path, sep: str = ",") -> "pd.DataFrame":
+    """
+    Description: Whole-file read through iter_csv_chunks. Falls back to a single
+    pd.read_csv when the ranges can't be parsed independently (multi-line quoted
+    fields, duplicate headers).
+    """
+    import pandas as pd
+
+    with path.open("r", newline="", encoding="utf-8", errors="replace") as handle:
+        headers = next(csv.reader(handle, delimiter=sep), [])
+    if len(set(headers)) == len(headers):
+        try:
+            chunks = list(iter_csv_chunks(path, sep))
+            if chunks:
+                return pd.concat(chunks, ignore_index=True)
+        except Exception as e:
+            logger.warning("Parallel parse of %s failed, reading it in one process: %s", path.name, e)
+    return pd.read_csv(path, sep=sep)
@@ -1,4 +1,11 @@
 from datetime import date, datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Tried in order; the first format that matches wins
+DATE_FORMATS = ["%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y", "%d/%m/%Y", "%d.%m.%Y"]
 
 
 def parse_date(val):
@@ -8,13 +15,11 @@ def parse_date(val):
     if not val:
         return None
 
-    formats = ["%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y", "%d/%m/%Y", "%d.%m.%Y"]
-
-    for fmt in formats:
+    for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(val.strip(), fmt).date()
         except (ValueError, TypeError):
             continue
 
-    print(f"[parse_date] Failed to parse date: {val}")
+    logger.debug("Failed to parse date: %s", val)
     return None
\ No newline at end of file
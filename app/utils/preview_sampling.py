@@ -0,0 +1,120 @@
+import io
+import math
+import mmap
+import random
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Rows returned as sample_data and sent to the LLM
+PREVIEW_SAMPLE_ROWS = 5
+
+# Rows drawn from across the file; column samples are taken from these
+RESERVOIR_ROWS = 200
+
+# Distinct non-null values reported per column
+COLUMN_SAMPLE_VALUES = 3
+
+SCAN_BLOCK_BYTES = 1 << 24
+
+_END = object()
+
+
+def count_lines(path: Path) -> int:
+    """
+    Description: Number of lines in a file, from a newline count over a memory map.
+    A last line without a trailing newline counts too.
+    """
+    with path.open("rb") as handle:
+        if not path.stat().st_size:
+            return 0
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            lines = sum(
+                mapped[start:start + SCAN_BLOCK_BYTES].count(b"\n")
+                for start in range(0, len(mapped), SCAN_BLOCK_BYTES)
+            )
+            if mapped[-1:] != b"\n":
+                lines += 1
+    return lines
+
+
+def _uniform(rng: random.Random) -> float:
+    # In (0, 1), log() of it is always defined
+    value = rng.random()
+    while value == 0.0:
+        value = rng.random()
+    return value
+
+
+def reservoir_sample(items: Iterable, size: int, rng: random.Random) -> List[tuple]:
+    """
+    Description: Uniform sample of `size` items in one pass (Algorithm L). Skip
+    lengths are drawn up front, so skipped items are consumed by islice without
+    per-item Python work. Returns (position, item) pairs in stream order.
+    """
+    iterator = iter(items)
+    reservoir = list(enumerate(islice(iterator, size)))
+    if len(reservoir) < size:
+        return reservoir
+
+    position = size - 1
+    weight = math.exp(math.log(_uniform(rng)) / size)
+    while True:
+        skip = math.floor(math.log(_uniform(rng)) / math.log(1 - weight))
+        item = next(islice(iterator, skip, None), _END)
+        if item is _END:
+            break
+        position += skip + 1
+        reservoir[rng.randrange(size)] = (position, item)
+        weight *= math.exp(math.log(_uniform(rng)) / size)
+    return sorted(reservoir, key=lambda pair: pair[0])
+
+
+def sample_delimited(path: Path, sep: str, rng: random.Random) -> Optional[dict]:
+    """
+    Description: Reservoir-sample the lines of a CSV/TSV and parse only the
+    sampled ones. Returns None when a sampled line has unbalanced quotes (a
+    quoted field spanning lines), the caller then parses the whole file.
+    """
+    import pandas as pd
+
+    with path.open("rb") as handle:
+        header_line = handle.readline()
+        sampled = [line for _, line in reservoir_sample(handle, RESERVOIR_ROWS, rng) if line.strip()]
+
+    if any(line.count(b'"') % 2 for line in [header_line] + sampled):
+        return None
+
+    text = b"".join(line if line.endswith(b"\n") else line + b"\n" for line in [header_line] + sampled)
+    frame = pd.read_csv(io.BytesIO(text), sep=sep)
+    return {"frame": frame, "total_rows": max(count_lines(path) - 1, 0)}
+
+
+def sample_frame(df: "pd.DataFrame", rng: random.Random) -> "pd.DataFrame":
+    """
+    Description: The same sample drawn from a fully parsed frame (Excel, fallback).
+    """
+    if len(df) <= RESERVOIR_ROWS:
+        return df
+    return df.sample(n=RESERVOIR_ROWS, random_state=rng.randrange(2 ** 32)).sort_index()
+
+
+def summarize_sample(frame: "pd.DataFrame", rng: random.Random) -> dict:
+    """
+    Description: Preview rows and per-column non-null values from a sampled frame.
+    Rows are picked at random from the sample and kept in file order.
+    """
+    positions = sorted(rng.sample(range(len(frame)), min(PREVIEW_SAMPLE_ROWS, len(frame))))
+    column_samples = {}
+    for header in frame.columns:
+        values = frame[header].dropna()
+        if values.dtype == object:
+            values = values[values.astype(str).str.strip() != ""]
+        column_samples[header] = values.drop_duplicates().head(COLUMN_SAMPLE_VALUES).tolist()
+    return {
+        "rows": frame.iloc[positions].to_dict(orient="records"),
+        "column_samples": column_samples,
+    }
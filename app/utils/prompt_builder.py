@@ -0,0 +1,141 @@
+import json
+import re
+from typing import List, Tuple
+
+from app.utils.schema_registry import get_schema_registry
+
+# Common header spellings the local mapper resolves without the LLM
+HEADER_ALIASES = {
+    "firstname": ("patient", "first_name"),
+    "fname": ("patient", "first_name"),
+    "lastname": ("patient", "last_name"),
+    "surname": ("patient", "last_name"),
+    "lname": ("patient", "last_name"),
+    "dob": ("patient", "date_of_birth"),
+    "birthdate": ("patient", "date_of_birth"),
+    "dateofbirth": ("patient", "date_of_birth"),
+    "sex": ("patient", "gender"),
+    "mobile": ("patient", "phone"),
+    "phonenumber": ("patient", "phone"),
+    "mail": ("patient", "email"),
+    "emailaddress": ("patient", "email"),
+    "hospital": ("hospital", "hospital_name"),
+    "smoking": ("lifestyle", "smoking_status"),
+    "alcohol": ("lifestyle", "alcohol_use"),
+    "exercise": ("lifestyle", "exercise_habit"),
+    "disease": ("medical_condition", "condition_name"),
+    "condition": ("medical_condition", "condition_name"),
+    "conditionname": ("medical_condition", "condition_name"),
+}
+
+# Keep every sample cell short, the model only needs a hint of the value shape
+MAX_SAMPLE_CELL_CHARS = 40
+MAX_SAMPLE_ROWS = 5
+
+
+def _normalize_header(header) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(header).lower())
+
+
+SCHEMA_COLUMNS = get_schema_registry().column_types
+
+# Local lookup: normalized schema column name -> (table, column)
+_LOCAL_LOOKUP = {
+    _normalize_header(column): (table, column)
+    for table, columns in SCHEMA_COLUMNS.items()
+    for column in columns
+    if column != "condition_id"
+} | HEADER_ALIASES
+
+
+def resolve_headers_locally(headers: List[str]) -> dict:
+    """
+    Description: Map headers that exactly match a schema column (or a known alias)
+    without calling the LLM. Each schema column is claimed by the first matching header.
+    """
+    resolved = {}
+    for header in headers:
+        target = _LOCAL_LOOKUP.get(_normalize_header(header))
+        if not target:
+            continue
+        table, column = target
+        table_mapping = resolved.setdefault(table, {})
+        if column not in table_mapping:
+            table_mapping[column] = header
+    return resolved
+
+
+def _schema_text(resolved: dict) -> str:
+    lines = []
+    for table, columns in SCHEMA_COLUMNS.items():
+        remaining = [
+            f"{column} {col_type}"
+            for column, col_type in columns.items()
+            if column not in resolved.get(table, {})
+        ]
+        if remaining:
+            lines.append(f"{table}({', '.join(remaining)})")
+    return "\n".join(lines)
+
+
+def _truncate_samples(sample_data: List[dict], headers: List[str]) -> List[dict]:
+    truncated = []
+    for row in sample_data[:MAX_SAMPLE_ROWS]:
+        truncated.append({
+            header: (
+                str(row[header])[:MAX_SAMPLE_CELL_CHARS]
+                if row.get(header) is not None else None
+            )
+            for header in headers
+            if header in row
+        })
+    return truncated
+
+
+def _truncate_column_samples(column_samples: dict, headers: List[str]) -> dict:
+    return {
+        header: [str(value)[:MAX_SAMPLE_CELL_CHARS] for value in column_samples.get(header, [])]
+        for header in headers
+    }
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Description: Cheap token estimate (~4 characters per token), avoids a count_tokens round trip.
+    """
+    return (len(text) + 3) // 4
+
+
+def build_mapping_prompt(headers: List[str], sample_data: List[dict], resolved: dict = None,
+                         column_samples: dict = None) -> Tuple[str, int]:
+    """
+    Description: Build the mapping prompt for the headers the local mapper could not resolve.
+    With column_samples, each header's non-null values sampled across the file are
+    sent instead of whole rows. Returns the prompt and its estimated token count.
+    """
+    resolved = resolved or {}
+    if column_samples:
+        samples = _truncate_column_samples(column_samples, headers)
+    else:
+        samples = _truncate_samples(sample_data, headers)
+    samples = json.dumps(samples, default=str, separators=(",", ":"))
+    prompt = f"""Map CSV headers to a normalized patient database. Return only JSON.
+Map only the given headers; infer meaning from sample values when headers are unclear.
+Headers not matching any column go in "extras". Don't map ids or timestamps.
+A value may be a list of headers to concatenate (e.g. address parts).
+diagnosis.condition_id and family_history.condition_id take the condition name header.
+Format: {{"mappings":{{"<table>":{{"<column>":"<header>"}},"extras":{{"<header>":null}}}}}}
+Columns:
+{_schema_text(resolved)}
+Headers: {json.dumps(headers)}
+Samples: {samples}"""
+    return prompt, estimate_tokens(prompt)
+
+
+def merge_local_mapping(mappings: dict, resolved: dict) -> dict:
+    """
+    Description: Overlay locally resolved columns onto the LLM mappings.
+    """
+    for table, columns in resolved.items():
+        mappings.setdefault(table, {}).update(columns)
+    return mappings
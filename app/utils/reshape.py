@@ -0,0 +1,115 @@
+from typing import TYPE_CHECKING, List, Tuple
+
+from .coercion import coerce_text, numeric_lab_values
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Row key carrying a patient's lab results once long rows are grouped
+LAB_RESULTS_KEY = "__lab_results__"
+
+# lab_result mapping key listing wide test headers explicitly, e.g. ["HbA1c", "LDL"]
+TEST_COLUMNS_KEY = "test_columns"
+
+LAB_FIELDS = ["test_name", "test_value", "test_value_numeric", "unit", "test_date"]
+
+
+def _headers(col_info) -> list:
+    if not col_info:
+        return []
+    return col_info if isinstance(col_info, list) else [col_info]
+
+
+def wide_lab_columns(df: "pd.DataFrame", mapping: dict) -> List[str]:
+    """
+    Description: Headers holding one lab test each (wide format), as listed
+    under lab_result.test_columns. Only explicitly listed headers are melted:
+    guessing from numeric-looking cells turned identifiers (MRN, zip codes)
+    into lab results. Empty when the file is long format (one test per row).
+    """
+    lab_mapping = mapping.get("lab_result") or {}
+    return [header for header in _headers(lab_mapping.get(TEST_COLUMNS_KEY)) if header in df.columns]
+
+
+def _melt_wide(df: "pd.DataFrame", test_columns: list, lab_mapping: dict) -> "pd.DataFrame":
+    import pandas as pd
+
+    # Coerce per column first: float columns take the vectorized path and are their own numeric value
+    text = pd.DataFrame({header: coerce_text(df[header]) for header in test_columns}, index=df.index)
+    numeric = pd.DataFrame({
+        header: df[header] if pd.api.types.is_numeric_dtype(df[header]) else numeric_lab_values(text[header])
+        for header in test_columns
+    }, index=df.index)
+
+    labs = text.melt(ignore_index=False, var_name="test_name", value_name="test_value")
+    labs["test_value_numeric"] = numeric.melt(ignore_index=False)["value"].to_numpy()
+    for field in ("unit", "test_date"):
+        header = lab_mapping.get(field)
+        labs[field] = df[header].reindex(labs.index).to_numpy() if isinstance(header, str) and header in df.columns else None
+    return labs[labs["test_value"].notna()]
+
+
+def _long_labs(df: "pd.DataFrame", lab_mapping: dict) -> "pd.DataFrame":
+    import pandas as pd
+
+    labs = pd.DataFrame(index=df.index)
+    for field in LAB_FIELDS:
+        header = lab_mapping.get(field)
+        if isinstance(header, list):
+            joined = df[[h for h in header if h in df.columns]].astype("string").fillna("")
+            labs[field] = joined.agg(" ".join, axis=1).str.strip().replace("", None)
+        elif header in df.columns:
+            labs[field] = df[header]
+        else:
+            labs[field] = None
+    return labs[labs.notna().any(axis=1)]
+
+
+def group_lab_rows(df: "pd.DataFrame", mapping: dict) -> Tuple["pd.DataFrame", list, dict]:
+    """
+    Description: Reshape lab results and group rows so each patient is inserted once.
+    Wide test columns are melted into one lab result per filled cell; long files
+    keep one per row. Rows whose non-lab mapped cells are identical collapse into
+    their first row. Returns the collapsed frame, the lab results of each of its
+    rows and the mapping without the lab columns.
+    Expects a frame already passed through coerce_frame.
+    """
+    import numpy as np
+    import pandas as pd
+
+    lab_mapping = dict(mapping.get("lab_result") or {})
+    test_columns = wide_lab_columns(df, mapping)
+    if test_columns:
+        labs = _melt_wide(df, test_columns, lab_mapping)
+    else:
+        labs = _long_labs(df, lab_mapping)
+
+    lab_headers = set(test_columns) | {
+        header for column, col_info in lab_mapping.items() for header in _headers(col_info)
+    }
+    key_headers = list(dict.fromkeys(
+        header
+        for table, columns in mapping.items()
+        if table not in ("extras", "lab_result")
+        for col_info in columns.values()
+        for header in _headers(col_info)
+        if header in df.columns and header not in lab_headers
+    ))
+
+    if key_headers:
+        group_ids = df.groupby(key_headers, dropna=False, sort=False).ngroup().to_numpy()
+    else:
+        group_ids = np.arange(len(df))
+    # Groups are numbered by first appearance, so first rows come out in group order
+    first_rows = ~pd.Series(group_ids).duplicated().to_numpy()
+    grouped = df[first_rows]
+
+    # Plain column lists zipped into dicts, DataFrame.to_dict boxes every cell and is several times slower
+    lab_results = [[] for _ in range(len(grouped))]
+    columns = [labs[field].astype(object).where(labs[field].notna(), None).tolist() for field in LAB_FIELDS]
+    groups = group_ids[df.index.get_indexer(labs.index)].tolist()
+    for group, *values in zip(groups, *columns):
+        lab_results[group].append(dict(zip(LAB_FIELDS, values)))
+
+    ingest_mapping = {table: columns for table, columns in mapping.items() if table != "lab_result"}
+    return grouped, lab_results, ingest_mapping
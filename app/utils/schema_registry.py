@@ -0,0 +1,114 @@
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+
+from sqlalchemy import Date, DateTime, Float, Integer, MetaData, Numeric
+
+from app.models.core import Base
+
+logger = logging.getLogger(__name__)
+
+# Overrides trim the expected (audited) columns, the mapper still sees every column.
+# Resolved next to the package, not the working directory
+OVERRIDES_PATH = Path(__file__).resolve().parent.parent / "schemas" / "schema_overrides.json"
+
+# Tables the LLM is allowed to map into, in prompt order
+MAPPABLE_TABLES = (
+    "patient", "hospital", "lifestyle", "lab_result",
+    "treatment", "diagnosis", "family_history", "medical_condition",
+)
+
+# Columns that are never mapped from an input file; test_value_numeric is derived from test_value
+SKIPPED_COLUMNS = frozenset({"file_id", "test_value_numeric"})
+
+
+class SchemaRegistry:
+    """
+    Mappable schema derived once from the ORM metadata. Every structure is
+    read-only so the registry can be shared by previews, audits and ingestion.
+
+    column_types: table -> {column: SQL type} offered to the mapper
+    table_columns: table -> expected columns after overrides
+    expected_columns: every expected column, in table order
+    date_columns: table -> columns parsed as dates
+    column_kinds: table -> {column: date | integer | float | text} used for value coercion
+    model_columns: table -> every column of the table (mappable or not)
+    insert_order: mappable tables ordered so FK targets come first
+    """
+
+    def __init__(self, metadata: MetaData, overrides: dict = None):
+        overrides = overrides or {}
+        excluded = {table: set(columns) for table, columns in overrides.get("exclude", {}).items()}
+        for table, columns in excluded.items():
+            known = metadata.tables.get(table)
+            unknown = columns - set(known.columns.keys()) if known is not None else columns
+            if unknown:
+                logger.warning("Schema overrides reference unknown columns %s.%s", table, sorted(unknown))
+
+        column_types = {}
+        column_kinds = {}
+        table_columns = {}
+        date_columns = {}
+        for table_name in MAPPABLE_TABLES:
+            table = metadata.tables[table_name]
+            columns = {}
+            for column in table.columns:
+                if column.primary_key or column.name in SKIPPED_COLUMNS:
+                    continue
+                if column.foreign_keys and column.name != "condition_id":
+                    continue
+                # condition_id is filled from a condition name, so present it as text
+                columns[column.name] = "TEXT" if column.name == "condition_id" else str(column.type)
+            column_types[table_name] = MappingProxyType(columns)
+            column_kinds[table_name] = MappingProxyType({
+                name: "text" if name == "condition_id" else _column_kind(table.columns[name].type)
+                for name in columns
+            })
+            table_columns[table_name] = tuple(
+                column for column in columns if column not in excluded.get(table_name, ())
+            )
+            date_columns[table_name] = frozenset(
+                column.name for column in table.columns if isinstance(column.type, (Date, DateTime))
+            )
+
+        self.column_types = MappingProxyType(column_types)
+        self.column_kinds = MappingProxyType(column_kinds)
+        self.table_columns = MappingProxyType(table_columns)
+        self.expected_columns = tuple(dict.fromkeys(
+            column for columns in table_columns.values() for column in columns
+        ))
+        self.expected_column_set = frozenset(self.expected_columns)
+        self.date_columns = MappingProxyType(date_columns)
+        self.model_columns = MappingProxyType({
+            name: frozenset(table.columns.keys()) for name, table in metadata.tables.items()
+        })
+        self.insert_order = tuple(
+            table.name for table in metadata.sorted_tables if table.name in MAPPABLE_TABLES
+        )
+
+
+def _column_kind(column_type) -> str:
+    if isinstance(column_type, (Date, DateTime)):
+        return "date"
+    if isinstance(column_type, Integer):
+        return "integer"
+    if isinstance(column_type, (Float, Numeric)):
+        return "float"
+    return "text"
+
+
+def _load_overrides(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def get_schema_registry() -> SchemaRegistry:
+    """
+    Description: The process-wide schema registry, built on first use.
+    """
+    return SchemaRegistry(Base.metadata, _load_overrides(OVERRIDES_PATH))
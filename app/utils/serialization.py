@@ -0,0 +1,43 @@
+import orjson
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+class JSONBytesResponse(Response):
+    """
+    Response for bodies already serialized to JSON bytes by pydantic-core.
+    Any other content (a handler's plain dict) is serialized with orjson.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
+
+
+def dump_json(adapter: TypeAdapter, value) -> bytes:
+    """
+    Description: Validate ORM objects / dicts through a read model and serialize in one pass.
+    """
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def dump_rows(adapter: TypeAdapter, rows: list) -> bytes:
+    """
+    Description: Serialize rows already projected to the adapter's TypedDict shape.
+    Skips validation, which dominates the cost for large lists.
+    """
+    return adapter.dump_json(rows)
+
+
+def dump_sections(adapters: dict, sections: dict) -> bytes:
+    """
+    Description: Serialize a {section: rows} object of projected rows, each section through its own list adapter.
+    Only the sections present are emitted, in their given order.
+    """
+    parts = [
+        b'"' + name.encode() + b'":' + dump_rows(adapters[name], rows)
+        for name, rows in sections.items()
+    ]
+    return b"{" + b",".join(parts) + b"}"
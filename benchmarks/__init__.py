@@ -0,0 +1,5 @@
+"""
+Ingestion benchmarks.
+
+Run with ``python -m benchmarks.ingest --help`` from the repository root.
+"""
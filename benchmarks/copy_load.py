@@ -0,0 +1,112 @@
+"""
+Child table load benchmark: the executemany INSERT path vs COPY FROM STDIN for
+lab_result rows, each load committed and the table emptied after it. COPY needs
+Postgres through psycopg or psycopg2; other databases report the executemany
+path only.
+
+Example:
+    python -m benchmarks.copy_load --database-url postgresql://localhost/dmt_bench --rows 500000
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+
+def seed_patients(db, patients: int):
+    from app.models.core import Base, FileUploadLog, Patient
+
+    Base.metadata.create_all(db.get_bind())
+    if not db.get(FileUploadLog, 1):
+        db.add(FileUploadLog(file_id=1, filename="benchmark.csv", file_type="csv", status="processed"))
+        db.flush()
+    existing = db.query(Patient).filter_by(file_id=1).count()
+    if existing < patients:
+        db.execute(Patient.__table__.insert(), [
+            {"first_name": f"First{i}", "last_name": f"Last{i}", "file_id": 1}
+            for i in range(existing, patients)
+        ])
+    db.commit()
+    return [patient_id for (patient_id,) in db.query(Patient.patient_id).filter_by(file_id=1).limit(patients)]
+
+
+def lab_rows(patient_ids: list, rows: int, seed: int) -> list:
+    rng = random.Random(seed)
+    tests = [("HbA1c", "%"), ("LDL", "mg/dL"), ("Glucose", "mg/dL"), ("CRP", "mg/L"), ("TSH", "mIU/L")]
+    start = date(2015, 1, 1)
+    result = []
+    for _ in range(rows):
+        name, unit = rng.choice(tests)
+        value = round(rng.uniform(0.5, 200), 1)
+        result.append({
+            "patient_id": rng.choice(patient_ids), "file_id": 1, "test_name": name,
+            "test_value": f"<{value}" if rng.random() < 0.05 else str(value),
+            "test_value_numeric": value, "unit": unit,
+            "test_date": start + timedelta(days=rng.randrange(3650)),
+        })
+    return result
+
+
+def _clear(db, table):
+    # TRUNCATE drops the pages too, so every load starts from an empty table
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"TRUNCATE {table.name}"))
+    else:
+        db.execute(table.delete())
+    db.commit()
+
+
+def _best_of(load, db, table, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        _clear(db, table)
+        started = time.perf_counter()
+        load(db)
+        db.commit()
+        timings.append(time.perf_counter() - started)
+    _clear(db, table)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare executemany and COPY child table loads.")
+    parser.add_argument("--rows", type=int, default=200000, help="lab_result rows per load")
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="Defaults to an in-memory SQLite database")
+    args = parser.parse_args(argv)
+
+    os.environ["DATABASE_URL"] = args.database_url or os.environ.get("DATABASE_URL") or "sqlite://"
+    from app.config import Config
+    from app.dao.copy_loader import copy_rows, copy_supported
+    from app.database.connection import SessionLocal
+    from app.models.core import LabResult
+
+    Config.INGEST_COPY = True
+    db = SessionLocal()
+    rows = lab_rows(seed_patients(db, args.patients), args.rows, args.seed)
+    table = LabResult.__table__
+
+    loads = {"executemany": lambda session: session.execute(table.insert(), rows)}
+    if copy_supported(db):
+        loads["copy"] = lambda session: copy_rows(session, table, rows)
+
+    results = {"database": db.get_bind().dialect.name, "rows": args.rows}
+    for name, load in loads.items():
+        seconds = _best_of(load, db, table, args.repeat)
+        results[name] = {"seconds": round(seconds, 4), "rows_per_s": round(args.rows / seconds)}
+    if "copy" in results:
+        results["speedup"] = round(results["executemany"]["seconds"] / results["copy"]["seconds"], 1)
+    else:
+        results["copy"] = "unsupported: needs Postgres through psycopg or psycopg2"
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
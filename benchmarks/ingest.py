@@ -0,0 +1,177 @@
+"""
+End-to-end ingestion benchmark: synthetic file -> preview -> process -> dashboard reads.
+
+Example:
+    python -m benchmarks.ingest --rows 20000 --format csv --out bench.json
+    python -m benchmarks.ingest --rows 20000 --baseline bench.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import build_mapping, write_file
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class StageRecorder:
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name: str, func, *args, **kwargs):
+        from app.utils.metrics import start_request
+
+        stats = start_request()
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        self.stages[name] = {
+            "seconds": round(elapsed, 4),
+            "db_queries": stats["db_queries"],
+            "rows": stats["rows"],
+            "spans": {span: round(seconds, 4) for span, seconds in stats["spans"].items()},
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+        return result
+
+
+def run_benchmark(args) -> dict:
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="dmt-bench-"))
+    database_url = args.database_url or f"sqlite:///{work_dir / 'bench.db'}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+    from starlette.datastructures import UploadFile
+    from app.database.connection import SessionLocal, engine
+    from app.dao import fetch_full_database_data
+    from app.models.core import Base
+    from app.routes import dashboard_routes
+
+    file_service_module = importlib.import_module("app.services.file_service")
+    FileService = file_service_module.FileService
+    FileService.UPLOAD_DIR = work_dir / "uploads"
+    FileService.ensure_upload_dir()
+
+    mapping = build_mapping(args.extra_columns, args.lab_columns)
+
+    async def stub_mapping(headers, sample_data, column_samples=None):
+        return {"mappings": json.loads(json.dumps(mapping)), "prompt_tokens": 0}
+
+    file_service_module.generate_table_mapping = stub_mapping
+
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    recorder = StageRecorder()
+    source = recorder.run(
+        "generate", write_file, work_dir / "synthetic", args.rows, args.format,
+        extra_columns=args.extra_columns, conditions=args.conditions,
+        conditions_per_row=args.conditions_per_row, seed=args.seed,
+        lab_columns=args.lab_columns,
+    )
+
+    db = SessionLocal()
+    try:
+        def preview():
+            with source.open("rb") as handle:
+                upload = UploadFile(file=handle, filename=source.name)
+                return asyncio.run(FileService.handle_file_mapping_preview(upload, db))
+
+        preview_result = recorder.run("preview", preview)
+        process_result = recorder.run(
+            "process", FileService.handle_file_processing, source.name, preview_result["mapping"], db
+        )
+        # Builders behind the cached dashboard routes, so every run measures a cold build
+        recorder.run("dashboard.summary", dashboard_routes._summary_cards, db)
+        recorder.run("dashboard.validation_summary", dashboard_routes._validation_summary, db)
+        recorder.run("dashboard.upload_trends", dashboard_routes._upload_trends, db)
+        recorder.run("data.all", fetch_full_database_data, db)
+    finally:
+        db.close()
+
+    return {
+        "params": {
+            "rows": args.rows,
+            "format": args.format,
+            "extra_columns": args.extra_columns,
+            "conditions": args.conditions,
+            "conditions_per_row": args.conditions_per_row,
+            "lab_columns": args.lab_columns,
+            "seed": args.seed,
+            "database": engine.dialect.name,
+            "file_size_kb": round(source.stat().st_size / 1024, 1),
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "rows_inserted": process_result["rows"],
+        "stages": recorder.stages,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def compare_reports(current: dict, baseline: dict) -> list:
+    """
+    Description: Per-stage time/query deltas of the current report against a baseline.
+    """
+    lines = [f"{'stage':<30}{'baseline s':>12}{'current s':>12}{'delta':>10}{'queries':>18}"]
+    for stage, result in current["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            lines.append(f"{stage:<30}{'-':>12}{result['seconds']:>12.4f}{'new':>10}{result['db_queries']:>18}")
+            continue
+        delta = (
+            (result["seconds"] - previous["seconds"]) / previous["seconds"] * 100
+            if previous["seconds"] else 0.0
+        )
+        queries = f"{previous['db_queries']} -> {result['db_queries']}"
+        lines.append(
+            f"{stage:<30}{previous['seconds']:>12.4f}{result['seconds']:>12.4f}{delta:>9.1f}%{queries:>18}"
+        )
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the preview -> process ingestion pipeline.")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--format", choices=["csv", "tsv", "xlsx"], default="csv")
+    parser.add_argument("--extra-columns", type=int, default=0, help="Unmapped filler columns (file width)")
+    parser.add_argument("--conditions", type=int, default=50, help="Distinct condition names")
+    parser.add_argument("--conditions-per-row", type=int, default=2)
+    parser.add_argument("--lab-columns", type=int, default=0, help="Wide lab test columns (0 = one test per row)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="Defaults to a SQLite file in the work dir")
+    parser.add_argument("--work-dir", help="Where the synthetic file and SQLite database are written")
+    parser.add_argument("--reset", action="store_true", help="Drop all tables before running")
+    parser.add_argument("--out", help="Write the JSON report to this path")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    output = json.dumps(report, indent=2, default=str)
+    if args.out:
+        Path(args.out).write_text(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        print("\n".join(compare_reports(report, baseline)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+CSV parse throughput: single-process pd.read_csv vs the memory-mapped byte
+range reader on a process pool, in MB/s per worker count.
+
+Example:
+    python -m benchmarks.parse --rows 1000000 --workers 1,2,4,8
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+def _best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare CSV parse throughput by worker count.")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--workers", default="1,2,4", help="Comma separated pool sizes")
+    parser.add_argument("--range-mb", type=int, default=32, help="Bytes per parse task")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--work-dir", help="Where the synthetic file is written")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    import pandas as pd
+    from app.config import Config
+    from app.utils import parallel_csv
+    from benchmarks.synthetic import write_file
+
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="dmt-parse-"))
+    source = write_file(work_dir / "synthetic", args.rows, "csv")
+    size_mb = source.stat().st_size / (1 << 20)
+    range_bytes = args.range_mb << 20
+
+    baseline = _best_of(lambda: pd.read_csv(source), args.repeat)
+    results = {"pandas.read_csv": {"seconds": round(baseline, 4), "mb_per_s": round(size_mb / baseline, 1)}}
+
+    for workers in (int(value) for value in args.workers.split(",")):
+        parallel_csv.shutdown_parse_pool()
+        Config.PARSE_WORKERS = workers
+
+        def consume():
+            rows = sum(len(chunk) for chunk in parallel_csv.iter_csv_chunks(source, ",", range_bytes))
+            assert rows == args.rows, f"parsed {rows} rows, expected {args.rows}"
+
+        consume()  # spawn the pool outside the timing
+        seconds = _best_of(consume, args.repeat)
+        results[f"workers={workers}"] = {
+            "seconds": round(seconds, 4),
+            "mb_per_s": round(size_mb / seconds, 1),
+            "speedup": round(baseline / seconds, 2),
+        }
+    parallel_csv.shutdown_parse_pool()
+
+    print(json.dumps({
+        "rows": args.rows,
+        "file_mb": round(size_mb, 1),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
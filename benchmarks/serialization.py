@@ -0,0 +1,104 @@
+"""
+Response serialization benchmark for the /file/data/all patient section: the
+legacy ORM + dict + jsonable_encoder path vs the SQL projection serialized by
+the TypedDict adapters the routes use.
+
+Example:
+    python -m benchmarks.serialization --rows 100000
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date, timedelta
+
+
+def _legacy_patients(db) -> bytes:
+    # Mirrors the pre-TypeAdapter /file/data/all patient path
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy.orm import joinedload
+    from app.models.core import Patient
+
+    ordered_fields = [
+        "patient_id", "first_name", "last_name", "phone", "email",
+        "gender", "address", "country", "date_of_birth", "hospital_name", "file_id"
+    ]
+    rows = []
+    for p in db.query(Patient).options(joinedload(Patient.hospital)).all():
+        p_data = p.__dict__.copy()
+        p_data.pop("_sa_instance_state", None)
+        p_data.pop("hospital", None)
+        p_data["hospital_name"] = p.hospital.hospital_name if p.hospital else None
+        p_data.pop("hospital_id", None)
+        rows.append({field: p_data.pop(field) for field in ordered_fields if field in p_data} | p_data)
+    db.expunge_all()
+    return json.dumps(jsonable_encoder(rows)).encode()
+
+
+def _typed_patients(db) -> bytes:
+    from app.dao.all_data import fetch_full_database_data
+    from app.schemas.responses import FULL_DATA_ADAPTERS
+    from app.utils.serialization import dump_sections
+
+    data = fetch_full_database_data(db)
+    return dump_sections(FULL_DATA_ADAPTERS, {"patient": data["patient"]})
+
+
+def seed(db, rows: int):
+    from app.models.core import Base, FileUploadLog, Hospital, Patient
+
+    Base.metadata.create_all(db.get_bind())
+    db.add(FileUploadLog(file_id=1, filename="benchmark.csv", file_type="csv", status="processed"))
+    db.execute(Hospital.__table__.insert(), [
+        {"hospital_id": i + 1, "hospital_name": f"Hospital {i}", "hospital_address": f"{i} Main St", "file_id": 1}
+        for i in range(20)
+    ])
+    start = date(1950, 1, 1)
+    db.execute(Patient.__table__.insert(), [
+        {
+            "patient_id": i + 1, "first_name": f"First{i}", "last_name": f"Last{i}",
+            "date_of_birth": start + timedelta(days=i % 20000), "gender": "Female" if i % 2 else "Male",
+            "phone": f"555{i:07d}", "email": f"user{i}@example.com", "address": f"{i} Street",
+            "country": "USA", "hospital_id": i % 20 + 1, "file_id": 1,
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def _best_of(func, db, repeat: int) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func(db)
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare response serialization paths.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    from app.database.connection import SessionLocal
+
+    db = SessionLocal()
+    seed(db, args.rows)
+
+    legacy_seconds, legacy_body = _best_of(_legacy_patients, db, args.repeat)
+    typed_seconds, typed_body = _best_of(_typed_patients, db, args.repeat)
+    assert json.loads(legacy_body) == json.loads(typed_body)["patient"], "serialized payloads differ"
+
+    print(json.dumps({
+        "rows": args.rows,
+        "legacy_seconds": round(legacy_seconds, 4),
+        "typed_seconds": round(typed_seconds, 4),
+        "speedup": round(legacy_seconds / typed_seconds, 1),
+        "bytes": len(typed_body),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Cold-start benchmark: `python -X importtime` of the app plus the lifespan
+startup, in fresh interpreters. Reports the import and ready times, import
+time per top-level package, and any heavy module that leaked onto the startup path.
+
+Example:
+    python -m benchmarks.startup --runs 5 --out startup.json
+    python -m benchmarks.startup --baseline startup.json --budget-ms 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+# Modules that must only load on the code paths that need them
+HEAVY_MODULES = ["pandas", "numpy", "openpyxl", "google.generativeai", "requests"]
+
+PROBE = f"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        pass
+
+asyncio.run(startup())
+ready = time.perf_counter()
+print(json.dumps({{
+    "import_seconds": imported - started,
+    "ready_seconds": ready - started,
+    "heavy_loaded": [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def _parse_importtime(stderr: str) -> dict:
+    # "import time: self [us] | cumulative | imported package", nesting shown by indentation
+    packages = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us)
+    return packages
+
+
+def run_once(env: dict) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["packages"] = _parse_importtime(completed.stderr)
+    return result
+
+
+def run_benchmark(args) -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env["UPLOAD_DIR"] = tempfile.mkdtemp(prefix="dmt-startup-")
+    env["PRELOAD_HEAVY_MODULES"] = "false"
+    env["LOG_LEVEL"] = "WARNING"
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    package_ms = defaultdict(list)
+    for run in runs:
+        for package, micros in run["packages"].items():
+            package_ms[package].append(micros / 1000)
+
+    top_packages = sorted(
+        ((package, statistics.median(values)) for package, values in package_ms.items()),
+        key=lambda item: item[1], reverse=True,
+    )[:args.top]
+    return {
+        "runs": args.runs,
+        "python": sys.version.split()[0],
+        "import_ms": round(statistics.median(run["import_seconds"] for run in runs) * 1000, 1),
+        "ready_ms": round(statistics.median(run["ready_seconds"] for run in runs) * 1000, 1),
+        "heavy_loaded": sorted({name for run in runs for name in run["heavy_loaded"]}),
+        "packages_ms": {package: round(ms, 1) for package, ms in top_packages},
+    }
+
+
+def compare_reports(current: dict, baseline: dict) -> list:
+    """
+    Description: Import/ready deltas of the current report against a baseline.
+    """
+    lines = [f"{'metric':<12}{'baseline ms':>14}{'current ms':>14}{'delta':>10}"]
+    for metric in ("import_ms", "ready_ms"):
+        previous = baseline.get(metric)
+        if not previous:
+            continue
+        delta = (current[metric] - previous) / previous * 100
+        lines.append(f"{metric:<12}{previous:>14.1f}{current[metric]:>14.1f}{delta:>9.1f}%")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app cold start (imports + lifespan startup).")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Top-level packages to report")
+    parser.add_argument("--budget-ms", type=float, help="Exit non-zero when ready_ms exceeds this budget")
+    parser.add_argument("--out", help="Write the JSON report to this path")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        print("\n".join(compare_reports(report, baseline)))
+
+    failures = []
+    if report["heavy_loaded"]:
+        failures.append(f"heavy modules loaded at startup: {', '.join(report['heavy_loaded'])}")
+    if args.budget_ms and report["ready_ms"] > args.budget_ms:
+        failures.append(f"ready in {report['ready_ms']} ms, budget {args.budget_ms} ms")
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import csv
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "Ahmed", "Priya", "Wei", "Sofia"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Khan", "Patel", "Chen", "Rossi", "Müller", "Silva"]
+COUNTRIES = ["USA", "Canada", "India", "UK", "Germany", "Brazil"]
+HOSPITALS = [("City General", "1 Main St"), ("St. Mary", "22 Oak Ave"), ("Northside Clinic", "9 Elm Rd"), ("Lakeview", "400 Shore Dr")]
+LAB_TESTS = [("HbA1c", "%"), ("LDL", "mg/dL"), ("Glucose", "mg/dL"), ("Creatinine", "mg/dL"), ("Hemoglobin", "g/dL")]
+TREATMENTS = ["Medication", "Surgery", "Physiotherapy", "Chemotherapy", "Observation"]
+OUTCOMES = ["Recovered", "Ongoing", "Improved", "No change"]
+SMOKING = ["Never", "Former", "Current"]
+ALCOHOL = ["None", "Occasional", "Regular"]
+EXERCISE = ["Sedentary", "Light", "Moderate", "Active"]
+DIETS = ["Vegetarian", "Mixed", "Vegan", "Keto"]
+RELATIVES = ["Mother", "Father", "Sibling", "Grandparent"]
+
+# Header -> (table, column) for every generated mapped column
+COLUMNS = [
+    ("first_name", "patient", "first_name"),
+    ("last_name", "patient", "last_name"),
+    ("date_of_birth", "patient", "date_of_birth"),
+    ("gender", "patient", "gender"),
+    ("phone", "patient", "phone"),
+    ("email", "patient", "email"),
+    ("address", "patient", "address"),
+    ("country", "patient", "country"),
+    ("hospital_name", "hospital", "hospital_name"),
+    ("hospital_address", "hospital", "hospital_address"),
+    ("smoking_status", "lifestyle", "smoking_status"),
+    ("alcohol_use", "lifestyle", "alcohol_use"),
+    ("exercise_habit", "lifestyle", "exercise_habit"),
+    ("diet", "lifestyle", "diet"),
+    ("test_name", "lab_result", "test_name"),
+    ("test_value", "lab_result", "test_value"),
+    ("unit", "lab_result", "unit"),
+    ("test_date", "lab_result", "test_date"),
+    ("treatment_type", "treatment", "treatment_type"),
+    ("start_date", "treatment", "start_date"),
+    ("end_date", "treatment", "end_date"),
+    ("outcome", "treatment", "outcome"),
+    ("diagnosis_date", "diagnosis", "diagnosis_date"),
+    ("relative", "family_history", "relative"),
+    ("condition_name", "medical_condition", "condition_name"),
+]
+
+
+# Long-format lab columns, replaced by one column per test in wide files
+LONG_LAB_HEADERS = ("test_name", "test_value", "unit")
+
+
+def _lab_headers(lab_columns: int) -> list:
+    return [f"{LAB_TESTS[i % len(LAB_TESTS)][0]} {i:03d}" for i in range(lab_columns)]
+
+
+def _headers(lab_columns: int) -> list:
+    if not lab_columns:
+        return [header for header, _, _ in COLUMNS]
+    return [header for header, _, _ in COLUMNS if header not in LONG_LAB_HEADERS] + _lab_headers(lab_columns)
+
+
+def build_mapping(extra_columns: int = 0, lab_columns: int = 0) -> dict:
+    """
+    Description: Mapping the stubbed LLM returns for a generated file.
+    Wide files list their test columns under lab_result.test_columns.
+    """
+    mappings = {}
+    for header, table, column in COLUMNS:
+        if lab_columns and header in LONG_LAB_HEADERS:
+            continue
+        mappings.setdefault(table, {})[column] = header
+    if lab_columns:
+        mappings["lab_result"]["test_columns"] = _lab_headers(lab_columns)
+    mappings["diagnosis"]["condition_id"] = "condition_name"
+    mappings["extras"] = {f"extra_{i}": None for i in range(extra_columns)}
+    return mappings
+
+
+def _random_date(rng: random.Random, start_year: int, end_year: int) -> str:
+    start = date(start_year, 1, 1)
+    days = (date(end_year, 12, 31) - start).days
+    return (start + timedelta(days=rng.randrange(days))).isoformat()
+
+
+def generate_rows(rows: int, extra_columns: int = 0, conditions: int = 50,
+                  conditions_per_row: int = 2, empty_ratio: float = 0.05, seed: int = 42,
+                  lab_columns: int = 0):
+    """
+    Description: Yield synthetic patient rows as lists, header row first.
+    With lab_columns the file is wide: one numeric column per lab test.
+    """
+    rng = random.Random(seed)
+    condition_names = [f"Condition {i:04d}" for i in range(conditions)]
+    mapped_headers = _headers(lab_columns)
+    yield mapped_headers + [f"extra_{i}" for i in range(extra_columns)]
+
+    for index in range(rows):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        hospital = rng.choice(HOSPITALS)
+        test_name, unit = rng.choice(LAB_TESTS)
+        start = _random_date(rng, 2015, 2023)
+        values = {
+            "first_name": first,
+            "last_name": last,
+            "date_of_birth": _random_date(rng, 1940, 2010),
+            "gender": rng.choice(["Male", "Female"]),
+            "phone": str(rng.randrange(10**9, 10**10)),
+            "email": f"{first.lower()}.{last.lower()}{index}@example.com",
+            "address": f"{rng.randrange(1, 999)} Street {rng.randrange(1, 99)}",
+            "country": rng.choice(COUNTRIES),
+            "hospital_name": hospital[0],
+            "hospital_address": hospital[1],
+            "smoking_status": rng.choice(SMOKING),
+            "alcohol_use": rng.choice(ALCOHOL),
+            "exercise_habit": rng.choice(EXERCISE),
+            "diet": rng.choice(DIETS),
+            "test_name": test_name,
+            "test_value": f"{rng.uniform(1, 200):.1f}",
+            "unit": unit,
+            "test_date": _random_date(rng, 2018, 2024),
+            "treatment_type": rng.choice(TREATMENTS),
+            "start_date": start,
+            "end_date": _random_date(rng, 2024, 2025),
+            "outcome": rng.choice(OUTCOMES),
+            "diagnosis_date": start,
+            "relative": rng.choice(RELATIVES),
+            "condition_name": ", ".join(rng.sample(condition_names, min(conditions_per_row, conditions))),
+        }
+        for header in mapped_headers[len(mapped_headers) - lab_columns:] if lab_columns else ():
+            values[header] = f"{rng.uniform(1, 200):.1f}"
+        row = [
+            "" if rng.random() < empty_ratio and header not in ("first_name", "last_name") else values[header]
+            for header in mapped_headers
+        ]
+        row.extend(f"x{rng.randrange(10**6)}" for _ in range(extra_columns))
+        yield row
+
+
+def write_file(path: Path, rows: int, fmt: str = "csv", **options) -> Path:
+    """
+    Description: Write a synthetic patient file in csv, tsv or xlsx format.
+    """
+    path = Path(path).with_suffix(f".{fmt}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    generated = generate_rows(rows, **options)
+
+    if fmt in ("csv", "tsv"):
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle, delimiter="," if fmt == "csv" else "\t")
+            writer.writerows(generated)
+    elif fmt == "xlsx":
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        for row in generated:
+            sheet.append(row)
+        workbook.save(path)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+    return path
@@ -0,0 +1,3 @@
+-- Chunked, resumable ingestion (FileUploadLog.last_committed_row / mapping)
+ALTER TABLE file_upload_log ADD COLUMN IF NOT EXISTS last_committed_row INTEGER DEFAULT 0;
+ALTER TABLE file_upload_log ADD COLUMN IF NOT EXISTS mapping JSON;
@@ -0,0 +1,15 @@
+-- Indexes backing per-file delete / reprocess and patient child lookups
+CREATE INDEX IF NOT EXISTS ix_hospital_file_id ON hospital (file_id);
+CREATE INDEX IF NOT EXISTS ix_patient_file_id ON patient (file_id);
+CREATE INDEX IF NOT EXISTS ix_patient_hospital_id ON patient (hospital_id);
+CREATE INDEX IF NOT EXISTS ix_family_history_file_id ON family_history (file_id);
+CREATE INDEX IF NOT EXISTS ix_family_history_patient_id ON family_history (patient_id);
+CREATE INDEX IF NOT EXISTS ix_diagnosis_file_id ON diagnosis (file_id);
+CREATE INDEX IF NOT EXISTS ix_diagnosis_patient_id ON diagnosis (patient_id);
+CREATE INDEX IF NOT EXISTS ix_treatment_file_id ON treatment (file_id);
+CREATE INDEX IF NOT EXISTS ix_treatment_patient_id ON treatment (patient_id);
+CREATE INDEX IF NOT EXISTS ix_lifestyle_file_id ON lifestyle (file_id);
+CREATE INDEX IF NOT EXISTS ix_lifestyle_patient_id ON lifestyle (patient_id);
+CREATE INDEX IF NOT EXISTS ix_lab_result_file_id ON lab_result (file_id);
+CREATE INDEX IF NOT EXISTS ix_lab_result_patient_id ON lab_result (patient_id);
+CREATE INDEX IF NOT EXISTS ix_patient_condition_condition_id ON patient_condition (condition_id);
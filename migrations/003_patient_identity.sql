@@ -0,0 +1,6 @@
+-- Blocking index for cross-file patient identity resolution
+CREATE TABLE IF NOT EXISTS patient_identity (
+    identity_key TEXT PRIMARY KEY,
+    patient_id INT REFERENCES patient(patient_id)
+);
+CREATE INDEX IF NOT EXISTS ix_patient_identity_patient_id ON patient_identity (patient_id);
@@ -0,0 +1,9 @@
+-- Indexes backing GET /patients/search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Expression must match FULL_NAME in app/dao/patient_search.py
+CREATE INDEX IF NOT EXISTS ix_patient_full_name_trgm ON patient
+    USING gin ((lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_patient_date_of_birth ON patient (date_of_birth);
+CREATE INDEX IF NOT EXISTS ix_hospital_name_trgm ON hospital USING gin (hospital_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_medical_condition_name_lower ON medical_condition (lower(condition_name));
@@ -0,0 +1,6 @@
+-- Denormalized patient documents, refreshed per ingested file
+CREATE TABLE IF NOT EXISTS patient_profile (
+    patient_id INT PRIMARY KEY REFERENCES patient(patient_id),
+    document JSONB,
+    refreshed_at TIMESTAMP DEFAULT NOW()
+);
@@ -0,0 +1,3 @@
+-- Change marker for the HTTP cache version token (app/utils/http_cache.py)
+ALTER TABLE file_upload_log ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+CREATE INDEX IF NOT EXISTS ix_file_upload_log_updated_at ON file_upload_log (updated_at);
@@ -0,0 +1,3 @@
+-- Type coercion stage: numeric lab values and the invalid value report
+ALTER TABLE lab_result ADD COLUMN IF NOT EXISTS test_value_numeric DOUBLE PRECISION;
+ALTER TABLE file_upload_log ADD COLUMN IF NOT EXISTS invalid_types TEXT[];
@@ -0,0 +1,4 @@
+-- Keyset pagination of /file/logs/ (app/dao/get_statistics.py), newest first,
+-- optionally for one status
+CREATE INDEX IF NOT EXISTS ix_file_upload_log_upload_time ON file_upload_log (upload_time DESC, file_id DESC);
+CREATE INDEX IF NOT EXISTS ix_file_upload_log_status_upload_time ON file_upload_log (status, upload_time DESC, file_id DESC);
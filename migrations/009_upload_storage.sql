@@ -0,0 +1,4 @@
+-- Upload file lifecycle: at-rest compression, retention and disk budget (app/services/upload_storage.py)
+ALTER TABLE file_upload_log ADD COLUMN IF NOT EXISTS storage_state TEXT;
+ALTER TABLE file_upload_log ADD COLUMN IF NOT EXISTS stored_bytes BIGINT;
+ALTER TABLE file_upload_log ADD COLUMN IF NOT EXISTS reclaimed_bytes BIGINT DEFAULT 0;
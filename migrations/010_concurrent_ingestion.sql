@@ -0,0 +1,42 @@
+-- Concurrency-safe ingestion: idempotent /file/upload/process retries and
+-- unique keys for the hospital / condition upserts (app/dao/insert_data.py,
+-- app/dao/insert_medical_conditions.py). Duplicates left by racing
+-- get-or-create calls are merged onto the lowest id first.
+BEGIN;
+
+ALTER TABLE file_upload_log ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+ALTER TABLE file_upload_log ADD COLUMN IF NOT EXISTS process_result JSON;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_file_upload_log_idempotency_key ON file_upload_log (idempotency_key);
+
+CREATE TEMP TABLE condition_merge ON COMMIT DROP AS
+SELECT condition_id, keep_id FROM (
+    SELECT condition_id, min(condition_id) OVER (PARTITION BY lower(condition_name)) AS keep_id
+    FROM medical_condition
+) ranked
+WHERE condition_id <> keep_id;
+
+INSERT INTO patient_condition (patient_id, condition_id)
+SELECT pc.patient_id, m.keep_id FROM patient_condition pc JOIN condition_merge m USING (condition_id)
+ON CONFLICT DO NOTHING;
+DELETE FROM patient_condition pc USING condition_merge m WHERE pc.condition_id = m.condition_id;
+UPDATE diagnosis d SET condition_id = m.keep_id FROM condition_merge m WHERE d.condition_id = m.condition_id;
+UPDATE family_history f SET condition_id = m.keep_id FROM condition_merge m WHERE f.condition_id = m.condition_id;
+DELETE FROM medical_condition c USING condition_merge m WHERE c.condition_id = m.condition_id;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_medical_condition_name ON medical_condition (lower(condition_name));
+-- Same key as 004's ix_medical_condition_name_lower, which the unique index replaces
+DROP INDEX IF EXISTS ix_medical_condition_name_lower;
+
+CREATE TEMP TABLE hospital_merge ON COMMIT DROP AS
+SELECT hospital_id, keep_id FROM (
+    SELECT hospital_id, min(hospital_id) OVER (
+        PARTITION BY coalesce(hospital_name, ''), coalesce(hospital_address, '')
+    ) AS keep_id
+    FROM hospital
+) ranked
+WHERE hospital_id <> keep_id;
+
+UPDATE patient p SET hospital_id = m.keep_id FROM hospital_merge m WHERE p.hospital_id = m.hospital_id;
+DELETE FROM hospital h USING hospital_merge m WHERE h.hospital_id = m.hospital_id;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_hospital_name_address ON hospital (coalesce(hospital_name, ''), coalesce(hospital_address, ''));
+
+COMMIT;
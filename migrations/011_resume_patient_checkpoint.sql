@@ -0,0 +1,5 @@
+-- Resume checkpoint: FileUploadLog.last_committed_row now counts input rows, and
+-- last_committed_patient_id is the file's highest patient at that checkpoint.
+-- Checkpoints written earlier are kept; they only differ from input rows where
+-- long lab rows were grouped, and resume without removing uncheckpointed patients.
+ALTER TABLE file_upload_log ADD COLUMN IF NOT EXISTS last_committed_patient_id INTEGER;
@@ -0,0 +1,13 @@
+-- Owning file of patient_condition links and patient_identity keys, so deleting a
+-- file removes only its own (app/dao/delete_file_data.py). Existing rows are
+-- attributed to their patient's file.
+ALTER TABLE patient_condition ADD COLUMN IF NOT EXISTS file_id INTEGER REFERENCES file_upload_log(file_id);
+ALTER TABLE patient_identity ADD COLUMN IF NOT EXISTS file_id INTEGER REFERENCES file_upload_log(file_id);
+
+UPDATE patient_condition pc SET file_id = p.file_id
+FROM patient p WHERE p.patient_id = pc.patient_id AND pc.file_id IS NULL;
+UPDATE patient_identity pi SET file_id = p.file_id
+FROM patient p WHERE p.patient_id = pi.patient_id AND pi.file_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_patient_condition_file_id ON patient_condition (file_id);
+CREATE INDEX IF NOT EXISTS ix_patient_identity_file_id ON patient_identity (file_id);
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Config reads the environment on import, so the test database and upload dir are set first
+_TMP = Path(tempfile.mkdtemp(prefix="dmt-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP / 'test.db'}"
+os.environ["UPLOAD_DIR"] = str(_TMP / "uploads")
+os.environ["GEMINI_API_KEY"] = "test"
+os.environ["PRELOAD_HEAVY_MODULES"] = "false"
+os.environ["UPLOAD_COMPRESSION"] = "off"
+os.environ["LOG_LEVEL"] = "WARNING"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import app  # noqa: E402
+from app.database.connection import SessionLocal, engine  # noqa: E402
+from app.models.core import Base  # noqa: E402
+from app.services.file_service import FileService  # noqa: E402
+from app.utils.http_cache import response_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def database():
+    # A fresh schema and upload dir per test; cached bodies are keyed on data the reset reuses
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    shutil.rmtree(FileService.UPLOAD_DIR, ignore_errors=True)
+    FileService.UPLOAD_DIR.mkdir(parents=True)
+    response_cache.clear()
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def upload():
+    """Write a CSV into the upload dir, as /file/upload/preview would have saved it."""
+    def write(name: str, rows: list) -> Path:
+        path = FileService.UPLOAD_DIR / name
+        path.write_text("\n".join(",".join(str(cell) for cell in row) for row in rows) + "\n")
+        return path
+    return write
+
+
+@pytest.fixture
+def process(client):
+    """POST /file/upload/process for an uploaded file and mapping."""
+    def run(name: str, mapping: dict, **headers):
+        return client.post("/file/upload/process", json={"file_name": name, "mapping": mapping}, headers=headers)
+    return run
@@ -0,0 +1,42 @@
+import pandas as pd
+from sqlalchemy import select
+
+from app.models.core import Condition, Diagnosis, Patient
+from app.utils.coercion import coerce_frame
+
+PATIENT = {"first_name": "First", "last_name": "Last", "date_of_birth": "DOB", "phone": "Phone"}
+
+
+def test_text_columns_keep_leading_zeros(db, upload, process):
+    upload("a.csv", [["First", "Last", "DOB", "Phone"], ["Ann", "Lee", "1980-01-02", "0412345678"]])
+
+    assert process("a.csv", {"patient": PATIENT}).status_code == 200
+
+    assert db.scalars(select(Patient.phone)).all() == ["0412345678"]
+
+
+def test_coerce_frame_handles_non_string_headers():
+    # Excel headers can be numbers, and the mapping carries them as they were read
+    frame = pd.DataFrame({"First": [" Ann "], 2024: [" Never "], "DOB": ["1980-01-02"]})
+
+    coerced, _, invalid = coerce_frame(frame, {
+        "patient": {"first_name": "First", "date_of_birth": "DOB"}, "lifestyle": {"smoking_status": 2024},
+    })
+
+    assert coerced["First"].tolist() == ["Ann"]
+    assert coerced[2024].tolist() == ["Never"]
+    assert str(coerced["DOB"].iloc[0]) == "1980-01-02"
+    assert invalid == {}
+
+
+def test_condition_names_are_normalized_like_patient_conditions(db, upload, process):
+    upload("a.csv", [["First", "Last", "DOB", "Cond", "Diagnosed"], ["Ann", "Lee", "1980-01-02", "Flu", " Flu "]])
+
+    assert process("a.csv", {
+        "patient": {"first_name": "First", "last_name": "Last", "date_of_birth": "DOB"},
+        "medical_condition": {"condition_name": "Cond"},
+        "diagnosis": {"condition_name": "Diagnosed"},
+    }).status_code == 200
+
+    assert db.scalars(select(Condition.condition_name)).all() == ["flu"]
+    assert db.scalars(select(Diagnosis.condition_id)).all() == db.scalars(select(Condition.condition_id)).all()
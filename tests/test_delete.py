@@ -0,0 +1,74 @@
+from sqlalchemy import select
+
+from app.models.core import Condition, Lifestyle, Patient, PatientIdentity, patient_conditions
+
+PATIENT = {"first_name": "First", "last_name": "Last", "date_of_birth": "DOB"}
+ANN = ["Ann", "Lee", "1980-01-02"]
+
+
+def _conditions(db, patient_id: int) -> set:
+    return set(db.execute(
+        select(Condition.condition_name, patient_conditions.c.file_id)
+        .join(patient_conditions, patient_conditions.c.condition_id == Condition.condition_id)
+        .where(patient_conditions.c.patient_id == patient_id)
+    ).all())
+
+
+def test_delete_keeps_a_merged_patient_without_the_deleted_files_links(client, db, upload, process):
+    mapping = {"patient": PATIENT, "lifestyle": {"smoking_status": "Smoking"}, "medical_condition": {"condition_name": "Cond"}}
+    upload("a.csv", [["First", "Last", "DOB", "Smoking", "Cond"], ANN + ["Never", "flu"]])
+    upload("b.csv", [["First", "Last", "DOB", "Smoking", "Cond"], ANN + ["Daily", "asthma"]])
+    first, second = process("a.csv", mapping).json()["file_id"], process("b.csv", mapping).json()["file_id"]
+
+    assert client.delete(f"/file/{first}").status_code == 200
+
+    patient = db.scalars(select(Patient)).one()
+    assert patient.file_id == second
+    assert _conditions(db, patient.patient_id) == {("asthma", second)}
+    assert db.scalars(select(Lifestyle.smoking_status)).all() == ["Daily"]
+    # Re-keyed under the file that now owns the patient, so later files still match it
+    keys = db.execute(select(PatientIdentity.patient_id, PatientIdentity.file_id)).all()
+    assert keys and set(keys) == {(patient.patient_id, second)}
+
+
+def test_delete_keeps_a_patient_other_files_only_added_conditions_to(client, db, upload, process):
+    upload("a.csv", [["First", "Last", "DOB", "Smoking", "Cond"], ANN + ["Never", "flu"]])
+    upload("b.csv", [["First", "Last", "DOB", "Cond"], ANN + ["asthma"]])
+    first = process("a.csv", {
+        "patient": PATIENT, "lifestyle": {"smoking_status": "Smoking"}, "medical_condition": {"condition_name": "Cond"},
+    }).json()["file_id"]
+    second = process("b.csv", {"patient": PATIENT, "medical_condition": {"condition_name": "Cond"}}).json()["file_id"]
+
+    assert client.delete(f"/file/{first}").status_code == 200
+
+    patient = db.scalars(select(Patient)).one()
+    assert patient.file_id == second
+    assert _conditions(db, patient.patient_id) == {("asthma", second)}
+    assert db.scalars(select(Lifestyle)).all() == []
+
+
+def test_delete_removes_patients_no_other_file_references(client, db, upload, process):
+    mapping = {"patient": PATIENT, "medical_condition": {"condition_name": "Cond"}}
+    upload("a.csv", [["First", "Last", "DOB", "Cond"], ANN + ["flu"]])
+    file_id = process("a.csv", mapping).json()["file_id"]
+
+    deleted = client.delete(f"/file/{file_id}").json()["deleted"]
+
+    assert (deleted["patient"], deleted["patient_condition"]) == (1, 1)
+    assert db.scalars(select(Patient)).all() == []
+    assert db.scalars(select(PatientIdentity)).all() == []
+
+
+def test_reprocess_merges_back_onto_a_patient_another_file_shares(client, db, upload, process):
+    mapping = {"patient": PATIENT, "lifestyle": {"smoking_status": "Smoking"}, "medical_condition": {"condition_name": "Cond"}}
+    upload("a.csv", [["First", "Last", "DOB", "Smoking", "Cond"], ANN + ["Never", "flu"]])
+    upload("b.csv", [["First", "Last", "DOB", "Smoking", "Cond"], ANN + ["Daily", "asthma"]])
+    first, second = process("a.csv", mapping).json()["file_id"], process("b.csv", mapping).json()["file_id"]
+
+    response = client.post(f"/file/{first}/reprocess", json={})
+
+    assert response.status_code == 200
+    patient = db.scalars(select(Patient)).one()
+    assert _conditions(db, patient.patient_id) == {("flu", first), ("asthma", second)}
+    assert sorted(db.scalars(select(Lifestyle.smoking_status))) == ["Daily", "Never"]
+    assert set(db.scalars(select(PatientIdentity.patient_id))) == {patient.patient_id}
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.core import FileUploadLog
+
+# Two pairs share an upload time, so pages also split on the file_id tie breaker
+UPLOAD_TIMES = [datetime(2026, 1, day) for day in (1, 2, 2, 3, 3, 4, 5)]
+
+
+@pytest.fixture
+def logs(db):
+    rows = [
+        FileUploadLog(filename=f"f{index}.csv", file_type="csv", status="failed" if index % 3 == 0 else "processed",
+                      upload_time=upload_time)
+        for index, upload_time in enumerate(UPLOAD_TIMES)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return sorted(rows, key=lambda row: (row.upload_time, row.file_id), reverse=True)
+
+
+def _pages(client, **params) -> list:
+    pages, cursor = [], None
+    while True:
+        response = client.get("/file/logs/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append([row["file_id"] for row in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_every_log_once_newest_first(client, logs):
+    pages = _pages(client, limit=2)
+
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    assert sum(pages, []) == [row.file_id for row in logs]
+
+
+def test_cursor_pages_keep_the_filters(client, logs):
+    pages = _pages(client, limit=1, status="processed")
+
+    assert sum(pages, []) == [row.file_id for row in logs if row.status == "processed"]
+
+
+def test_an_unknown_cursor_is_rejected(client, logs):
+    assert client.get("/file/logs/", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,39 @@
+import pytest
+
+PATIENT = {"first_name": "First", "last_name": "Last", "date_of_birth": "DOB"}
+
+CACHED_ENDPOINTS = [
+    "/file/logs/", "/file/data/all", "/file/data/1",
+    "/dashboard/summary", "/dashboard/validation-summary", "/dashboard/upload-trends",
+]
+
+
+@pytest.fixture
+def ingested(upload, process):
+    upload("a.csv", [["First", "Last", "DOB"], ["Ann", "Lee", "1980-01-02"]])
+    assert process("a.csv", {"patient": PATIENT}).json()["file_id"] == 1
+
+
+@pytest.mark.parametrize("path", CACHED_ENDPOINTS)
+def test_a_current_etag_revalidates_with_304(client, ingested, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    revalidated = client.get(path, headers={"If-None-Match": etag})
+
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize("path", CACHED_ENDPOINTS)
+def test_new_data_changes_the_etag(client, ingested, upload, process, path):
+    etag = client.get(path).headers["ETag"]
+    upload("b.csv", [["First", "Last", "DOB"], ["Bo", "Kim", "1975-05-06"]])
+    assert process("b.csv", {"patient": PATIENT}).status_code == 200
+
+    response = client.get(path, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,29 @@
+from sqlalchemy import func, select
+
+from app.models.core import FileUploadLog, Patient
+
+PATIENT = {"first_name": "First", "last_name": "Last", "date_of_birth": "DOB"}
+ROWS = [["First", "Last", "DOB"], ["Ann", "Lee", "1980-01-02"]]
+
+
+def test_a_repeated_key_replays_the_first_response(db, upload, process):
+    upload("a.csv", ROWS)
+
+    first = process("a.csv", {"patient": PATIENT}, **{"Idempotency-Key": "k1"})
+    again = process("a.csv", {"patient": PATIENT}, **{"Idempotency-Key": "k1"})
+
+    assert (first.status_code, again.status_code) == (200, 200)
+    assert again.json() == first.json()
+    assert db.scalar(select(func.count()).select_from(FileUploadLog)) == 1
+    assert db.scalar(select(func.count()).select_from(Patient)) == 1
+
+
+def test_a_key_is_bound_to_its_file(db, upload, process):
+    upload("a.csv", ROWS)
+    upload("b.csv", ROWS)
+    assert process("a.csv", {"patient": PATIENT}, **{"Idempotency-Key": "k1"}).status_code == 200
+
+    response = process("b.csv", {"patient": PATIENT}, **{"Idempotency-Key": "k1"})
+
+    assert response.status_code == 422
+    assert db.scalar(select(func.count()).select_from(FileUploadLog)) == 1
@@ -0,0 +1,17 @@
+def _labelled_paths(metrics: str) -> set:
+    return {
+        line.split('path="', 1)[1].split('"', 1)[0]
+        for line in metrics.splitlines()
+        if line.startswith("dmt_http_request_duration_seconds_count")
+    }
+
+
+def test_metrics_label_requests_with_the_mounted_route_path(client):
+    client.get("/file/logs/")
+    client.delete("/file/123")
+    client.get("/patients/search")
+
+    paths = _labelled_paths(client.get("/metrics").text)
+
+    assert {"/file/logs/", "/file/{file_id}", "/patients/search"} <= paths
+    assert not {"/logs/", "/{file_id}", "/search"} & paths
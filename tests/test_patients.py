@@ -0,0 +1,42 @@
+from sqlalchemy import select
+
+from app.dao.identity_resolution import PatientResolver
+from app.models.core import Lifestyle, Patient, PatientIdentity
+
+PATIENT = {"first_name": "First", "last_name": "Last", "date_of_birth": "DOB"}
+
+
+def test_repeats_within_a_chunk_merge_onto_the_inserted_patient(db, upload, process):
+    upload("a.csv", [
+        ["First", "Last", "DOB", "Smoking"],
+        ["Ann", "Lee", "1980-01-02", "Never"],
+        ["Bo", "Kim", "1975-05-06", "Daily"],
+        ["ann", "LEE", "1980-01-02", "Former"],
+    ])
+
+    assert process("a.csv", {"patient": PATIENT, "lifestyle": {"smoking_status": "Smoking"}}).status_code == 200
+
+    patients = dict(db.execute(select(Patient.first_name, Patient.patient_id)).all())
+    assert set(patients) == {"Ann", "Bo"}
+    lifestyles = db.execute(select(Lifestyle.patient_id, Lifestyle.smoking_status).order_by(Lifestyle.lifestyle_id)).all()
+    assert lifestyles == [(patients["Ann"], "Never"), (patients["Bo"], "Daily"), (patients["Ann"], "Former")]
+    assert set(db.scalars(select(PatientIdentity.patient_id))) == set(patients.values())
+
+
+def test_a_key_claimed_after_the_lookup_merges_onto_its_owner(db, upload, process, monkeypatch):
+    mapping = {"patient": PATIENT, "lifestyle": {"smoking_status": "Smoking"}}
+    upload("a.csv", [["First", "Last", "DOB", "Smoking"], ["Ann", "Lee", "1980-01-02", "Never"]])
+    upload("b.csv", [["First", "Last", "DOB", "Smoking"], ["Ann", "Lee", "1980-01-02", "Daily"]])
+    assert process("a.csv", mapping).status_code == 200
+    # As if a concurrent ingestion stored the key between this one's lookup and its insert
+    monkeypatch.setattr(PatientResolver, "prefetch", lambda self, patient_rows: None)
+
+    response = process("b.csv", mapping)
+
+    assert response.status_code == 200
+    assert (response.json()["patients_created"], response.json()["patients_merged"]) == (0, 1)
+    patient_id = db.scalars(select(Patient.patient_id)).one()
+    assert db.execute(select(Lifestyle.patient_id, Lifestyle.smoking_status)).all() == [
+        (patient_id, "Never"), (patient_id, "Daily"),
+    ]
+    assert set(db.scalars(select(PatientIdentity.patient_id))) == {patient_id}
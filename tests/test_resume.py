@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+import app.services.ingest_pipeline as ingest_pipeline
+from app.config import Config
+from app.models.core import FileUploadLog, LabResult, Lifestyle, Patient
+
+LONG_LABS = {
+    "patient": {"first_name": "First", "last_name": "Last", "date_of_birth": "DOB"},
+    "lab_result": {"test_name": "Test", "test_value": "Value"},
+}
+
+
+def _long_lab_rows(patients: int, tests: int) -> list:
+    rows = [["First", "Last", "DOB", "Test", "Value"]]
+    for i in range(patients):
+        rows += [[f"F{i}", f"L{i}", "1980-01-02", f"T{t}", t] for t in range(tests)]
+    return rows
+
+
+@pytest.fixture
+def chunks(monkeypatch):
+    monkeypatch.setattr(Config, "INGEST_CHUNK_SIZE", 10)
+
+
+@pytest.fixture
+def fail_second_chunk(monkeypatch):
+    """Make the child writer fail on its second chunk."""
+    insert = ingest_pipeline.insert_child_rows
+    calls = []
+
+    def failing(db, child_rows, timer):
+        calls.append(1)
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("connection lost"))
+        return insert(db, child_rows, timer)
+
+    monkeypatch.setattr(ingest_pipeline, "insert_child_rows", failing)
+    return lambda: monkeypatch.setattr(ingest_pipeline, "insert_child_rows", insert)
+
+
+def test_resume_continues_after_the_last_committed_chunk(client, db, upload, process, chunks, fail_second_chunk):
+    upload("labs.csv", _long_lab_rows(patients=10, tests=3))
+
+    failed = process("labs.csv", LONG_LABS)
+    assert failed.status_code == 500
+    log = db.scalars(select(FileUploadLog)).one()
+    # The checkpoint counts input rows, not patients grouped out of them
+    assert (log.status, log.last_committed_row) == ("failed", 10)
+
+    fail_second_chunk()
+    resumed = client.post(f"/file/{log.file_id}/resume")
+
+    assert resumed.status_code == 200
+    assert resumed.json()["resumed_from"] == 10
+    assert resumed.json()["rows"] == 30
+    assert db.scalar(select(func.count()).select_from(LabResult)) == 30
+    assert db.scalar(select(func.count()).select_from(Patient)) == 10
+
+
+def test_resume_with_other_frame_boundaries_neither_skips_nor_replays(
+        client, db, upload, process, chunks, fail_second_chunk, monkeypatch):
+    upload("labs.csv", _long_lab_rows(patients=10, tests=3))
+    monkeypatch.setattr(ingest_pipeline, "READ_CHUNK_ROWS", 7)
+    assert process("labs.csv", LONG_LABS).status_code == 500
+
+    # Another reader (here: frame size) on the resumed run
+    fail_second_chunk()
+    monkeypatch.setattr(ingest_pipeline, "READ_CHUNK_ROWS", 13)
+    log = db.scalars(select(FileUploadLog)).one()
+    assert client.post(f"/file/{log.file_id}/resume").status_code == 200
+
+    tests = db.execute(select(LabResult.patient_id, LabResult.test_name)).all()
+    assert len(tests) == len(set(tests)) == 30
+
+
+def test_resume_removes_patients_a_killed_run_wrote_past_the_checkpoint(
+        client, db, upload, process, chunks, fail_second_chunk, monkeypatch):
+    monkeypatch.setattr(Config, "PATIENT_MATCH_POLICY", "off")
+    upload("people.csv", [["First", "Last", "Smoking"]] + [[f"F{i}", f"L{i}", "Never"] for i in range(30)])
+    mapping = {"patient": {"first_name": "First", "last_name": "Last"}, "lifestyle": {"smoking_status": "Smoking"}}
+
+    # A killed process never gets to remove the parents written ahead of the failed chunk
+    monkeypatch.setattr(ingest_pipeline.IngestPipeline, "_discard_uncommitted_parents", lambda self: None)
+    assert process("people.csv", mapping).status_code == 500
+    assert db.scalar(select(func.count()).select_from(Patient)) > 10
+
+    fail_second_chunk()
+    log = db.scalars(select(FileUploadLog)).one()
+    assert client.post(f"/file/{log.file_id}/resume").status_code == 200
+
+    assert db.scalar(select(func.count()).select_from(Patient)) == 30
+    assert db.scalar(select(func.count()).select_from(Lifestyle)) == 30
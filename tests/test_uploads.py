@@ -0,0 +1,33 @@
+from sqlalchemy import select
+
+from app.models.core import FileUploadLog, Patient
+from app.services.upload_storage import compress_upload
+
+PATIENT = {"first_name": "First", "last_name": "Last", "date_of_birth": "DOB"}
+ROWS = [["First", "Last", "DOB"], ["Ann", "Lee", "1980-01-02"], ["Bo", "Kim", "1975-05-06"]]
+
+
+def test_processing_again_reads_an_upload_compressed_at_rest(db, upload, process):
+    path = upload("a.csv", ROWS)
+    size = path.stat().st_size
+    assert process("a.csv", {"patient": PATIENT}).status_code == 200
+    compressed = compress_upload(path, "gzip")
+    path.unlink()
+
+    response = process("a.csv", {"patient": PATIENT})
+
+    assert response.status_code == 200
+    log = db.get(FileUploadLog, response.json()["file_id"])
+    assert (log.local_path, log.storage_state) == (str(path), "gzip")
+    assert (log.file_size, log.stored_bytes) == (round(size / 1024, 3), compressed.stat().st_size)
+    assert log.total_rows == 2
+
+
+def test_process_only_reads_from_the_upload_dir(db, upload, process):
+    upload("a.csv", ROWS)
+
+    response = process("../../a.csv", {"patient": PATIENT})
+
+    assert response.status_code == 200
+    assert db.get(FileUploadLog, response.json()["file_id"]).filename == "a.csv"
+    assert len(db.scalars(select(Patient)).all()) == 2